@@ -15,7 +15,9 @@ import os
 from dotenv import load_dotenv
 from math import radians, sin, cos, sqrt, atan2
 
+from src.qa.aos_index import AOSIndex
 from src.qa.qa_chain import setup_hawker_guru
+from src.qa.router import IntentRouter
 from src.helper_functions.utility import check_password
 from src.models.data_models import LocationDetails, NearbyCenter, CalculationResults
 
@@ -32,14 +34,15 @@ class SessionState:
         """Initialize all session state variables."""
         if 'chat_history' not in st.session_state:
             st.session_state.chat_history = []
-        if 'messages' not in st.session_state:
-            st.session_state.messages = []
         if 'chat_started' not in st.session_state:
             st.session_state.chat_started = False
         if 'calculator_started' not in st.session_state:
             st.session_state.calculator_started = False
         if 'qa_chain' not in st.session_state:
             st.session_state.qa_chain = setup_hawker_guru()
+        if 'memory' not in st.session_state:
+            # History sent to the chain, kept under a token budget
+            st.session_state.memory = st.session_state.qa_chain.create_memory()
         if 'disclaimer_accepted' not in st.session_state:
             st.session_state.disclaimer_accepted = False
         if 'calc_results' not in st.session_state:
@@ -56,6 +59,12 @@ class DataLoader:
         df.columns = df.columns.str.strip()
         return df
     
+    @staticmethod
+    @st.cache_resource
+    def load_article_index() -> AOSIndex:
+        """Load the searchable Guide to Articles of Sale."""
+        return AOSIndex.from_json(Path("data/article_of_sale.json"))
+    
     @staticmethod
     def get_stall_count(df: pd.DataFrame, hawker_centre: str, stall_type: str) -> int:
         """Get the number of stalls for a specific hawker centre and stall type."""
@@ -242,6 +251,18 @@ class MapService:
 class ChatInterface:
     """Handles chat interface and interactions."""
     
+    @staticmethod
+    @st.cache_resource
+    def get_intent_router(_df: pd.DataFrame) -> IntentRouter:
+        """Get the router that answers hawker centre lookups from the data."""
+        return IntentRouter(
+            _df['Hawker Centre'].tolist(),
+            stall_count=lambda centre, stall_type: DataLoader.get_stall_count(_df, centre, stall_type),
+            landlord=lambda centre: DataLoader.get_landlord(_df, centre),
+            aliases=dict(zip(_df['Hawker Centre_HCMS'], _df['Hawker Centre'])),
+            articles=DataLoader.load_article_index()
+        )
+    
     @staticmethod
     def display_chat_interface(df: pd.DataFrame, hawker_centre: str, stall_type: str) -> None:
         """Display and handle the chat interface."""
@@ -254,49 +275,56 @@ class ChatInterface:
         if prompt := st.chat_input("Ask about bidding, regulations, or costs..."):
             st.session_state.chat_history.append({"role": "user", "content": prompt})
             
-            context = ChatInterface._build_chat_context(df, hawker_centre, stall_type, prompt)
+            with st.chat_message("user"):
+                st.markdown(prompt)
             
-            with st.spinner('Thinking...'):
-                response = st.session_state.qa_chain.invoke({
-                    "question": context,
-                    "chat_history": st.session_state.messages
-                })
-                
-                st.session_state.messages.append((prompt, response['answer']))
+            # Answer lookups such as stall counts straight from the data
+            route = ChatInterface.get_intent_router(df).route(prompt, hawker_centre, stall_type)
+            if route.is_fast_path:
+                st.session_state.memory.add_turn(prompt, route.answer)
                 st.session_state.chat_history.append({
-                    "role": "assistant", 
-                    "content": response['answer']
+                    "role": "assistant",
+                    "content": route.answer
                 })
+                st.rerun()
+            
+            context = ChatInterface._build_chat_context(df, hawker_centre, stall_type)
+            
+            # Render the answer as it is generated
+            with st.chat_message("assistant"):
+                response = {}
+                
+                def answer_tokens():
+                    for event in st.session_state.qa_chain.stream({
+                        "question": prompt,
+                        "system_context": context,
+                        "chat_history": st.session_state.memory.chat_history(),
+                        "cache_scope": f"{hawker_centre}|{stall_type}"
+                    }):
+                        if "token" in event:
+                            yield event["token"]
+                        else:
+                            response.update(event)
+                
+                st.write_stream(answer_tokens())
+            
+            st.session_state.memory.add_turn(prompt, response['answer'])
+            st.session_state.chat_history.append({
+                "role": "assistant", 
+                "content": response['answer']
+            })
             
             st.rerun()
     
     @staticmethod
-    def _build_chat_context(df: pd.DataFrame, hawker_centre: str, 
-                           stall_type: str, prompt: str) -> str:
-        """Build context for the chat interaction."""
-        return f"""You are HawkerGuru, a helpful assistant for Singapore hawker stall bidding. 
-        When answering questions, follow these guidelines:
-
-        1. For general questions about tendering process, requirements, or guidelines:
-           - First provide the general information from the tender notice and guidelines
-           - Only mention location-specific details if they are directly relevant to the question
-           - Do not restrict your answer to the currently selected location unless specifically asked
-
-        2. For questions about Articles of Sale (AOS):
-           - First provide the general rules from the AOS guide
-           - Only then mention any location-specific restrictions if relevant
-
-        3. For questions specifically about the selected location:
-           - Hawker Centre: {hawker_centre}
-           - Stall Type: {stall_type}
-           - Number of Stalls: {DataLoader.get_stall_count(df, hawker_centre, stall_type)}
-           - Landlord: {DataLoader.get_landlord(df, hawker_centre)}
-
-        Current user's question seems to be about: {prompt}
-        
-        Provide a comprehensive answer that prioritizes relevant general information first, 
-        followed by specific details only when they add value to the response.
-        """
+    def _build_chat_context(df: pd.DataFrame, hawker_centre: str, stall_type: str) -> str:
+        """Build the facts about the user's selection added to the answer prompt."""
+        return (
+            f"- Hawker Centre: {hawker_centre}\n"
+            f"- Stall Type: {stall_type}\n"
+            f"- Number of Stalls: {DataLoader.get_stall_count(df, hawker_centre, stall_type)}\n"
+            f"- Landlord: {DataLoader.get_landlord(df, hawker_centre)}"
+        )
 
 class FinancialCalculator:
     """Handles rental calculations and financial projections."""
@@ -713,6 +741,7 @@ class HawkerGuruApp:
         hawker_list = sorted(self.df["Hawker Centre"].tolist())
         self._display_selection_interface(hawker_list)
         self._display_location_details()
+        self._display_article_search()
         self._display_action_buttons()
         
         main_content = st.container()
@@ -832,6 +861,31 @@ class HawkerGuruApp:
                 if pd.notna(count) and count > 0:
                     st.markdown(f"• **{display_name}**: {int(count)}")
     
+    def _display_article_search(self) -> None:
+        """Display a lookup of what can be sold at each stall type."""
+        with st.expander("🔎 What can I sell?"):
+            item = st.text_input("Item you plan to sell", placeholder="e.g. bubble tea, fresh prawns")
+            if not item:
+                return
+            
+            stall_type = st.session_state.selected_stalltype
+            index = DataLoader.load_article_index()
+            only_selected = stall_type in index.stall_types and st.checkbox(
+                f"Only show articles for {stall_type.lower()} stalls"
+            )
+            matches = index.search(item, stall_type if only_selected else None)
+            if not matches:
+                st.info("No matching articles of sale. Try another name for the item, or ask HawkerGuru.")
+                return
+            
+            for match in matches:
+                article = match.article
+                stall_types = ", ".join(article.stall_types)
+                if match.excluded:
+                    st.markdown(f"⚠️ **{article.article}** ({stall_types}) excludes this item: {article.remarks}")
+                else:
+                    st.markdown(f"• **{article.article}** ({stall_types}): {article.remarks}")
+    
     def _display_action_buttons(self) -> None:
         """Display main action buttons."""
         st.markdown("---")
@@ -0,0 +1,111 @@
+"""
+Benchmark of the FAISS index types against the exact flat index.
+
+Builds each index type over synthetic corpora at several multiples of the
+current corpus size and reports recall@k against exact search, p50/p99
+single-query latency, index memory and build time.
+
+Usage:
+    python -m src.benchmarks.index_benchmark [--scales 10 100 1000] [--dimensions 256]
+"""
+
+import argparse
+import time
+from typing import Dict, List
+
+import faiss
+import numpy as np
+
+from src.qa.index_store import INDEX_TYPES, create_index
+from src.qa.settings import load_qa_settings
+
+BASE_CHUNKS = 150  # Roughly the number of chunks in the current three documents
+CLUSTERS_PER_1000 = 20
+
+def synthetic_corpus(count: int, dimensions: int, seed: int = 0) -> np.ndarray:
+    """Unit vectors grouped around random topics, like chunk embeddings."""
+    rng = np.random.default_rng(seed)
+    clusters = max(4, count * CLUSTERS_PER_1000 // 1000)
+    centres = rng.standard_normal((clusters, dimensions)).astype(np.float32)
+    vectors = centres[rng.integers(0, clusters, count)]
+    vectors += 0.6 * rng.standard_normal((count, dimensions)).astype(np.float32)
+    faiss.normalize_L2(vectors)
+    return vectors
+
+def synthetic_queries(corpus: np.ndarray, count: int, seed: int = 1) -> np.ndarray:
+    """Queries near corpus vectors, as questions are near the chunks answering them."""
+    rng = np.random.default_rng(seed)
+    queries = corpus[rng.integers(0, len(corpus), count)].copy()
+    queries += 0.05 * rng.standard_normal(queries.shape).astype(np.float32)
+    faiss.normalize_L2(queries)
+    return queries
+
+def index_bytes(index) -> int:
+    """Size of the index when serialized, a close proxy for its memory use."""
+    return len(faiss.serialize_index(index))
+
+def run(index_type: str, corpus: np.ndarray, queries: np.ndarray,
+        truth: np.ndarray, config: Dict, k: int) -> Dict:
+    """Build one index and measure it against the exact results."""
+    started = time.perf_counter()
+    index = create_index(corpus, {**config, 'type': index_type})
+    build_seconds = time.perf_counter() - started
+
+    latencies = np.zeros(len(queries))
+    found = np.zeros((len(queries), k), dtype=np.int64)
+    for position, query in enumerate(queries):
+        started = time.perf_counter()
+        _, ids = index.search(query[None, :], k)
+        latencies[position] = time.perf_counter() - started
+        found[position] = ids[0]
+
+    recall = np.mean([
+        len(set(found[row]) & set(truth[row])) / k for row in range(len(queries))
+    ])
+    return {
+        "type": type(index).__name__,
+        "recall": recall,
+        "p50_ms": np.percentile(latencies, 50) * 1000,
+        "p99_ms": np.percentile(latencies, 99) * 1000,
+        "memory_mb": index_bytes(index) / 2**20,
+        "build_s": build_seconds
+    }
+
+def benchmark(scales: List[int], dimensions: int, queries: int, k: int) -> None:
+    """Run every index type at every scale and print the results."""
+    config = load_qa_settings()['index']
+    print(f"Index settings: {config}")
+    print(f"{'chunks':>9} {'index':<22} {'recall@' + str(k):>9} {'p50 ms':>8} "
+          f"{'p99 ms':>8} {'MB':>8} {'build s':>8}")
+
+    for scale in scales:
+        count = BASE_CHUNKS * scale
+        corpus = synthetic_corpus(count, dimensions)
+        query_vectors = synthetic_queries(corpus, queries)
+
+        exact = faiss.IndexFlatL2(dimensions)
+        exact.add(corpus)
+        _, truth = exact.search(query_vectors, k)
+
+        for index_type in INDEX_TYPES:
+            result = run(index_type, corpus, query_vectors, truth, config, k)
+            label = index_type if result['type'] != 'IndexFlat' or index_type == 'flat' \
+                else f"{index_type} (flat)"  # Too few vectors for this type
+            print(f"{count:>9} {label:<22} {result['recall']:>9.3f} "
+                  f"{result['p50_ms']:>8.3f} {result['p99_ms']:>8.3f} "
+                  f"{result['memory_mb']:>8.1f} {result['build_s']:>8.2f}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--scales", type=int, nargs="+", default=[10, 100, 1000],
+                        help="Corpus sizes as multiples of the current corpus")
+    parser.add_argument("--dimensions", type=int, default=256,
+                        help="Embedding size (1536 for text-embedding-3-small)")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("-k", type=int, default=6, help="Results per query, as retrieved by the app")
+    args = parser.parse_args()
+
+    benchmark(args.scales, args.dimensions, args.queries, args.k)
+
+if __name__ == "__main__":
+    main()
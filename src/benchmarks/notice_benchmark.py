@@ -0,0 +1,129 @@
+"""
+Regression benchmark for the tender notice preprocessor.
+
+Builds synthetic tender notices at several multiples of the size of a real
+notice, times TenderNoticePreprocessor on each and fits the growth of the
+processing time against the notice size on a log-log scale. The preprocessor
+reads the notice in one pass, so the fitted exponent should be close to 1;
+the benchmark exits with an error if it exceeds --max-exponent.
+
+Usage:
+    python -m src.benchmarks.notice_benchmark [--scales 1 10 100] [--max-exponent 1.2]
+"""
+
+import argparse
+import sys
+import time
+from typing import List
+
+import numpy as np
+
+from src.data_processing.processors.tender_notice_processor import TenderNoticePreprocessor
+
+HEADER = """TENDER NOTICE
+[Opening on 13 of every month at 10.30 am]
+[Closing on 26 of every month at 10.30 am]
+
+Important Notes:
+1st Release & Previously Released Stalls with no bids
+All stalls which received single bids under these 2 categories may be returned to the tender pool in the following months.
+"""
+
+# One round of rental sections, roughly the length of a real notice
+BLOCK = """
+Tenders for Rental of Cooked Food Stalls at:
+*\tPlease choose only ONE type of trade of sale.
++\tFor Halal Cooked Food only. (Non-Muslim stallholder(s) must obtain Halal Certification from MUIS for the sale of halal food.).
+Stall designated for sale of 'Halal Cooked Food' may not be a 'Halal stall' in its previous tenancy.
+^\tFor Indian Cuisine only. (Not for sale of cut fruits and drinks).
+**\tNot for sale of "Drinks" at Blk {n} Market and Blk {m} Smith Street.
+***\tNot for sale of "Drinks" and "Cut Fruits" at Blk {n} Aljunied Avenue 2, Blk {m} Buffalo Road and Chomp Chomp Food Centre.
+****\tNot for sale of "Zhi Char", "BBQ Seafood", "Drinks" and "Cut Fruits" at Newton Food Centre.
+
+Note 1:
+The sale of solely alcohol is not allowed at drink stalls.
+
+Please note that stall #01-{n} at Blk {m} Bukit Merah Central is not equipped with an exhaust hood. Heavy cooking which generates excessive fumes, oil and heat are not allowed at this stall. NEA will determine the food type before the allocation of stall.
+
+For Productive Hawker Centres such as Blk {n} Bukit Merah Central, stallholders are to subscribe to centralised dishwashing services and to use only common crockery and cutlery provided by the Service Provider.
+
+Tenders for Rental of [Market] Stalls at:
+
+*\tPlease choose only [ONE] type of trade of sale if not indicated.
+**\t\tNo roller shutter.
+***\tFor sale of titbits, biscuits and/or snacks only.
++\tNon-Muslims who tender for sale of Halal products should not be existing stallholders selling Non-Halal products in the same market.
+
+Details of Tender
+Eligibility Criteria: Tenderers must be an individual Singapore Citizen or Permanent Resident and not less than 21 years of age.
+
+Tender bids shall be submitted through NEA's electronic tendering system (E-Tender) using FormSG.
+When submitting the Form of Tender via FormSG, tenderers are required to pay a tender deposit of $500 for each stall tendered.
+
+As a guide and subject to confirmation by NEA, the Agreement shall commence on the 1st of the following month [i.e. about {n} days after closing].
+
+Important Notes for All Tenderers
+
+Term of tenancy: 3 years.
+
+Stallholders are to personally operate and are not allowed to sublet their stalls. All stalls are let out in its existing condition.
+"""
+
+BASE_BLOCKS = 5  # Blocks in a notice about the size of the August 2024 notice
+
+def synthetic_notice(scale: int) -> str:
+    """A notice with scale times the sections of a real one."""
+    blocks = [
+        BLOCK.format(n=100 + position, m=500 + position)
+        for position in range(BASE_BLOCKS * scale)
+    ]
+    return HEADER + "".join(blocks)
+
+def time_processing(text: str, repeats: int) -> float:
+    """Best wall time of processing a notice, in seconds."""
+    best = float('inf')
+    for _ in range(repeats):
+        started = time.perf_counter()
+        TenderNoticePreprocessor(text).process()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+def benchmark(scales: List[int], repeats: int, max_exponent: float) -> bool:
+    """Time every scale, print the results and check the growth is linear."""
+    print(f"{'scale':>6} {'KB':>9} {'ms':>10} {'MB/s':>8} {'notes':>7} {'sections':>9}")
+    sizes, seconds = [], []
+    for scale in scales:
+        text = synthetic_notice(scale)
+        elapsed = time_processing(text, repeats)
+        processor = TenderNoticePreprocessor(text)
+        processor.process()
+        notes = sum(len(notes) for notes in processor.get_special_notes().values())
+        sections = sum(1 for _ in processor.sections.walk()) - 1
+
+        sizes.append(len(text))
+        seconds.append(elapsed)
+        print(f"{scale:>6} {len(text) / 1024:>9.1f} {elapsed * 1000:>10.2f} "
+              f"{len(text) / elapsed / 2**20:>8.1f} {notes:>7} {sections:>9}")
+
+    if len(scales) < 2:
+        return True
+    exponent = np.polyfit(np.log(sizes), np.log(seconds), 1)[0]
+    linear = exponent <= max_exponent
+    print(f"Time grows as size^{exponent:.2f} "
+          f"({'linear' if linear else f'worse than size^{max_exponent}'})")
+    return linear
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100],
+                        help="Notice sizes as multiples of a real notice")
+    parser.add_argument("--repeats", type=int, default=5, help="Runs per scale; the best is kept")
+    parser.add_argument("--max-exponent", type=float, default=1.2,
+                        help="Largest acceptable exponent of time against size")
+    args = parser.parse_args()
+
+    if not benchmark(args.scales, args.repeats, args.max_exponent):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Throughput benchmark of the document preprocessors.
+
+Reads the raw FAQ, Terms and Conditions and Tender Notice documents,
+repeats each to the requested size and reports the throughput of its
+preprocessor in MB/s.
+
+Usage:
+    python -m src.benchmarks.preprocess_benchmark [--scale 20] [--repeats 5]
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+from src.data_processing.processors.base_processor import DocumentProcessor
+from src.data_processing.processors.faq_processor import FAQPreprocessor
+from src.data_processing.processors.tender_notice_processor import TenderNoticePreprocessor
+from src.data_processing.processors.tender_terms_processor import TenderTermsPreprocessor
+
+DOCUMENTS = [
+    ("FAQ", "FAQs on Electronic Tender (E-Tender)_20240326.docx", FAQPreprocessor),
+    ("Terms and Conditions", "Terms and Conditions of eTender (Aug 2024)_Text file.txt",
+     TenderTermsPreprocessor),
+    ("Tender Notice", "Aug 2024 Tender Notice_Text Only.docx", TenderNoticePreprocessor)
+]
+
+def read_raw(path: Path) -> str:
+    """Raw text of a document, as given to its preprocessor."""
+    if path.suffix == '.docx':
+        return DocumentProcessor.process_docx(path)
+    return path.read_text(encoding='utf-8')
+
+def throughput(preprocessor, text: str, repeats: int) -> float:
+    """Best throughput of a preprocessor over a text, in MB/s."""
+    best = float('inf')
+    for _ in range(repeats):
+        started = time.perf_counter()
+        preprocessor(text).process()
+        best = min(best, time.perf_counter() - started)
+    return len(text.encode('utf-8')) / best / 2**20
+
+def benchmark(data_dir: Path, scale: int, repeats: int) -> None:
+    """Time every preprocessor on its document and print the results."""
+    print(f"{'document':<22} {'KB':>9} {'MB/s x1':>9} {f'MB/s x{scale}':>10}")
+    for name, file_name, preprocessor in DOCUMENTS:
+        path = data_dir / file_name
+        if not path.exists():
+            print(f"{name:<22} missing: {path}")
+            continue
+        text = read_raw(path)
+        scaled = "\n".join([text] * scale)
+        print(f"{name:<22} {len(text.encode('utf-8')) / 1024:>9.1f} "
+              f"{throughput(preprocessor, text, repeats):>9.2f} "
+              f"{throughput(preprocessor, scaled, repeats):>10.2f}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--data-dir", type=Path, default=Path("data"))
+    parser.add_argument("--scale", type=int, default=20,
+                        help="Copies of each document in the larger input")
+    parser.add_argument("--repeats", type=int, default=5, help="Runs per input; the best is kept")
+    args = parser.parse_args()
+
+    benchmark(args.data_dir, args.scale, args.repeats)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""
+Batch ingestion of raw documents.
+
+Processes every DOCX and TXT file in a directory, such as years of archived
+tender notices, in parallel worker processes. Each file is classified by
+the same file name rules as DocumentProcessor.process_document, and its
+processed markdown is written to the output directory with its special
+notes, if any, alongside. A manifest of the run records each file's type,
+outputs and processing time.
+
+Usage:
+    python -m src.data_processing.ingest data/archive [--output-dir data/processed/ingest] [--workers 4]
+"""
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+import json
+import os
+from pathlib import Path
+import sys
+import time
+from typing import Dict, List, Optional
+
+from src.data_processing.processors.base_processor import DocumentProcessor, processed_cache
+
+OUTPUT_DIR = Path("data") / "processed" / "ingest"
+MANIFEST_FILE = "manifest.json"
+RAW_SUFFIXES = ('.docx', '.txt')
+
+def find_documents(input_dir: Path, recursive: bool = False) -> List[Path]:
+    """Raw documents in a directory, in name order."""
+    paths = input_dir.rglob("*") if recursive else input_dir.glob("*")
+    return sorted(
+        path for path in paths
+        if path.is_file() and path.suffix.lower() in RAW_SUFFIXES
+        and not path.name.startswith("~$")  # Word lock files
+    )
+
+def ingest_file(file_path: Path, output_dir: Path, use_cache: bool = True) -> Dict:
+    """Process one document and write its outputs. Runs in a worker process.
+
+    Returns:
+        The document's manifest entry
+    """
+    preprocessor_class, metadata = DocumentProcessor.classify(file_path)
+    entry = {
+        "source": str(file_path),
+        "type": metadata["type"],
+        "preprocessor": preprocessor_class.__name__ if preprocessor_class else None,
+        "bytes": file_path.stat().st_size,
+        "output": None,
+        "notes_output": None,
+        "cached": False,
+        "seconds": 0.0,
+        "error": None
+    }
+
+    cache = processed_cache()
+    hits = cache.hits
+    started = time.perf_counter()
+    try:
+        processed_doc = DocumentProcessor.process_document(file_path, use_cache=use_cache)
+
+        output_path = output_dir / f"{file_path.stem}.md"
+        with open(output_path, 'w', encoding='utf-8') as f:
+            f.write(processed_doc.content)
+        entry["output"] = str(output_path)
+
+        if processed_doc.special_notes:
+            notes_path = output_dir / f"{file_path.stem}.notes.json"
+            with open(notes_path, 'w', encoding='utf-8') as f:
+                json.dump(processed_doc.special_notes, f, ensure_ascii=False, indent=2)
+            entry["notes_output"] = str(notes_path)
+    except Exception as e:
+        entry["error"] = str(e)
+
+    entry["seconds"] = round(time.perf_counter() - started, 4)
+    entry["cached"] = cache.hits > hits
+    return entry
+
+def ingest(input_dir: Path, output_dir: Path = OUTPUT_DIR, workers: Optional[int] = None,
+           use_cache: bool = True, recursive: bool = False) -> Dict:
+    """Process every raw document in a directory and write the manifest.
+
+    Args:
+        input_dir: Directory of raw DOCX and TXT files
+        output_dir: Directory for the processed outputs and the manifest
+        workers: Worker processes; defaults to the number of CPUs
+        use_cache: Reuse and store processed outputs in the processed cache
+        recursive: Also process files in subdirectories
+
+    Returns:
+        The manifest
+    """
+    files = find_documents(input_dir, recursive)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    # Outputs are named by file stem, so documents sharing one would overwrite each other
+    stems: Dict[str, Path] = {}
+    for file_path in files:
+        if file_path.stem in stems:
+            raise ValueError(f"{file_path} and {stems[file_path.stem]} would have the same output name")
+        stems[file_path.stem] = file_path
+
+    started = time.perf_counter()
+    entries = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(ingest_file, file_path, output_dir, use_cache)
+            for file_path in files
+        ]
+        for future in as_completed(futures):
+            entry = future.result()
+            entries.append(entry)
+            status = "error" if entry["error"] else ("cached" if entry["cached"] else "processed")
+            print(f"{entry['seconds'] * 1000:>9.1f} ms  {status:<9} {entry['type']:<20} "
+                  f"{Path(entry['source']).name}")
+
+    entries.sort(key=lambda entry: entry["source"])
+    manifest = {
+        "created": datetime.now().isoformat(timespec='seconds'),
+        "input_dir": str(input_dir),
+        "workers": workers or os.cpu_count(),
+        "wall_seconds": round(time.perf_counter() - started, 4),
+        "processing_seconds": round(sum(entry["seconds"] for entry in entries), 4),
+        "files": entries
+    }
+    tmp_path = output_dir / f"{MANIFEST_FILE}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, output_dir / MANIFEST_FILE)
+    return manifest
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("input_dir", type=Path, help="Directory of raw DOCX and TXT files")
+    parser.add_argument("--output-dir", type=Path, default=OUTPUT_DIR,
+                        help="Directory for the processed outputs and the manifest")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Worker processes; defaults to the number of CPUs")
+    parser.add_argument("--recursive", action="store_true", help="Also process subdirectories")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Process every file, ignoring the processed cache")
+    args = parser.parse_args()
+
+    if not args.input_dir.is_dir():
+        parser.error(f"not a directory: {args.input_dir}")
+
+    manifest = ingest(args.input_dir, args.output_dir, args.workers,
+                      use_cache=not args.no_cache, recursive=args.recursive)
+    files = manifest["files"]
+    failed = [entry for entry in files if entry["error"]]
+    cached = sum(entry["cached"] for entry in files)
+    print(f"\n{len(files)} files ({cached} cached, {len(failed)} failed) in "
+          f"{manifest['wall_seconds']:.2f} s wall, {manifest['processing_seconds']:.2f} s processing "
+          f"with {manifest['workers']} workers")
+    print(f"Manifest: {args.output_dir / MANIFEST_FILE}")
+    for entry in failed:
+        print(f"Failed: {entry['source']}: {entry['error']}")
+    if failed:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
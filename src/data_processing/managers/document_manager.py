@@ -1,4 +1,5 @@
 import os
+import hashlib
 from pathlib import Path
 import yaml
 import shutil
@@ -8,6 +9,9 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# Top-level config sections that do not describe a document type
+NON_DOCUMENT_SECTIONS = ('paths', 'qa')
+
 class DocumentManager:
     """Manages document versioning and mapping."""
     
@@ -19,6 +23,7 @@ class DocumentManager:
         """
         self.data_dir = Path(data_dir).resolve()  # Get absolute path
         self.config_file = Path("config") / "document_config.yaml"
+        self.live_index = None  # Set by attach_index once the QA index is built
         
         # Load config and set up paths
         self._ensure_config()
@@ -37,7 +42,7 @@ class DocumentManager:
     def _organize_existing_files(self) -> None:
         """Move existing files to their correct locations."""
         for doc_type, config in self.config.items():
-            if doc_type == 'paths':
+            if doc_type in NON_DOCUMENT_SECTIONS:
                 continue
                 
             # Check if file exists in data root
@@ -107,20 +112,34 @@ class DocumentManager:
         self.config = default_config
         logger.info("Created default configuration file")
     
+    def attach_index(self, live_index) -> None:
+        """Attach the live QA index so document updates are re-indexed.
+        
+        Args:
+            live_index: Index exposing update_document(doc_type, old_content, new_content)
+        """
+        self.live_index = live_index
+    
     def update_document(self, doc_type: str, new_file_path: Path) -> None:
         """Update a document with a new version.
         
+        If a live index is attached, only the chunks that differ from the
+        previous version are re-embedded.
+        
         Args:
             doc_type: Type of document (e.g., 'faq', 'tender_notice')
             new_file_path: Path to the new document file
         """
-        if doc_type not in self.config:
+        if doc_type not in self.config or doc_type in NON_DOCUMENT_SECTIONS:
             raise ValueError(f"Unknown document type: {doc_type}")
         
         try:
             # Archive current version if it exists
             current_file = self.current_dir / self.config[doc_type]['current_file']
+            old_content = ""
             if current_file.exists():
+                with open(current_file, 'r', encoding='utf-8') as f:
+                    old_content = f.read()
                 archive_name = datetime.now().strftime(
                     self.config[doc_type]['archive_pattern']
                 )
@@ -138,10 +157,30 @@ class DocumentManager:
             
             logger.info(f"Updated {doc_type} with new content from {new_file_path}")
             
+            if self.live_index is not None:
+                self.live_index.update_document(doc_type, old_content, processed_doc.content)
+            
         except Exception as e:
             logger.error(f"Error updating document: {str(e)}")
             raise
     
+    def get_version(self) -> str:
+        """Get a token that changes whenever any current document changes.
+        
+        Returns:
+            Hex digest of the names, sizes and modification times of the
+            current document files
+        """
+        hasher = hashlib.sha256()
+        for doc_type in self.config:
+            if doc_type in NON_DOCUMENT_SECTIONS:
+                continue
+            current_file = self.current_dir / self.config[doc_type]['current_file']
+            if current_file.exists():
+                stat = current_file.stat()
+                hasher.update(f"{current_file.name}:{stat.st_size}:{stat.st_mtime_ns}".encode('utf-8'))
+        return hasher.hexdigest()[:16]
+    
     def get_current_file(self, doc_type: str) -> Optional[Path]:
         """Get path to current version of a document.
         
@@ -151,7 +190,7 @@ class DocumentManager:
         Returns:
             Path to current version if it exists, None otherwise
         """
-        if doc_type not in self.config:
+        if doc_type not in self.config or doc_type in NON_DOCUMENT_SECTIONS:
             return None
         
         current_file = self.current_dir / self.config[doc_type]['current_file']
@@ -166,7 +205,7 @@ class DocumentManager:
         result = {}
         
         for doc_type in self.config:
-            if doc_type == 'paths':  # Skip paths section
+            if doc_type in NON_DOCUMENT_SECTIONS:  # Skip non-document sections
                 continue
                 
             result[doc_type] = {
@@ -204,7 +243,7 @@ class DocumentManager:
         Returns:
             Dictionary containing document configuration and status
         """
-        if doc_type not in self.config or doc_type == 'paths':
+        if doc_type not in self.config or doc_type in NON_DOCUMENT_SECTIONS:
             raise ValueError(f"Unknown document type: {doc_type}")
         
         info = self.config[doc_type].copy()
@@ -1,8 +1,9 @@
 
-from .base_processor import BasePreprocessor, ProcessedDocument, DocumentProcessor
+from .base_processor import BasePreprocessor, ProcessedDocument, DocumentProcessor, SectionSpan
 
 __all__ = [
     'BasePreprocessor',
     'ProcessedDocument',
-    'DocumentProcessor'
+    'DocumentProcessor',
+    'SectionSpan'
 ]
\ No newline at end of file
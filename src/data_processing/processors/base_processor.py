@@ -1,8 +1,9 @@
 import os
 from pathlib import Path
-from typing import List, Dict, Tuple, Optional, Union
+from typing import Iterator, List, Dict, Tuple, Optional, Union
 from dataclasses import dataclass
 from datetime import datetime
+from functools import lru_cache
 import logging
 import re
 import json
@@ -17,6 +18,11 @@ from langchain.docstore.document import Document
 from langchain_community.document_loaders import TextLoader, UnstructuredWordDocumentLoader
 from langchain.prompts import PromptTemplate
 
+from src.data_processing.processors.patterns import Rewrite, RewriteSet, compiled
+from src.data_processing.processors.processed_cache import ProcessedCache
+from src.qa.embeddings import build_embeddings
+from src.qa.settings import load_qa_settings
+
 # Environment setup
 if load_dotenv('.env'):
     OPENAI_KEY = os.getenv('OPENAI_API_KEY')
@@ -28,6 +34,33 @@ DATA_DIR = os.path.join(PROJECT_ROOT, 'data')
 
 logger = logging.getLogger(__name__)
 
+# Bump whenever a change to a preprocessor changes its output, so documents
+# cached by an earlier version are processed again
+PROCESSOR_VERSION = 2
+
+# Image references, then braced and bracketed artifacts of the conversion
+ARTIFACTS = RewriteSet([
+    Rewrite(r'!\[.*?\]\(.*?\)'),
+    Rewrite(r'\{.*?\}'),
+    Rewrite(r'\[.*?\]')
+])
+
+# Markdown headings of the processed text
+HEADING_PATTERN = compiled(r'^(#{1,6})[ \t]+(.+?)[ \t]*$', re.MULTILINE)
+
+@dataclass
+class SectionSpan:
+    """A heading of the processed text and the offsets of its section.
+    
+    The section runs from its heading to the next heading at the same or a
+    higher level, so it includes its subsections.
+    """
+    title: str
+    level: int
+    start: int  # Start of the heading line
+    body_start: int  # Just after the heading line
+    end: int  # Start of the next section, or the end of the text
+
 @dataclass
 class ProcessedDocument:
     """Container for processed document content and metadata."""
@@ -41,19 +74,77 @@ class BasePreprocessor:
     def __init__(self, input_text: str):
         self.raw_text = input_text
         self.processed_text = ""
+        self._spans: List[SectionSpan] = []
+        self._spans_by_title: Dict[str, SectionSpan] = {}
+        self._indexed_text: Optional[str] = None
         
     def process(self) -> str:
         """Main processing pipeline to be implemented by subclasses."""
         raise NotImplementedError
     
-    def get_section_content(self, section_name: str) -> str:
-        """Extract content of a specific section."""
+    def _section_index(self) -> List[SectionSpan]:
+        """Offsets of the sections of the processed text, in document order.
+        
+        The table is built with one scan for headings, the first time it is
+        needed after each run of process().
+        """
         if not self.processed_text:
             self.process()
+        if self._indexed_text is self.processed_text:
+            return self._spans
+        
+        text = self.processed_text
+        spans: List[SectionSpan] = []
+        open_sections: List[SectionSpan] = []  # Sections not yet ended
+        for match in HEADING_PATTERN.finditer(text):
+            level = len(match.group(1))
+            while open_sections and open_sections[-1].level >= level:
+                open_sections.pop().end = match.start()
+            span = SectionSpan(
+                title=match.group(2),
+                level=level,
+                start=match.start(),
+                body_start=min(match.end() + 1, len(text)),
+                end=len(text)
+            )
+            spans.append(span)
+            open_sections.append(span)
+        
+        self._spans = spans
+        self._spans_by_title = {}
+        for span in spans:
+            # A title used twice is found at its first section
+            self._spans_by_title.setdefault(span.title, span)
+        self._indexed_text = text
+        return spans
+    
+    def get_section_content(self, section_name: str) -> str:
+        """Extract content of a specific section.
+        
+        Args:
+            section_name: Title of the section's heading, without the "#"s
             
-        pattern = fr"## {section_name}.*?(?=## |\Z)"  # Note the 'r' prefix
-        match = re.search(pattern, self.processed_text, re.DOTALL)
-        return match.group(0) if match else ""
+        Returns:
+            The heading and content of the section, including its
+            subsections, or "" if there is no such section
+        """
+        self._section_index()
+        span = self._spans_by_title.get(section_name.strip())
+        return self.processed_text[span.start:span.end] if span else ""
+    
+    def iter_sections(self, level: Optional[int] = None) -> Iterator[Tuple[SectionSpan, str]]:
+        """Yield (section, body) for each section, in document order.
+        
+        The body is the text from after the heading to the section's end.
+        
+        Args:
+            level: Only yield sections with headings at this level
+        """
+        spans = self._section_index()
+        text = self.processed_text
+        for span in spans:
+            if level is None or span.level == level:
+                yield span, text[span.body_start:span.end]
     
     def _basic_cleanup(self, text: str) -> str:
         """Initial cleanup of text."""
@@ -62,9 +153,7 @@ class BasePreprocessor:
         text = text.replace('\r\n', '\n').replace('\r', '\n')
         
         # Remove image references and other artifacts
-        text = re.sub(r'!\[.*?\]\(.*?\)', '', text)
-        text = re.sub(r'\{.*?\}', '', text)
-        text = re.sub(r'\[.*?\]', '', text)
+        text = ARTIFACTS.sub(text)
         
         # Remove empty lines and normalize spacing
         lines = [line.strip() for line in text.split('\n')]
@@ -72,6 +161,11 @@ class BasePreprocessor:
         
         return text
 
+@lru_cache(maxsize=None)
+def processed_cache() -> ProcessedCache:
+    """Cache of processed documents shared by the process."""
+    return ProcessedCache(PROCESSOR_VERSION)
+
 class DocumentProcessor:
     """Main document processing coordinator."""
     
@@ -82,8 +176,13 @@ class DocumentProcessor:
         return "\n".join([paragraph.text for paragraph in doc.paragraphs])
     
     @staticmethod
-    def process_document(file_path: Path) -> ProcessedDocument:
-        """Process a document based on its type."""
+    def classify(file_path: Path) -> Tuple[Optional[type], Dict]:
+        """Determine a document's preprocessor and metadata from its file name.
+        
+        Returns:
+            The preprocessor class, or None for documents used as-is, and
+            the document's metadata
+        """
         # Import processors here to avoid circular imports
         from .faq_processor import FAQPreprocessor
         from .tender_terms_processor import TenderTermsPreprocessor
@@ -91,57 +190,70 @@ class DocumentProcessor:
         
         file_name = file_path.name.lower()
         
-        # Rest of the method stays the same...
-        if file_path.suffix == '.docx':
-            raw_text = DocumentProcessor.process_docx(file_path)
-        else:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                raw_text = f.read()
-                
-        # Determine document type and process accordingly
         if "faq" in file_name:
-            preprocessor = FAQPreprocessor(raw_text)
-            processed_text = preprocessor.process()
-            return ProcessedDocument(
-                content=processed_text,
-                metadata={
-                    "source": file_path.name,
-                    "type": "faq",
-                    "date": "Mar 2024"
-                }
-            )
+            preprocessor_class = FAQPreprocessor
+            metadata = {"type": "faq", "date": "Mar 2024"}
         elif "terms and conditions" in file_name:
-            preprocessor = TenderTermsPreprocessor(raw_text)
-            processed_text = preprocessor.process()
-            return ProcessedDocument(
-                content=processed_text,
-                metadata={
-                    "source": file_path.name,
-                    "type": "terms_and_conditions",
-                    "date": "Aug 2024"
-                }
-            )
+            preprocessor_class = TenderTermsPreprocessor
+            metadata = {"type": "terms_and_conditions", "date": "Aug 2024"}
         elif "tender notice" in file_name:
-            preprocessor = TenderNoticePreprocessor(raw_text)
-            processed_text = preprocessor.process()
-            return ProcessedDocument(
-                content=processed_text,
-                metadata={
-                    "source": file_path.name,
-                    "type": "tender_notice",
-                    "date": "Aug 2024"
-                },
-                special_notes=preprocessor.get_special_notes()
-            )
+            preprocessor_class = TenderNoticePreprocessor
+            metadata = {"type": "tender_notice", "date": "Aug 2024"}
         else:
+            preprocessor_class = None
+            metadata = {"type": "general"}
+        return preprocessor_class, {"source": file_path.name, **metadata}
+    
+    @staticmethod
+    def process_document(file_path: Path, use_cache: bool = True) -> ProcessedDocument:
+        """Process a document based on its type.
+        
+        Args:
+            file_path: Document to process
+            use_cache: Reuse the output of an earlier run on the same raw
+                content, and store the output of this one
+        """
+        preprocessor_class, metadata = DocumentProcessor.classify(file_path)
+        
+        if preprocessor_class is None:
             # For other documents, return as-is with basic metadata
             return ProcessedDocument(
-                content=raw_text,
-                metadata={
-                    "source": file_path.name,
-                    "type": "general"
-                }
+                content=DocumentProcessor._read_text(file_path),
+                metadata=metadata
+            )
+        
+        raw = file_path.read_bytes()
+        cache = processed_cache() if use_cache else None
+        cached = cache.get(raw, preprocessor_class.__name__) if cache else None
+        if cached is not None:
+            return ProcessedDocument(
+                content=cached['content'],
+                metadata=metadata,
+                special_notes=cached['special_notes']
             )
+        
+        preprocessor = preprocessor_class(DocumentProcessor._read_text(file_path))
+        processed_text = preprocessor.process()
+        special_notes = (
+            preprocessor.get_special_notes()
+            if hasattr(preprocessor, 'get_special_notes') else None
+        )
+        if cache:
+            cache.put(raw, preprocessor_class.__name__, processed_text, special_notes)
+        
+        return ProcessedDocument(
+            content=processed_text,
+            metadata=metadata,
+            special_notes=special_notes
+        )
+    
+    @staticmethod
+    def _read_text(file_path: Path) -> str:
+        """Raw text of a DOCX or text file."""
+        if file_path.suffix == '.docx':
+            return DocumentProcessor.process_docx(file_path)
+        with open(file_path, 'r', encoding='utf-8') as f:
+            return f.read()
 
 @st.cache_data
 def load_documents(data_dir: str = DATA_DIR) -> List[Document]:
@@ -263,8 +375,9 @@ def create_vector_store(_documents: List[Document]) -> FAISS:
     texts = text_splitter.split_documents(_documents)
     print(f"Split into {len(texts)} text chunks")
     
-    # Create embeddings
-    embeddings = OpenAIEmbeddings()
+    # Create embeddings from the configured provider
+    settings = load_qa_settings()
+    embeddings = build_embeddings(settings['embeddings'])
     
     # Create and return vector store
     return FAISS.from_documents(texts, embeddings)
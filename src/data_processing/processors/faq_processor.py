@@ -1,8 +1,47 @@
 # src/data_processing/processors/faq_processor.py
 
 from .base_processor import BasePreprocessor
+from .patterns import Rewrite, RewriteSet, compiled
 import re
 
+INTERNAL_NOTES_PATTERN = compiled(r'\[\[.*?\]\].*?\+=+\+', re.DOTALL)
+REVISION_HISTORY_PATTERN = compiled(r'REVISION HISTORY.*$', re.DOTALL | re.IGNORECASE)
+
+# Section headings, with more flexible matching, and their titles
+SECTIONS = RewriteSet([
+    Rewrite(r'Eligibility\s*(?:\n|$)', "Eligibility"),
+    Rewrite(r'About\s+e-?Tender\s*(?:\n|$)', "About e-Tender"),
+    Rewrite(r'Preparations?\s+Before\s+Tendering', "Preparations Before Tendering"),
+    Rewrite(r'Considerations?\s+to\s+Tender', "Considerations for Tendering"),
+    Rewrite(r'Submitting\s+a\s+Tender\s+Bid', "Submitting a Tender Bid"),
+    Rewrite(r'Amend\s+Particulars', "Amending Tender Details"),
+    Rewrite(r'Withdrawal\s+of\s+Tender', "Withdrawal of Tender"),
+    Rewrite(r'Tender\s+Results', "Tender Results"),
+    Rewrite(r'Successful\s+Tender', "Successful Tender"),
+    Rewrite(r'Protection\s+Against\s+Scams', "Protection Against Scams"),
+    Rewrite(r'Security\s+and\s+Data\s+Protection', "Security and Data Protection"),
+    Rewrite(r'Contact\s+Information', "Contact Information")
+], flags=re.IGNORECASE, ordered=True)
+
+QUESTION_HEADERS = RewriteSet([
+    # Standard numbered questions
+    Rewrite(r'(\d+)[\.|\)]\s*(?:\*\*)?(.*?)(?:\*\*)?\s*(?=\n|$)', "\n### Q{1}: {2}\n"),
+    # Questions ending with question mark, on lines without a numbered question
+    Rewrite(r'^(?![^\n]*?\d[\.|\)])([^#\n].*?\?)\s*$', "\n### {1}\n")
+], flags=re.MULTILINE)
+
+QUESTION_CLEANUP = RewriteSet([
+    # Cleanup excessive newlines
+    Rewrite(r'\n{3,}', '\n\n'),
+    # Remove any remaining asterisks
+    Rewrite(r'\*\*', '')
+])
+
+# Format bullet points. Kept out of QUESTION_CLEANUP, as its "^" would make
+# the regex engine try every rule at every position instead of searching
+# for their first characters.
+BULLET_PATTERN = compiled(r'^[•●]\s+', re.MULTILINE)
+
 class FAQPreprocessor(BasePreprocessor):
     """Preprocesses FAQ document."""
     
@@ -34,76 +73,39 @@ class FAQPreprocessor(BasePreprocessor):
     def _remove_internal_notes(self, text: str) -> str:
         """Remove internal CC notes."""
         # Remove anything between [[ and ]]
-        text = re.sub(r'\[\[.*?\]\].*?\+=+\+', '', text, flags=re.DOTALL)
-        return text
+        return INTERNAL_NOTES_PATTERN.sub('', text)
     
     def _remove_revision_history(self, text: str) -> str:
         """Remove revision history section."""
         # Remove the revision history section and everything after it
-        text = re.sub(r'REVISION HISTORY.*$', '', text, flags=re.DOTALL | re.IGNORECASE)
-        return text.strip()
+        return REVISION_HISTORY_PATTERN.sub('', text).strip()
     
     def _format_sections(self, text: str) -> str:
         """Format main FAQ sections."""
         # Start with the title
-        result = "# Frequently Asked Questions (FAQs) on Electronic Tender (e-Tender)\n\n"
-        
-        # Define section patterns with more flexible matching
-        sections = {
-            r'Eligibility\s*(?:\n|$)': "Eligibility",
-            r'About\s+e-?Tender\s*(?:\n|$)': "About e-Tender",
-            r'Preparations?\s+Before\s+Tendering': "Preparations Before Tendering",
-            r'Considerations?\s+to\s+Tender': "Considerations for Tendering",
-            r'Submitting\s+a\s+Tender\s+Bid': "Submitting a Tender Bid",
-            r'Amend\s+Particulars': "Amending Tender Details",
-            r'Withdrawal\s+of\s+Tender': "Withdrawal of Tender",
-            r'Tender\s+Results': "Tender Results",
-            r'Successful\s+Tender': "Successful Tender",
-            r'Protection\s+Against\s+Scams': "Protection Against Scams",
-            r'Security\s+and\s+Data\s+Protection': "Security and Data Protection",
-            r'Contact\s+Information': "Contact Information"
-        }
+        parts = ["# Frequently Asked Questions (FAQs) on Electronic Tender (e-Tender)\n\n"]
         
-        current_text = text
-        for pattern, section_name in sections.items():
-            # Look for the section pattern
-            matches = re.split(f'({pattern})', current_text, flags=re.IGNORECASE)
-            if len(matches) > 1:
-                # Add any text before the section
-                if matches[0].strip():
-                    result += matches[0].strip() + "\n\n"
-                # Add the section header
-                result += f"## {section_name}\n\n"
-                # Continue with remaining text
-                current_text = ''.join(matches[2:])
+        # Each section heading is taken once, in document order
+        position = 0
+        for index, match in SECTIONS.scan(text):
+            before = text[position:match.start()].strip()
+            if before:
+                parts.append(before + "\n\n")
+            parts.append(f"## {SECTIONS.rules[index].replacement}\n\n")
+            position = match.end()
         
         # Add any remaining text
-        if current_text.strip():
-            result += current_text.strip() + "\n"
+        remaining = text[position:].strip()
+        if remaining:
+            parts.append(remaining + "\n")
         
-        return result
+        return "".join(parts)
     
     def _format_questions(self, text: str) -> str:
         """Format individual FAQ entries."""
-        # Pattern to match numbered questions, handling various formats
-        patterns = [
-            # Standard numbered questions
-            (r'(\d+)[\.|\)]\s*(?:\*\*)?(.*?)(?:\*\*)?\s*(?=\n|$)', r'\n### Q\1: \2\n'),
-            # Questions ending with question mark
-            (r'^([^#\n].*?\?)\s*$', r'\n### \1\n'),
-            # Cleanup excessive newlines
-            (r'\n{3,}', '\n\n'),
-            # Format bullet points
-            (r'(?m)^[•●]\s+', '- '),
-            # Remove any remaining asterisks
-            (r'\*\*', '')
-        ]
-        
-        # Apply all patterns
-        for pattern, replacement in patterns:
-            text = re.sub(pattern, replacement, text, flags=re.MULTILINE)
-        
-        return text
+        text = QUESTION_HEADERS.sub(text)
+        text = QUESTION_CLEANUP.sub(text)
+        return BULLET_PATTERN.sub('- ', text)
     
     def _add_metadata(self, text: str) -> str:
         """Add metadata for better retrieval."""
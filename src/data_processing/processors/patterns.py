@@ -0,0 +1,109 @@
+# src/data_processing/processors/patterns.py
+
+"""
+Compiled regular expressions shared by the document preprocessors.
+
+Patterns are compiled once and looked up by their source and flags, instead
+of being rebuilt from f-strings on every run. RewriteSet joins a list of
+rewrite rules into a single alternation, so a document is scanned once for
+all of its header and section rewrites rather than once per rule.
+"""
+
+from dataclasses import dataclass
+from functools import lru_cache
+import re
+from typing import Callable, Iterator, List, Pattern, Sequence, Tuple, Union
+
+Replacement = Union[str, Callable[[re.Match], str]]
+
+@lru_cache(maxsize=None)
+def compiled(pattern: str, flags: int = 0) -> Pattern:
+    """Compile a pattern, once per process."""
+    return re.compile(pattern, flags)
+
+@dataclass(frozen=True)
+class Rewrite:
+    """A pattern and what to replace its matches with.
+
+    The replacement is a str.format template such as "### Clause {1}",
+    whose fields are the groups of the rule's own pattern ({0} is the whole
+    match), or a function of the match.
+    """
+    pattern: str
+    replacement: Replacement = ""
+
+class RewriteSet:
+    """Rewrite rules applied together in one scan of a text.
+
+    At each position the rules are tried in order and the first that
+    matches is applied, as with any regex alternation. Rules must not rely
+    on the output of another rule in the same set.
+
+    The scan is fastest when every rule starts with a literal character,
+    which the regex engine can search for. A rule starting with "^" or a
+    group makes it try each rule at every position, so such rules are
+    better kept in a set of their own.
+    """
+
+    def __init__(self, rules: Sequence[Rewrite], flags: int = 0, ordered: bool = False):
+        """Compile the rules.
+
+        Args:
+            rules: The rewrites, in priority order
+            flags: Regex flags for all the rules
+            ordered: Rewrite only the first match of each rule after the
+                rewritten match of the rule before it, skipping rules with
+                no such match, as for section headings that appear once
+                each in a known order. The rules are then searched for
+                one after another rather than in a single scan.
+        """
+        self.rules = list(rules)
+        self.ordered = ordered
+        self._patterns = [compiled(rule.pattern, flags) for rule in self.rules]
+        # The empty group after each rule names the rule that matched. Putting
+        # it last rather than around the rule keeps the rule's first character
+        # at the start of its branch, so branches that cannot match a position
+        # are skipped without entering them.
+        self._combined = compiled(
+            "|".join(f"(?:{rule.pattern})(?P<rule{index}>)" for index, rule in enumerate(self.rules)),
+            flags
+        )
+
+    def scan(self, text: str) -> Iterator[Tuple[int, re.Match]]:
+        """Yield (rule index, match) for every match that would be rewritten.
+
+        The match is of the rule's own pattern, so its groups are numbered
+        as in the rule.
+        """
+        if self.ordered:
+            yield from self._in_order(text)
+            return
+
+        for match in self._combined.finditer(text):
+            index = int(match.lastgroup[len("rule"):])
+            # Match the rule on its own at the same place to get its groups
+            yield index, self._patterns[index].match(text, match.start())
+
+    def _in_order(self, text: str) -> Iterator[Tuple[int, re.Match]]:
+        """Each rule's first match after the end of the previous rule's."""
+        position = 0
+        for index, pattern in enumerate(self._patterns):
+            match = pattern.search(text, position)
+            if match:
+                position = match.end()
+                yield index, match
+
+    def sub(self, text: str) -> str:
+        """Apply every rule to the text in a single scan."""
+        parts: List[str] = []
+        position = 0
+        for index, match in self.scan(text):
+            replacement = self.rules[index].replacement
+            parts.append(text[position:match.start()])
+            if callable(replacement):
+                parts.append(replacement(match))
+            else:
+                parts.append(replacement.format(match.group(0), *match.groups("")))
+            position = match.end()
+        parts.append(text[position:])
+        return "".join(parts)
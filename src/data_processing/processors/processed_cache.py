@@ -0,0 +1,83 @@
+# src/data_processing/processors/processed_cache.py
+
+"""
+Cache of preprocessed documents on disk.
+
+Each entry holds the markdown and special notes a preprocessor produced
+from one raw file, keyed by the sha256 of the raw bytes, the preprocessor
+class and the processor version. Processing an unchanged file again is then
+a file read, and bumping the version makes every entry a miss.
+"""
+
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = Path("data") / "processed" / "documents"
+
+class ProcessedCache:
+    """Processed output of the preprocessors, by raw content."""
+
+    def __init__(self, version: int, cache_dir: Path = CACHE_DIR):
+        """Initialize the cache.
+
+        Args:
+            version: Processor version; entries of other versions are ignored
+            cache_dir: Directory holding one JSON file per entry
+        """
+        self.version = version
+        self.cache_dir = Path(cache_dir)
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, raw: bytes, preprocessor: str) -> Path:
+        digest = hashlib.sha256(raw).hexdigest()
+        return self.cache_dir / f"{preprocessor}-v{self.version}-{digest}.json"
+
+    def get(self, raw: bytes, preprocessor: str) -> Optional[Dict]:
+        """Look up the processed output of a raw file.
+
+        Returns:
+            Dictionary with 'content' and 'special_notes', or None on a miss
+        """
+        path = self._path(raw, preprocessor)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except Exception as e:
+            logger.error(f"Error reading processed cache entry {path}: {str(e)}")
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return entry
+
+    def put(self, raw: bytes, preprocessor: str, content: str,
+            special_notes: Optional[Dict] = None) -> None:
+        """Store the processed output of a raw file.
+
+        Entries of the same preprocessor under other versions are removed,
+        as they can no longer be hit.
+        """
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        path = self._path(raw, preprocessor)
+        tmp_path = path.with_suffix('.json.tmp')
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({"content": content, "special_notes": special_notes}, f)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.error(f"Error writing processed cache entry {path}: {str(e)}")
+            return
+
+        for stale in self.cache_dir.glob(f"{preprocessor}-v*.json"):
+            if not stale.name.startswith(f"{preprocessor}-v{self.version}-"):
+                stale.unlink(missing_ok=True)
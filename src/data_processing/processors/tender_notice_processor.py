@@ -1,154 +1,212 @@
 # src/data_processing/processors/tender_notice_processor.py
 
 from .base_processor import BasePreprocessor
+from dataclasses import dataclass, field
 import re
-from typing import Dict, List
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+# Lines that start a top-level section, checked in order
+SECTION_HEADINGS = [
+    (re.compile(r"\[?Important Notes for All Tenderers\]?:?$", re.IGNORECASE), "General Important Notes"),
+    (re.compile(r"\[?Important Notes\]?:", re.IGNORECASE), "Important Notes"),
+    (re.compile(r"Tenders for Rental of \[?Cooked Food\]? Stalls", re.IGNORECASE), "Cooked Food Stall Rentals"),
+    (re.compile(r"Tenders for Rental of \[?Market\]? Stalls", re.IGNORECASE), "Market Stall Rentals"),
+    (re.compile(r"\[?Details of Tender\]?:?$", re.IGNORECASE), "Tender Details")
+]
+
+# Note markers at the start of a line, longest first so "***" is not read as "*"
+NOTE_MARKERS = [
+    ("****", "SPECIAL_NOTE_4"),
+    ("***", "SPECIAL_NOTE_3"),
+    ("**", "SPECIAL_NOTE_2"),
+    ("+^", "HALAL_OR_INDIAN_CUISINE_NOTE"),
+    ("*", "SPECIAL_NOTE_1"),
+    ("+", "HALAL_NOTE"),
+    ("^", "INDIAN_CUISINE_NOTE")
+]
+
+TITLE_PATTERN = re.compile(r"TENDER NOTICE$")
+DATE_PATTERN = re.compile(r"\[(Opening|Closing) on (.*?)\]$")
+TRADE_TYPE_PATTERN = re.compile(r"Please choose only \[?ONE\]? type of trade", re.IGNORECASE)
+RESTRICTION_PATTERN = re.compile(r"Not for sale of ", re.IGNORECASE)
+ELIGIBILITY_PATTERN = re.compile(r"Eligibility Criteria:\s*")
+SUBMISSION_PATTERN = re.compile(r"Tender bids shall be submitted")
+
+# Subsection for lines of a section that follow its subsections
+NOTES_TITLE = "Notes"
+
+# Artifacts of the DOCX conversion, removed from every line
+ARTIFACT_PATTERN = re.compile(r"!\[[^\]]*\]\([^)]*\)|\{[^}]*\}")
+
+@dataclass
+class NoticeSection:
+    """A heading of the tender notice and its lines and subsections, in order."""
+    title: str
+    level: int
+    body: List[Union[str, 'NoticeSection']] = field(default_factory=list)
+
+    @property
+    def children(self) -> List['NoticeSection']:
+        return [item for item in self.body if isinstance(item, NoticeSection)]
+
+    def add(self, item: Union[str, 'NoticeSection']) -> Union[str, 'NoticeSection']:
+        """Append a line or subsection.
+
+        Lines following a subsection go to a "Notes" subsection, as in the
+        markdown they would otherwise read as part of the one before.
+        """
+        if isinstance(item, str) and self.level and self.children:
+            last = self.body[-1]
+            if not (isinstance(last, NoticeSection) and last.title == NOTES_TITLE):
+                last = self.add(NoticeSection(title=NOTES_TITLE, level=self.level + 1))
+            return last.add(item)
+        self.body.append(item)
+        return item
+
+    def walk(self) -> Iterator['NoticeSection']:
+        """This section and all sections below it, in document order."""
+        yield self
+        for child in self.children:
+            yield from child.walk()
+
+    def render(self) -> List[str]:
+        """Markdown lines of this section and the sections below it."""
+        rendered = [f"{'#' * self.level} {self.title}"] if self.level else []
+        for item in self.body:
+            if isinstance(item, NoticeSection):
+                rendered.extend(item.render())
+            else:
+                rendered.append(item)
+        return rendered
 
 class TenderNoticePreprocessor(BasePreprocessor):
-    """Preprocesses Tender Notice document."""
-    
+    """Preprocesses Tender Notice document.
+
+    The notice is read in a single pass over its lines. Each line is
+    classified by anchored patterns (section heading, note marker, tender
+    date or body text) and added to a tree of sections, while the notes
+    are collected by marker, so processing time grows linearly with the
+    length of the notice.
+    """
+
     def __init__(self, input_text: str):
         super().__init__(input_text)
         self.special_notes = {}
-    
+        self.sections: Optional[NoticeSection] = None
+
     def process(self) -> str:
         """Process Tender Notice document."""
-        text = self.raw_text
-        
-        # Basic cleanup
-        text = self._basic_cleanup(text)
-        
-        # Format main header and dates
-        text = self._format_header_section(text)
-        
-        # Process special notes and markers
-        text = self._process_special_notes(text)
-        
-        # Format main sections
-        text = self._format_main_sections(text)
-        
-        # Format rental sections
-        text = self._format_rental_sections(text)
-        
-        # Process location-specific rules
-        text = self._format_location_rules(text)
-        
-        # Format tender details
-        text = self._format_tender_details(text)
-        
-        self.processed_text = text
-        return text
-    
-    def _format_header_section(self, text: str) -> str:
-        """Format the main header and tender dates section."""
-        dates_pattern = r"\[Opening on .*?\] *\n *\[Closing on .*?\]"
-        
-        def format_dates(match):
-            dates_text = match.group(0)
-            return """
-## Tender Dates
-### Opening
-{opening_date}
-### Closing
-{closing_date}
-""".format(
-                opening_date=re.search(r"\[Opening on (.*?)\]", dates_text).group(1),
-                closing_date=re.search(r"\[Closing on (.*?)\]", dates_text).group(1)
+        self.special_notes = {}
+        self.sections = self._scan(self._clean_lines(self.raw_text))
+        self.processed_text = "\n".join(self.sections.render())
+        return self.processed_text
+
+    @staticmethod
+    def _clean_lines(text: str) -> Iterator[Optional[str]]:
+        """Yield the stripped lines of the notice, with None for blank lines."""
+        for line in text.replace('\x00', '').splitlines():
+            line = ARTIFACT_PATTERN.sub('', line).strip()
+            yield line or None
+
+    def _scan(self, lines: Iterable[Optional[str]]) -> NoticeSection:
+        """Build the section tree and collect the special notes.
+
+        A blank line ends the note or "###" subsection being read.
+        """
+        root = NoticeSection(title="", level=0)
+        section = root  # Current "#" or "##" section
+        subsection = None  # Current "###" section, if any
+        restrictions = None  # Location restrictions of the current section
+        note: Optional[Tuple[str, List[str]]] = None  # Note being read, and its lines
+
+        def finish_note() -> None:
+            nonlocal note
+            if note is None:
+                return
+            key, parts = note
+            text = " ".join(parts)
+            context = f"{section.title}: " if section.level > 1 else ""
+            self.special_notes.setdefault(key, []).append(context + text)
+            (subsection or section).add(f"> Note ({key}): {text}")
+            note = None
+
+        for line in lines:
+            if line is None:
+                finish_note()
+                subsection = None
+                continue
+
+            if section is root and TITLE_PATTERN.match(line):
+                section = root.add(NoticeSection(title="TENDER NOTICE", level=1))
+                continue
+
+            date = DATE_PATTERN.match(line)
+            if date:
+                finish_note()
+                if subsection is None or subsection.title != "Tender Dates":
+                    subsection = section.add(NoticeSection(title="Tender Dates", level=2))
+                subsection.add(NoticeSection(title=date.group(1), level=3, body=[date.group(2)]))
+                continue
+
+            heading = next(
+                (title for pattern, title in SECTION_HEADINGS if pattern.match(line)), None
             )
-        
-        text = re.sub(dates_pattern, format_dates, text)
-        text = re.sub(r"TENDER NOTICE", "# TENDER NOTICE\n## August 2024", text)
-        return text
-    
-    def _process_special_notes(self, text: str) -> str:
-        """Process and format special notes and markers."""
-        text = re.sub(r"\[Important Notes\]:\s*", "\n## Important Notes\n", text)
-        
-        markers = {
-            r"\*\*\*\*": "SPECIAL_NOTE_4",
-            r"\*\*\*": "SPECIAL_NOTE_3",
-            r"\*\*": "SPECIAL_NOTE_2",
-            r"\*": "SPECIAL_NOTE_1",
-            r"\+": "HALAL_NOTE",
-            r"\^": "INDIAN_CUISINE_NOTE"
-        }
-        
-        for marker, replacement in markers.items():
-            notes = re.findall(f"{marker}\\s*(.*?)\\s*(?={marker}|$)", text, re.DOTALL)
-            if notes:
-                self.special_notes[replacement] = notes
-            
-            text = re.sub(
-                f"{marker}\\s*(.*?)\\s*(?={marker}|$)",
-                f"\n> Note ({replacement}): \\1\n",
-                text
+            if heading:
+                finish_note()
+                section = root.add(NoticeSection(title=heading, level=2))
+                subsection = restrictions = None
+                continue
+
+            marker = next(
+                ((marker, key) for marker, key in NOTE_MARKERS
+                 if line.startswith(marker) and line[len(marker):len(marker) + 1].isspace()),
+                None
             )
-        
-        return text
-    
-    def _format_main_sections(self, text: str) -> str:
-        """Format main document sections."""
-        section_patterns = {
-            r"Tenders for Rental of \[Cooked Food\] Stalls":
-                "\n## Cooked Food Stall Rentals\n",
-            r"Tenders for Rental of \[Market\] Stalls":
-                "\n## Market Stall Rentals\n",
-            r"\[Details of Tender\]":
-                "\n## Tender Details\n",
-            r"\[Important Notes for All Tenderers\]":
-                "\n## General Important Notes\n"
-        }
-        
-        for pattern, replacement in section_patterns.items():
-            text = re.sub(pattern, replacement, text)
-        
-        return text
-    
-    def _format_rental_sections(self, text: str) -> str:
-        """Format rental-specific sections."""
-        text = re.sub(
-            r"(\n\* Please choose only \[ONE\] type of trade of sale.*?)\n",
-            "\n### Trade Type Selection Requirements\\1\n",
-            text
-        )
-        
-        text = re.sub(
-            r"(\n\* Not for sale of.*?at \[.*?\].*?)\n",
-            "\n### Location-Specific Restrictions\\1\n",
-            text
-        )
-        
-        return text
-    
-    def _format_location_rules(self, text: str) -> str:
-        """Format location-specific rules."""
-        location_pattern = r"\[([^\]]+)\](?=.*?(?:not allowed|not permitted|restricted))"
-        
-        def format_location(match):
-            location = match.group(1)
-            return f"\n#### Restrictions for {location}\n"
-        
-        text = re.sub(location_pattern, format_location, text)
-        return text
-    
-    def _format_tender_details(self, text: str) -> str:
-        """Format tender details section."""
-        text = re.sub(
-            r"Eligibility Criteria:(.*?)(?=-|$)",
-            "### Eligibility Requirements\\1",
-            text,
-            flags=re.DOTALL
-        )
-        
-        text = re.sub(
-            r"Tender bids shall be submitted.*?(?=-|$)",
-            "### Submission Requirements\\0",
-            text,
-            flags=re.DOTALL
-        )
-        
-        return text
-    
+            if marker:
+                finish_note()
+                text = self._unwrap(line[len(marker[0]):].strip())
+                if TRADE_TYPE_PATTERN.match(text):
+                    subsection = section.add(
+                        NoticeSection(title="Trade Type Selection Requirements", level=3)
+                    )
+                elif RESTRICTION_PATTERN.match(text) and " at " in text:
+                    if restrictions is None:
+                        restrictions = section.add(
+                            NoticeSection(title="Location-Specific Restrictions", level=3)
+                        )
+                    subsection = restrictions
+                    locations = text.rpartition(" at ")[2].rstrip(".")
+                    subsection.add(f"#### Restrictions for {locations}")
+                else:
+                    subsection = None
+                note = (marker[1], [text])
+                continue
+
+            text = self._unwrap(line)
+            if note is not None:
+                note[1].append(text)
+                continue
+
+            eligibility = ELIGIBILITY_PATTERN.match(text)
+            if eligibility:
+                subsection = section.add(NoticeSection(
+                    title="Eligibility Requirements", level=3, body=[text[eligibility.end():]]
+                ))
+            elif SUBMISSION_PATTERN.match(text):
+                subsection = section.add(NoticeSection(
+                    title="Submission Requirements", level=3, body=[text]
+                ))
+            else:
+                (subsection or section).add(text)
+
+        finish_note()
+        return root
+
+    @staticmethod
+    def _unwrap(line: str) -> str:
+        """Drop the square brackets the notice puts around emphasised words."""
+        return line.replace("[", "").replace("]", "")
+
     def get_special_notes(self) -> Dict[str, List[str]]:
         """Return processed special notes."""
-        return self.special_notes
\ No newline at end of file
+        return self.special_notes
@@ -1,10 +1,47 @@
 # src/data_processing/processors/tender_terms_processor.py
 
 from .base_processor import BasePreprocessor
+from .patterns import Rewrite, RewriteSet
 import re
 
+TITLE_TEMPLATE = """
+# TERMS AND CONDITIONS OF TENDER
+## Version Information
+{submatch}
+
+## Document Overview
+This document outlines the terms and conditions for hawker stall tenders.
+"""
+
+# Major section headers and their heading levels
+SECTION_HEADERS = {
+    "Eligibility": 2,
+    "Tendering": 2,
+    "Market Stall": 2,
+    "Cooked Food Stall": 2,
+    "Successful Tenderer": 2,
+    "Anti-Collusion": 2,
+    "Reporting of Anti-competitive Conduct": 3,
+    "Warranty": 3,
+    "Disclosure of Prior Anti-competitive Conduct": 3
+}
+
+# Descriptions added as metadata before section headers
+SECTION_DESCRIPTIONS = {
+    "Eligibility": "Clauses 2-6: Requirements for tender submission",
+    "Tendering": "Clauses 7-17: Process and rules for submitting tenders",
+    "Market Stall": "Clause 18: Specific rules for market stalls",
+    "Cooked Food Stall": "Clauses 19-23: Specific rules for cooked food stalls",
+    "Successful Tenderer": "Clauses 24-40: Obligations and requirements for successful tenderers",
+    "Anti-Collusion": "Clause 41: Rules preventing anti-competitive behavior"
+}
+
 class TenderTermsPreprocessor(BasePreprocessor):
-    """Preprocesses Terms and Conditions document."""
+    """Preprocesses Terms and Conditions document.
+    
+    The title and section headers with their metadata are rewritten in one
+    scan of the document, and the clause numbers in a second.
+    """
     
     def process(self) -> str:
         """Process Terms and Conditions document."""
@@ -13,83 +50,47 @@ class TenderTermsPreprocessor(BasePreprocessor):
         # Basic cleanup
         text = self._basic_cleanup(text)
         
-        # Add consistent title formatting
-        text = self._format_main_title(text)
-        
-        # Standardize section headers
-        text = self._format_section_headers(text)
+        # Format the title and section headers, with their metadata
+        text = HEADERS.sub(text)
         
         # Format clause numbers and subsections
-        text = self._format_clauses(text)
-        
-        # Add section metadata
-        text = self._add_section_metadata(text)
+        text = CLAUSES.sub(text)
         
         self.processed_text = text
         return text
     
-    def _format_main_title(self, text: str) -> str:
+    @staticmethod
+    def _format_main_title(match: re.Match) -> str:
         """Format the main title section."""
-        title_pattern = r"TERMS AND CONDITIONS OF TENDER\s*\nVer \d+: [A-Za-z]+ \d{4}"
-        replacement = """
-# TERMS AND CONDITIONS OF TENDER
-## Version Information
-{submatch}
-
-## Document Overview
-This document outlines the terms and conditions for hawker stall tenders.
-"""
-        return re.sub(title_pattern, lambda m: replacement.format(submatch=m.group(0)), text)
+        return TITLE_TEMPLATE.format(submatch=match.group(0))
     
-    def _format_section_headers(self, text: str) -> str:
-        """Format all major section headers."""
-        section_headers = {
-            "Eligibility": 2,
-            "Tendering": 2,
-            "Market Stall": 2,
-            "Cooked Food Stall": 2,
-            "Successful Tenderer": 2,
-            "Anti-Collusion": 2,
-            "Reporting of Anti-competitive Conduct": 3,
-            "Warranty": 3,
-            "Disclosure of Prior Anti-competitive Conduct": 3
-        }
-        
-        for header, level in section_headers.items():
-            pattern = f"({header}\\s*\n)"
-            hashes = "#" * level
-            text = re.sub(pattern, f"\n{hashes} {header}\n\n", text)
-        
-        return text
-    
-    def _format_clauses(self, text: str) -> str:
-        """Format clause numbers and subsections."""
-        text = re.sub(r"^(\d+)\.\s+", r"\n### Clause \1\n", text, flags=re.MULTILINE)
-        text = re.sub(r"^(\d+\.\d+)\s+", r"#### \1\n", text, flags=re.MULTILINE)
-        text = re.sub(r"^(\d+\.\d+\.\d+)\s+", r"##### \1\n", text, flags=re.MULTILINE)
-        return text
-    
-    def _add_section_metadata(self, text: str) -> str:
-        """Add metadata tags for better context retrieval."""
-        sections = {
-            "Eligibility": "Clauses 2-6: Requirements for tender submission",
-            "Tendering": "Clauses 7-17: Process and rules for submitting tenders",
-            "Market Stall": "Clause 18: Specific rules for market stalls",
-            "Cooked Food Stall": "Clauses 19-23: Specific rules for cooked food stalls",
-            "Successful Tenderer": "Clauses 24-40: Obligations and requirements for successful tenderers",
-            "Anti-Collusion": "Clause 41: Rules preventing anti-competitive behavior"
-        }
-        
-        for section, description in sections.items():
-            pattern = f"(## {section})"
+    @staticmethod
+    def _section_header(header: str, level: int) -> str:
+        """Markdown for a section header, with metadata tags for better context retrieval."""
+        metadata = ""
+        if header in SECTION_DESCRIPTIONS:
             metadata = f"""
 <!-- Section Metadata
 Type: Terms and Conditions
-Section: {section}
-Description: {description}
+Section: {header}
+Description: {SECTION_DESCRIPTIONS[header]}
 -->
 
 """
-            text = re.sub(pattern, f"{metadata}\\1", text)
-        
-        return text
\ No newline at end of file
+        return f"\n{metadata}{'#' * level} {header}\n\n"
+
+HEADERS = RewriteSet(
+    [Rewrite(r"TERMS AND CONDITIONS OF TENDER\s*\nVer \d+: [A-Za-z]+ \d{4}",
+             TenderTermsPreprocessor._format_main_title)]
+    + [Rewrite(f"{re.escape(header)}\\s*\n", TenderTermsPreprocessor._section_header(header, level))
+       for header, level in SECTION_HEADERS.items()]
+)
+
+# Kept apart from HEADERS, whose rules all start with a literal the regex
+# engine can search for; a rule starting with "^" would make it try every
+# rule at every position of the document
+CLAUSES = RewriteSet([
+    Rewrite(r"^(\d+)\.\s+", "\n### Clause {1}\n"),
+    Rewrite(r"^(\d+\.\d+)\s+", "#### {1}\n"),
+    Rewrite(r"^(\d+\.\d+\.\d+)\s+", "##### {1}\n")
+], flags=re.MULTILINE)
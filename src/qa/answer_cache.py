@@ -0,0 +1,160 @@
+"""
+Process-wide cache of answers to previously asked questions.
+
+Questions are matched by embedding similarity of their normalized text,
+so repeats of a common question with small wording differences share one
+answer. Entries expire after a TTL, the least recently used entries are
+evicted first, and the whole cache is dropped when the document version
+changes.
+"""
+
+from collections import OrderedDict
+from dataclasses import dataclass
+import logging
+import re
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger(__name__)
+
+NUMBER_PATTERN = re.compile(r"\d+(?:\.\d+)?")
+
+def normalize_question(question: str) -> str:
+    """Lowercase a question and strip punctuation and extra whitespace."""
+    text = re.sub(r"[^\w\s]", " ", question.lower())
+    return " ".join(text.split())
+
+@dataclass
+class CacheEntry:
+    """A cached answer and what it was an answer to."""
+    question: str
+    vector: np.ndarray
+    scope: Tuple
+    response: Dict
+    created: float
+
+class SemanticAnswerCache:
+    """LRU cache of answers looked up by question similarity."""
+
+    def __init__(self, embeddings: Embeddings, similarity_threshold: float = 0.95,
+                 ttl_seconds: float = 3600, max_entries: int = 512):
+        """Initialize the cache.
+
+        Args:
+            embeddings: Embeddings used to compare questions
+            similarity_threshold: Minimum cosine similarity for a hit
+            ttl_seconds: Lifetime of an entry
+            max_entries: Number of entries kept before evicting the oldest
+        """
+        self.embeddings = embeddings
+        self.similarity_threshold = similarity_threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple, CacheEntry]" = OrderedDict()  # (scope, question)
+        self._version: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _scope(self, question: str, scope: str) -> Tuple:
+        """Part of the key that must match exactly.
+
+        Numbers are included because questions differing only in a number
+        ("Clause 19" vs "Clause 21") embed almost identically.
+        """
+        return (scope, tuple(NUMBER_PATTERN.findall(question)))
+
+    def _embed(self, question: str) -> np.ndarray:
+        vector = np.asarray(self.embeddings.embed_query(question), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _check_version(self, version: Optional[str]) -> None:
+        """Drop every entry if the documents changed since they were cached."""
+        if version is not None and version != self._version:
+            if self._entries:
+                logger.info("Document version changed, clearing answer cache")
+            self._entries.clear()
+            self._version = version
+
+    def _expire(self, now: float) -> None:
+        expired = [key for key, entry in self._entries.items()
+                   if now - entry.created > self.ttl_seconds]
+        for key in expired:
+            del self._entries[key]
+
+    def lookup(self, question: str, scope: str = "",
+               version: Optional[str] = None) -> Optional[Dict]:
+        """Return the cached response for a similar question, if any.
+
+        Args:
+            question: The user's question
+            scope: Context the answer depends on; only entries with the
+                same scope can match
+            version: Current document version; a change clears the cache
+        """
+        normalized = normalize_question(question)
+        key_scope = self._scope(normalized, scope)
+
+        with self._lock:
+            self._check_version(version)
+            self._expire(time.time())
+
+            if (key_scope, normalized) in self._entries:
+                return self._hit((key_scope, normalized))
+
+            candidates: List[Tuple] = [
+                key for key, entry in self._entries.items() if entry.scope == key_scope
+            ]
+
+        if candidates:
+            vector = self._embed(normalized)
+            with self._lock:
+                candidates = [key for key in candidates if key in self._entries]
+                if candidates:
+                    matrix = np.stack([self._entries[key].vector for key in candidates])
+                    similarities = matrix @ vector
+                    best = int(np.argmax(similarities))
+                    if similarities[best] >= self.similarity_threshold:
+                        return self._hit(candidates[best])
+
+        self.misses += 1
+        return None
+
+    def _hit(self, key: Tuple) -> Dict:
+        """Record a hit on key and return a copy of its response."""
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return {**self._entries[key].response, "cached": True}
+
+    def store(self, question: str, response: Dict, scope: str = "",
+              version: Optional[str] = None) -> None:
+        """Cache the response to a question."""
+        normalized = normalize_question(question)
+        entry = CacheEntry(
+            question=normalized,
+            vector=self._embed(normalized),
+            scope=self._scope(normalized, scope),
+            response=dict(response),
+            created=time.time()
+        )
+
+        key = (entry.scope, normalized)
+        with self._lock:
+            self._check_version(version)
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,265 @@
+"""
+Search over the Guide to Articles of Sale.
+
+The guide (`data/article_of_sale.json`) is small and fixed, so it is
+indexed once into an inverted index over each article's name and remarks.
+Remark sentences saying what is "not allowed" are indexed separately, so
+"jewellery" is recognised as excluded from piece & sundry goods rather
+than matched as one of them. Food items the guide does not name, such as
+"bubble tea" or "chicken rice", are mapped onto its terms, and misspelt
+words are matched against the guide's vocabulary with rapidfuzz.
+"""
+
+from dataclasses import dataclass, field
+from functools import lru_cache
+import json
+import math
+from pathlib import Path
+import re
+from typing import Dict, List, Optional, Set, Tuple
+
+from rapidfuzz import fuzz, process
+
+from src.qa.bm25 import tokenize
+
+# Weight of a match in the article's name relative to one in its remarks
+NAME_WEIGHT = 2.0
+# Matches scoring at least this fraction of the best one are equally relevant
+RELEVANT_FRACTION = 0.75
+MIN_FUZZY_LENGTH = 4
+
+# Words in nearly every remark that say nothing about the article
+GUIDE_STOPWORDS = frozenset("""
+all allowed also any except food include includes inclusive item items like means
+only other sale sell selling sold stall stalls such type types
+""".split())
+
+EXCLUSION_PATTERN = re.compile(r"\bnot allowed\b", re.IGNORECASE)
+SENTENCE_PATTERN = re.compile(r"(?<=[.!?])\s+|\n+")
+
+# Everyday names of items, mapped to the guide's own terms. Phrases are
+# checked before their words, so "chicken rice" is a dish, not poultry and rice.
+ITEM_TERMS = {
+    "chicken rice": ["cooked"],
+    "fried rice": ["cooked"],
+    "nasi lemak": ["cooked", "halal"],
+    "roti prata": ["cooked", "indian"],
+    "fish soup": ["cooked"],
+    "bubble tea": ["drink"],
+    "chicken": ["poultry"],
+    "duck": ["poultry"],
+    "lamb": ["mutton"],
+    "goat": ["mutton"],
+    "tea": ["drink"],
+    "teh": ["drink"],
+    "coffee": ["drink"],
+    "kopi": ["drink"],
+    "juice": ["drink", "juice"],
+    "beer": ["alcohol"],
+    "wine": ["alcohol"],
+    "dessert": ["dessert"],
+    "cake": ["cake"],
+    "bread": ["bun"],
+    "laksa": ["cooked"],
+    "satay": ["cooked"],
+    "curry": ["cooked"],
+    "briyani": ["cooked", "indian"],
+    "prata": ["cooked", "indian"],
+    "dosa": ["cooked", "indian"],
+    "porridge": ["cooked"],
+    "congee": ["cooked"],
+    "dumpling": ["cooked"],
+    "wanton": ["cooked"],
+    "noodle": ["noodle", "cooked"],
+    "tofu": ["beancake"],
+    "tauhu": ["beancake"],
+    "phone": ["handphone"],
+    "clothes": ["clothing"],
+    "shoe": ["footwear"],
+    "plant": ["plant"],
+    "durian": ["fruit"],
+    "mango": ["fruit"]
+}
+
+def stem(word: str) -> str:
+    """Crude singular form, so "prawns" matches "prawn"."""
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 6 and word.endswith("oes"):
+        return word[:-2]
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+def terms(text: str) -> List[str]:
+    """Stemmed search terms of a text."""
+    return [
+        stem(token) for token in tokenize(text.replace("-", ""))
+        if token not in GUIDE_STOPWORDS
+    ]
+
+@dataclass(frozen=True)
+class ArticleOfSale:
+    """One row of the Guide to Articles of Sale."""
+    article: str
+    category: str
+    stall_types: Tuple[str, ...]
+    remarks: str
+
+@dataclass
+class ArticleMatch:
+    """An article matching a search, and how it matched."""
+    article: ArticleOfSale
+    score: float
+    # The search only matched sentences saying what the article excludes
+    excluded: bool = False
+    matched_terms: Set[str] = field(default_factory=set)
+
+class AOSIndex:
+    """Inverted index over the articles of sale."""
+
+    def __init__(self, records: List[Dict], fuzzy_cutoff: float = 85):
+        """Index the guide.
+
+        Args:
+            records: Rows of article_of_sale.json
+            fuzzy_cutoff: Minimum rapidfuzz ratio for a misspelt word to
+                match a term in the guide
+        """
+        self.fuzzy_cutoff = fuzzy_cutoff
+        self.articles: List[ArticleOfSale] = []
+        # term -> {row: weight}, for what articles include and what they exclude
+        self._included: Dict[str, Dict[int, float]] = {}
+        self._excluded: Dict[str, Dict[int, float]] = {}
+
+        for row, record in enumerate(records):
+            article = ArticleOfSale(
+                article=record['Article of Sale'].strip(),
+                category=record['Trade Type Category'].strip(),
+                # "Lock-Up, Market Slab" -> ("LOCK-UP", "MARKET SLAB"), as selected in the app
+                stall_types=tuple(
+                    stall_type.strip().upper()
+                    for stall_type in record['Stall Type'].split(",") if stall_type.strip()
+                ),
+                remarks=" ".join(record.get('Remarks', '').split())
+            )
+            self.articles.append(article)
+
+            for term in terms(article.article):
+                self._included.setdefault(term, {})[row] = NAME_WEIGHT
+            for sentence in SENTENCE_PATTERN.split(record.get('Remarks', '')):
+                postings = self._excluded if EXCLUSION_PATTERN.search(sentence) else self._included
+                for term in terms(sentence):
+                    postings.setdefault(term, {}).setdefault(row, 1.0)
+
+        total = len(self.articles)
+        self._idf = {
+            term: math.log(1 + total / len(set(self._included.get(term, {})) |
+                                            set(self._excluded.get(term, {}))))
+            for term in set(self._included) | set(self._excluded)
+        }
+        self._vocabulary = list(self._idf)
+        self._item_terms = {
+            " ".join(terms(name)): [stem(term) for term in guide_terms]
+            for name, guide_terms in ITEM_TERMS.items()
+        }
+        self._expand = lru_cache(maxsize=4096)(self._expand_term)
+
+    @classmethod
+    def from_json(cls, path: Path, **kwargs) -> 'AOSIndex':
+        """Index the guide saved by excel_converter.convert_excel_to_json."""
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f), **kwargs)
+
+    def __len__(self) -> int:
+        return len(self.articles)
+
+    @property
+    def stall_types(self) -> List[str]:
+        """Stall types that the guide lists articles for."""
+        return sorted({stall_type for article in self.articles for stall_type in article.stall_types})
+
+    def _expand_term(self, term: str) -> Tuple[Tuple[str, float], ...]:
+        """Terms in the guide that a query term matches, with their similarity."""
+        if term in self._idf or len(term) < MIN_FUZZY_LENGTH:
+            return ((term, 1.0),) if term in self._idf else ()
+        return tuple(
+            (match, score / 100)
+            for match, score, _ in process.extract(
+                term, self._vocabulary, scorer=fuzz.ratio,
+                score_cutoff=self.fuzzy_cutoff, limit=3
+            )
+        )
+
+    def _query_terms(self, query: str) -> List[str]:
+        """Query terms, with everyday item names replaced by the guide's terms."""
+        words = terms(query)
+        mapped = []
+        position = 0
+        while position < len(words):
+            phrase = " ".join(words[position:position + 2])
+            if position + 1 < len(words) and phrase in self._item_terms:
+                mapped.extend(self._item_terms[phrase])
+                position += 2
+                continue
+            word = words[position]
+            mapped.extend(self._item_terms.get(word, [word]))
+            position += 1
+        return mapped
+
+    def search(self, query: str, stall_type: Optional[str] = None,
+               limit: int = 5) -> List[ArticleMatch]:
+        """Articles of sale matching a free-text item, best first.
+
+        Args:
+            query: Item to look up, such as "bubble tea" or "fresh prawns"
+            stall_type: Only return articles allowed at this stall type
+            limit: Maximum number of matches
+
+        Returns:
+            Matching articles. An article matched only by what it excludes
+            is returned after those that include the item, marked excluded.
+        """
+        included: Dict[int, ArticleMatch] = {}
+        excluded: Dict[int, ArticleMatch] = {}
+        for query_term in set(self._query_terms(query)):
+            for term, similarity in self._expand(query_term):
+                weight = self._idf[term] * similarity
+                for postings, matches in ((self._included, included), (self._excluded, excluded)):
+                    for row, field_weight in postings.get(term, {}).items():
+                        match = matches.setdefault(row, ArticleMatch(self.articles[row], 0.0))
+                        match.score += weight * field_weight
+                        match.matched_terms.add(term)
+
+        for row, match in excluded.items():
+            if row not in included:
+                match.excluded = True
+                included[row] = match
+
+        matches = [
+            match for match in included.values()
+            if stall_type is None or stall_type.upper() in match.article.stall_types
+        ]
+        matches.sort(key=lambda match: (match.excluded, -match.score))
+        return matches[:limit]
+
+    def best_matches(self, query: str, stall_type: Optional[str] = None) -> List[ArticleMatch]:
+        """The matches scoring close to the best one, leaving out weaker
+        matches such as "packet drinks" among preserved goods for "bubble tea"."""
+        matches = [match for match in self.search(query, limit=len(self)) if not match.excluded]
+        if not matches:
+            return []
+        cutoff = matches[0].score * RELEVANT_FRACTION
+        return [
+            match for match in matches
+            if match.score >= cutoff
+            and (stall_type is None or stall_type.upper() in match.article.stall_types)
+        ]
+
+    def allowed_stall_types(self, query: str) -> List[str]:
+        """Stall types at which an item can be sold, by its best matches."""
+        return sorted({
+            stall_type
+            for match in self.best_matches(query)
+            for stall_type in match.article.stall_types
+        })
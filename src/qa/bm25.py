@@ -0,0 +1,112 @@
+"""
+In-process keyword search with BM25 scoring.
+
+Exact-term questions such as "Clause 19" or "halal" are poorly served by
+dense embeddings alone. This inverted index ranks chunks by BM25 so its
+results can be fused with the vector search.
+"""
+
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from langchain.docstore.document import Document
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset("""
+a an and are as at be by can do does for from how i if in is it me my of on or
+should the this to what when where which who why will with you your
+""".split())
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens without stopwords."""
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS]
+
+class BM25Index:
+    """Inverted index over document chunks with BM25 ranking."""
+
+    def __init__(self, documents: Optional[List[Document]] = None, k1: float = 1.5, b: float = 0.75):
+        """Initialize the index.
+
+        Args:
+            documents: Chunks to index; each should carry a chunk_id in its metadata
+            k1: Term frequency saturation
+            b: Document length normalization
+        """
+        self.k1 = k1
+        self.b = b
+        self.doc_ids: List[str] = []
+        self.postings: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self.idf: Dict[str, float] = {}
+        self._length_norm = np.zeros(0, dtype=np.float32)
+        if documents:
+            self.build(documents)
+
+    def __len__(self) -> int:
+        return len(self.doc_ids)
+
+    def build(self, documents: List[Document]) -> None:
+        """(Re)build the index from a list of chunks."""
+        self.doc_ids = [
+            doc.metadata.get('chunk_id', str(position))
+            for position, doc in enumerate(documents)
+        ]
+
+        term_docs = defaultdict(list)
+        term_freqs = defaultdict(list)
+        lengths = np.zeros(len(documents), dtype=np.float32)
+
+        for position, doc in enumerate(documents):
+            counts = Counter(tokenize(doc.page_content))
+            lengths[position] = sum(counts.values())
+            for term, count in counts.items():
+                term_docs[term].append(position)
+                term_freqs[term].append(count)
+
+        total = len(documents)
+        self.postings = {
+            term: (np.array(term_docs[term], dtype=np.int32),
+                   np.array(term_freqs[term], dtype=np.float32))
+            for term in term_docs
+        }
+        self.idf = {
+            term: math.log(1 + (total - len(docs) + 0.5) / (len(docs) + 0.5))
+            for term, docs in term_docs.items()
+        }
+
+        # The per-document part of the BM25 denominator only depends on length
+        avg_length = float(lengths.mean()) if total else 0.0
+        self._length_norm = self.k1 * (1 - self.b + self.b * lengths / max(avg_length, 1.0))
+
+    def search(self, query: str, k: int = 10) -> List[Tuple[str, float]]:
+        """Return up to k (chunk_id, score) pairs, best first."""
+        if not self.doc_ids:
+            return []
+
+        scores = np.zeros(len(self.doc_ids), dtype=np.float32)
+        for term in set(tokenize(query)):
+            posting = self.postings.get(term)
+            if posting is None:
+                continue
+            docs, freqs = posting
+            scores[docs] += self.idf[term] * freqs * (self.k1 + 1) / (freqs + self._length_norm[docs])
+
+        matched = np.flatnonzero(scores)
+        if len(matched) > k:
+            matched = matched[np.argpartition(-scores[matched], k - 1)[:k]]
+        ranked = matched[np.argsort(-scores[matched], kind='stable')]
+        return [(self.doc_ids[i], float(scores[i])) for i in ranked]
+
+def reciprocal_rank_fusion(rankings: List[List[str]], k: int = 60) -> List[Tuple[str, float]]:
+    """Fuse several ranked lists of IDs into one.
+
+    Each ID scores sum(1 / (k + rank)) over the lists it appears in, so
+    items ranked well by several retrievers rise to the top.
+    """
+    scores: Dict[str, float] = defaultdict(float)
+    for ranking in rankings:
+        for rank, item_id in enumerate(ranking, start=1):
+            scores[item_id] += 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
@@ -0,0 +1,112 @@
+"""
+Docstore that reads chunk texts from a memory-mapped file.
+
+Chunks are written once, as JSON records laid end to end in one file, with
+their byte offsets in a separate array. Every process opening the store
+maps the same file, so the text is held once in the page cache instead of
+once per process. Chunks added or deleted after the store was written are
+kept in memory until the index is saved again.
+"""
+
+import copy
+import json
+import mmap
+from pathlib import Path
+from typing import Dict, Iterator, List, Union
+
+import numpy as np
+from langchain.docstore.document import Document
+from langchain_community.docstore.base import AddableMixin, Docstore
+
+CHUNKS_FILE = "chunks.bin"
+OFFSETS_FILE = "chunks.offsets.npy"
+IDS_FILE = "chunks.ids.json"
+
+def write_chunk_store(path: Path, docstore: Docstore, ids: List[str]) -> None:
+    """Write the documents with the given IDs to a chunk store at path."""
+    path = Path(path)
+    offsets = np.zeros(len(ids) + 1, dtype=np.int64)
+    with open(path / CHUNKS_FILE, 'wb') as f:
+        for row, chunk_id in enumerate(ids):
+            doc = docstore.search(chunk_id)
+            if not isinstance(doc, Document):
+                raise ValueError(f"Chunk {chunk_id} missing from docstore")
+            record = json.dumps(
+                {"page_content": doc.page_content, "metadata": doc.metadata},
+                ensure_ascii=False
+            ).encode('utf-8')
+            f.write(record)
+            offsets[row + 1] = offsets[row] + len(record)
+
+    np.save(path / OFFSETS_FILE, offsets)
+    with open(path / IDS_FILE, 'w', encoding='utf-8') as f:
+        json.dump(ids, f)
+
+class ChunkStore(Docstore, AddableMixin):
+    """Read-only chunk store on disk, with in-memory additions and deletions."""
+
+    def __init__(self, path: Path):
+        """Open the chunk store written to path by write_chunk_store."""
+        self.path = Path(path)
+        with open(self.path / IDS_FILE, 'r', encoding='utf-8') as f:
+            self._rows = {chunk_id: row for row, chunk_id in enumerate(json.load(f))}
+        self._offsets = np.load(self.path / OFFSETS_FILE, mmap_mode='r')
+
+        self._blob = b""
+        with open(self.path / CHUNKS_FILE, 'rb') as f:
+            if self._offsets[-1] > 0:  # An empty file cannot be mapped
+                self._blob = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        self._added: Dict[str, Document] = {}
+        self._deleted = set()
+
+    def __len__(self) -> int:
+        return len(self._rows) - len(self._deleted) + len(self._added)
+
+    def copy(self) -> 'ChunkStore':
+        """A store over the same mapped file whose changes are its own."""
+        store = copy.copy(self)
+        store._added = dict(self._added)
+        store._deleted = set(self._deleted)
+        return store
+
+    def __contains__(self, chunk_id: str) -> bool:
+        return chunk_id in self._added or (
+            chunk_id in self._rows and chunk_id not in self._deleted
+        )
+
+    def ids(self) -> Iterator[str]:
+        """IDs of every chunk in the store."""
+        for chunk_id in self._rows:
+            if chunk_id not in self._deleted:
+                yield chunk_id
+        yield from self._added
+
+    def search(self, search: str) -> Union[str, Document]:
+        """Look up a chunk by ID, returning an error message if not found."""
+        if search in self._added:
+            return self._added[search]
+        row = self._rows.get(search)
+        if row is None or search in self._deleted:
+            return f"ID {search} not found."
+
+        record = json.loads(self._blob[self._offsets[row]:self._offsets[row + 1]])
+        return Document(page_content=record['page_content'], metadata=record['metadata'])
+
+    def add(self, texts: Dict[str, Document]) -> None:
+        """Add chunks, kept in memory until the store is written again."""
+        overlapping = {chunk_id for chunk_id in texts if chunk_id in self}
+        if overlapping:
+            raise ValueError(f"Tried to add ids that already exist: {overlapping}")
+        # A deleted row on disk stays deleted; the added chunk replaces it
+        self._added.update(texts)
+
+    def delete(self, ids: List) -> None:
+        """Delete chunks by ID."""
+        if not any(chunk_id in self for chunk_id in ids):
+            raise ValueError(f"Tried to delete ids that does not exist: {ids}")
+        for chunk_id in ids:
+            # A chunk can be both added in memory and on disk from before
+            self._added.pop(chunk_id, None)
+            if chunk_id in self._rows:
+                self._deleted.add(chunk_id)
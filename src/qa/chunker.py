@@ -0,0 +1,216 @@
+"""
+Structure-aware chunking of the processed markdown documents.
+
+The preprocessors mark natural boundaries with markdown headings
+(`### Q...`, `### Clause N`, `## Tender Dates`). The chunker splits on those
+headings, keeps each chunk under a token limit and tags it with a stable
+chunk ID and the path of headings it sits under.
+"""
+
+import hashlib
+import re
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Tuple
+
+from langchain.docstore.document import Document
+
+from src.qa.tokens import count_tokens, split_tokens
+
+HEADING_PATTERN = re.compile(r"^(#{1,6})\s+(.+?)\s*$")
+COMMENT_PATTERN = re.compile(r"<!--.*?-->", re.DOTALL)
+
+@dataclass
+class Chunk:
+    """A piece of a document sized for retrieval."""
+    chunk_id: str
+    text: str
+    section_path: List[str] = field(default_factory=list)
+    token_count: int = 0
+
+    @property
+    def content_hash(self) -> str:
+        """Hash of the chunk text, used to detect changed chunks."""
+        return hashlib.sha256(self.text.encode('utf-8')).hexdigest()
+
+class MarkdownChunker:
+    """Splits processed markdown into heading-aligned, token-bounded chunks."""
+
+    def __init__(self, max_tokens: int = 400, min_tokens: int = 30):
+        """Initialize the chunker.
+
+        Args:
+            max_tokens: Upper bound on the tokens in a single chunk
+            min_tokens: Sections smaller than this are merged into the
+                following sibling section instead of becoming their own chunk
+        """
+        self.max_tokens = max_tokens
+        self.min_tokens = min_tokens
+
+    @property
+    def params(self) -> Dict:
+        """Parameters that affect chunk boundaries, for index keys."""
+        return {
+            "strategy": "markdown_headings",
+            "max_tokens": self.max_tokens,
+            "min_tokens": self.min_tokens
+        }
+
+    def iter_sections(self, text: str) -> Iterator[Tuple[List[str], str]]:
+        """Yield (heading path, body) for each heading-delimited section."""
+        text = COMMENT_PATTERN.sub('', text)
+
+        stack: List[Tuple[int, str]] = []
+        body: List[str] = []
+
+        for line in text.split('\n'):
+            match = HEADING_PATTERN.match(line)
+            if match:
+                if any(part.strip() for part in body):
+                    yield [title for _, title in stack], '\n'.join(body).strip()
+                body = []
+                level = len(match.group(1))
+                while stack and stack[-1][0] >= level:
+                    stack.pop()
+                stack.append((level, match.group(2)))
+            else:
+                body.append(line)
+
+        if any(part.strip() for part in body):
+            yield [title for _, title in stack], '\n'.join(body).strip()
+
+    def chunk_text(self, text: str, doc_type: str) -> List[Chunk]:
+        """Split a processed document into chunks.
+
+        Args:
+            text: Processed markdown content
+            doc_type: Document type, used as the chunk ID namespace
+
+        Returns:
+            Chunks in document order
+        """
+        chunks = []
+        seen_paths: Dict[str, int] = {}
+        pending = ""  # Text of undersized sections waiting to be merged
+
+        for path, body in self.iter_sections(text):
+            section_text = self._render(path, body)
+            if pending:
+                section_text = f"{pending}\n\n{section_text}"
+                pending = ""
+
+            if count_tokens(section_text) < self.min_tokens:
+                pending = section_text
+                continue
+
+            path_key = " > ".join(path)
+            occurrence = seen_paths.get(path_key, 0)
+            seen_paths[path_key] = occurrence + 1
+
+            for part_no, part in enumerate(self._split_to_limit(section_text)):
+                chunks.append(Chunk(
+                    chunk_id=self._make_id(doc_type, path_key, occurrence, part_no),
+                    text=part,
+                    section_path=list(path),
+                    token_count=count_tokens(part)
+                ))
+
+        if pending:
+            if chunks and chunks[-1].token_count + count_tokens(pending) <= self.max_tokens:
+                last = chunks[-1]
+                last.text = f"{last.text}\n\n{pending}"
+                last.token_count = count_tokens(last.text)
+            else:
+                chunks.append(Chunk(
+                    chunk_id=self._make_id(doc_type, "__tail__", 0, 0),
+                    text=pending,
+                    token_count=count_tokens(pending)
+                ))
+
+        return chunks
+
+    def split_documents(self, documents: List[Document]) -> List[Document]:
+        """Chunk documents into retrieval-sized documents with chunk metadata."""
+        result = []
+        for doc in documents:
+            doc_type = doc.metadata.get('type', 'general')
+            for index, chunk in enumerate(self.chunk_text(doc.page_content, doc_type)):
+                metadata = dict(doc.metadata)
+                metadata.update({
+                    "chunk_id": chunk.chunk_id,
+                    "chunk_index": index,
+                    "section_path": " > ".join(chunk.section_path),
+                    "section": chunk.section_path[-1] if chunk.section_path else "",
+                    "token_count": chunk.token_count,
+                    "content_hash": chunk.content_hash
+                })
+                result.append(Document(page_content=chunk.text, metadata=metadata))
+        return result
+
+    def _render(self, path: List[str], body: str) -> str:
+        """Render a section with its heading path as a breadcrumb line."""
+        if not path:
+            return body
+        return f"{' > '.join(path)}\n{body}"
+
+    def _split_to_limit(self, text: str) -> List[str]:
+        """Split oversized text on line boundaries to fit max_tokens."""
+        if count_tokens(text) <= self.max_tokens:
+            return [text]
+
+        parts = []
+        current: List[str] = []
+        current_tokens = 0
+        for line in text.split('\n'):
+            line_tokens = count_tokens(line) + 1  # Count the newline joining lines
+            if line_tokens > self.max_tokens:
+                if current:
+                    parts.append('\n'.join(current))
+                    current, current_tokens = [], 0
+                parts.extend(split_tokens(line, self.max_tokens))
+                continue
+            if current and current_tokens + line_tokens > self.max_tokens:
+                parts.append('\n'.join(current))
+                current, current_tokens = [], 0
+            current.append(line)
+            current_tokens += line_tokens
+
+        if current:
+            parts.append('\n'.join(current))
+        return [part for part in parts if part.strip()]
+
+    @staticmethod
+    def _make_id(doc_type: str, path_key: str, occurrence: int, part_no: int) -> str:
+        """Build a chunk ID that stays the same while the heading path does."""
+        digest = hashlib.sha1(f"{path_key}#{occurrence}".encode('utf-8')).hexdigest()[:12]
+        return f"{doc_type}:{digest}:{part_no}"
+
+@dataclass
+class ChunkDiff:
+    """Chunk-level difference between two versions of a document."""
+    added: List[Document] = field(default_factory=list)
+    changed: List[Document] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    unchanged: int = 0
+
+    @property
+    def is_empty(self) -> bool:
+        return not (self.added or self.changed or self.removed)
+
+def diff_chunks(old_chunks: List[Document], new_chunks: List[Document]) -> ChunkDiff:
+    """Compare two chunked versions of a document by chunk ID and content hash."""
+    old_hashes = {doc.metadata['chunk_id']: doc.metadata['content_hash'] for doc in old_chunks}
+    new_ids = set()
+    diff = ChunkDiff()
+
+    for doc in new_chunks:
+        chunk_id = doc.metadata['chunk_id']
+        new_ids.add(chunk_id)
+        if chunk_id not in old_hashes:
+            diff.added.append(doc)
+        elif old_hashes[chunk_id] != doc.metadata['content_hash']:
+            diff.changed.append(doc)
+        else:
+            diff.unchanged += 1
+
+    diff.removed = [chunk_id for chunk_id in old_hashes if chunk_id not in new_ids]
+    return diff
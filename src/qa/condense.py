@@ -0,0 +1,137 @@
+"""
+Decides when a follow-up question needs to be rewritten with the chat history.
+
+ConversationalRetrievalChain rewrites every question asked after the first
+turn into a standalone one, which costs an extra LLM call. Most follow-ups
+in this app ("Can I sell halal food?") already stand on their own, so the
+rewrite is only made for questions that refer back to earlier turns, and
+rewrites are cached for repeated (history, question) pairs.
+"""
+
+from collections import OrderedDict
+import logging
+import re
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from langchain.chains import LLMChain
+from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger(__name__)
+
+WORD_PATTERN = re.compile(r"[a-z0-9']+")
+
+# Words that only make sense with an earlier turn in view
+REFERRING_WORDS = frozenset("""
+it its it's itself they them their theirs those these that this there he she him her
+one ones same such above former latter previous earlier
+""".split())
+
+# Openings of follow-ups such as "And for drinks?" or "What about Clause 21?"
+FOLLOW_UP_PATTERN = re.compile(
+    r"^\s*(?:and|but|also|so|then|or|what about|how about|why not|else|more|same)\b",
+    re.IGNORECASE
+)
+
+MIN_STANDALONE_WORDS = 4
+
+class CondensePolicy:
+    """Rewrites follow-up questions only when they depend on the history.
+
+    A question is treated as standalone if it has no referring words, does
+    not open like a follow-up and is at least MIN_STANDALONE_WORDS long.
+    Shorter questions are also standalone when embeddings are given and
+    the question is unrelated to the previous turn (a change of topic).
+    """
+
+    def __init__(self, question_generator: LLMChain,
+                 embeddings: Optional[Embeddings] = None,
+                 similarity_threshold: float = 0.5, max_entries: int = 256):
+        """Initialize the policy.
+
+        Args:
+            question_generator: Chain that rewrites a question with the history
+            embeddings: Embeddings used to compare short questions with the
+                previous turn; without them short questions are rewritten
+            similarity_threshold: Cosine similarity to the previous turn above
+                which a short question is treated as a follow-up
+            max_entries: Number of rewrites kept
+        """
+        self.question_generator = question_generator
+        self.embeddings = embeddings
+        self.similarity_threshold = similarity_threshold
+        self.max_entries = max_entries
+        self.skipped = 0
+        self.rewritten = 0
+        self.cache_hits = 0
+        self._rewrites: "OrderedDict[Tuple[str, str], str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def stats(self) -> Dict[str, float]:
+        """How often the rewrite was skipped, made or served from cache."""
+        total = self.skipped + self.rewritten + self.cache_hits
+        return {
+            "skipped": self.skipped,
+            "rewritten": self.rewritten,
+            "cache_hits": self.cache_hits,
+            "skip_rate": self.skipped / total if total else 0.0
+        }
+
+    def needs_rewrite(self, question: str, previous_question: Optional[str] = None) -> bool:
+        """Whether a question depends on earlier turns."""
+        words = WORD_PATTERN.findall(question.lower())
+        if FOLLOW_UP_PATTERN.match(question) or REFERRING_WORDS.intersection(words):
+            return True
+        if len(words) >= MIN_STANDALONE_WORDS:
+            return False
+        if self.embeddings is None or not previous_question:
+            return True
+        return self._similarity(question, previous_question) >= self.similarity_threshold
+
+    def _similarity(self, first: str, second: str) -> float:
+        vectors = np.asarray(self.embeddings.embed_documents([first, second]), dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1)
+        if not norms.all():
+            return 0.0
+        return float(vectors[0] @ vectors[1] / (norms[0] * norms[1]))
+
+    def condense(self, question: str, chat_history: List[Tuple[str, str]],
+                 chat_history_str: str) -> str:
+        """Return the question to retrieve with.
+
+        Args:
+            question: The user's question
+            chat_history: Earlier (question, answer) turns
+            chat_history_str: The history formatted for the question generator
+        """
+        if not chat_history_str:
+            return question
+
+        previous_question = None
+        if chat_history and isinstance(chat_history[-1], tuple):
+            previous_question = chat_history[-1][0]
+        if not self.needs_rewrite(question, previous_question):
+            self.skipped += 1
+            logger.debug("Question is standalone, skipping rewrite")
+            return question
+
+        key = (chat_history_str, question)
+        with self._lock:
+            if key in self._rewrites:
+                self._rewrites.move_to_end(key)
+                self.cache_hits += 1
+                return self._rewrites[key]
+
+        rewritten = self.question_generator.invoke({
+            "question": question,
+            "chat_history": chat_history_str
+        })[self.question_generator.output_key]
+        self.rewritten += 1
+
+        with self._lock:
+            self._rewrites[key] = rewritten
+            while len(self._rewrites) > self.max_entries:
+                self._rewrites.popitem(last=False)
+        return rewritten
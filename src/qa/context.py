@@ -0,0 +1,182 @@
+"""
+Assembles retrieved chunks into the context passed to the QA prompt.
+
+Retrieved chunks often repeat each other: neighbouring chunks of a section
+are both returned, splitters with overlap repeat the text at chunk
+boundaries, and the same paragraph appears in several documents. The
+packer merges neighbours, drops near-duplicates and fills a token budget
+with the best-scoring chunks.
+"""
+
+from functools import lru_cache
+import logging
+import re
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+from langchain.docstore.document import Document
+from langchain_core.prompts import BasePromptTemplate, format_document
+
+from src.qa.tokens import count_tokens, split_tokens
+
+logger = logging.getLogger(__name__)
+
+WORD_PATTERN = re.compile(r"\w+")
+SHINGLE_SIZE = 3
+MIN_OVERLAP_CHARS = 20  # Shorter shared text at a chunk boundary is not treated as overlap
+
+@lru_cache(maxsize=4096)
+def cached_token_count(text: str) -> int:
+    """Token count of text, cached since the same chunks are retrieved repeatedly."""
+    return count_tokens(text)
+
+def _shingles(text: str) -> FrozenSet[Tuple[str, ...]]:
+    words = WORD_PATTERN.findall(text.lower())
+    if len(words) < SHINGLE_SIZE:
+        return frozenset([tuple(words)])
+    return frozenset(zip(*(words[i:] for i in range(SHINGLE_SIZE))))
+
+def _overlap(first: str, second: str) -> int:
+    """Length of the longest suffix of first that is a prefix of second."""
+    # Only positions where the start of second occurs in first can begin an overlap
+    head = second[:MIN_OVERLAP_CHARS]
+    if len(head) < MIN_OVERLAP_CHARS:
+        return 0
+    start = max(len(first) - len(second), 0)
+    position = first.find(head, start)
+    while position != -1:
+        if second.startswith(first[position:]):
+            return len(first) - position
+        position = first.find(head, position + 1)
+    return 0
+
+class ContextPacker:
+    """Merges, de-duplicates and packs retrieved chunks into a token budget."""
+
+    def __init__(self, max_tokens: int = 3000, duplicate_threshold: float = 0.85):
+        """Initialize the packer.
+
+        Args:
+            max_tokens: Budget for the formatted context, separators included
+            duplicate_threshold: Word-shingle Jaccard similarity at which the
+                lower-scoring of two chunks is dropped
+        """
+        self.max_tokens = max_tokens
+        self.duplicate_threshold = duplicate_threshold
+
+    def merge_adjacent(self, docs: List[Document]) -> List[Document]:
+        """Join chunks of the same source that are neighbours or overlap.
+
+        Neighbours are recognised by consecutive chunk_index values and
+        overlaps by text shared at the boundary. The merged chunk keeps the
+        metadata and score of its best part.
+        """
+        by_source: Dict[str, List[Document]] = {}
+        for doc in docs:
+            by_source.setdefault(doc.metadata.get('source', ''), []).append(doc)
+
+        merged = []
+        for source_docs in by_source.values():
+            source_docs.sort(key=lambda doc: doc.metadata.get('chunk_index', 0))
+            current = source_docs[0]
+            for doc in source_docs[1:]:
+                joined = self._join(current, doc)
+                if joined is None:
+                    merged.append(current)
+                    current = doc
+                else:
+                    current = joined
+            merged.append(current)
+
+        return sorted(merged, key=lambda doc: doc.metadata.get('score', 0.0), reverse=True)
+
+    def _join(self, first: Document, second: Document) -> Optional[Document]:
+        first_index = first.metadata.get('last_chunk_index', first.metadata.get('chunk_index'))
+        second_index = second.metadata.get('chunk_index')
+        adjacent = (first_index is not None and second_index is not None
+                    and second_index - first_index == 1)
+
+        overlap = _overlap(first.page_content, second.page_content)
+        if not adjacent and not overlap:
+            return None
+
+        if overlap:
+            text = first.page_content + second.page_content[overlap:]
+        else:
+            text = f"{first.page_content}\n\n{second.page_content}"
+
+        best = max(first, second, key=lambda doc: doc.metadata.get('score', 0.0))
+        chunk_ids = (first.metadata.get('merged_chunk_ids') or [first.metadata.get('chunk_id')]) + \
+            (second.metadata.get('merged_chunk_ids') or [second.metadata.get('chunk_id')])
+        metadata = {
+            **best.metadata,
+            'chunk_index': first.metadata.get('chunk_index'),
+            'last_chunk_index': second.metadata.get('last_chunk_index', second_index),
+            'merged_chunk_ids': chunk_ids
+        }
+        return Document(page_content=text, metadata=metadata)
+
+    def drop_duplicates(self, docs: List[Document]) -> List[Document]:
+        """Drop chunks nearly identical to a better-scoring chunk.
+
+        docs must be ordered best first.
+        """
+        kept: List[Tuple[Document, FrozenSet]] = []
+        for doc in docs:
+            shingles = _shingles(doc.page_content)
+            if any(self._similarity(shingles, other) >= self.duplicate_threshold
+                   for _, other in kept):
+                continue
+            kept.append((doc, shingles))
+        return [doc for doc, _ in kept]
+
+    @staticmethod
+    def _similarity(first: FrozenSet, second: FrozenSet) -> float:
+        if not first or not second:
+            return 0.0
+        return len(first & second) / len(first | second)
+
+    def pack(self, docs: List[Document], document_prompt: BasePromptTemplate,
+             separator: str = "\n\n") -> Tuple[List[Document], str]:
+        """Build the context for the prompt.
+
+        Args:
+            docs: Retrieved chunks, best first
+            document_prompt: Prompt that formats each chunk
+            separator: Text placed between formatted chunks
+
+        Returns:
+            The chunks that were used and the formatted context
+        """
+        if not docs:
+            return [], ""
+
+        candidates = self.drop_duplicates(self.merge_adjacent(docs))
+        separator_tokens = cached_token_count(separator) if separator else 0
+
+        packed: List[Document] = []
+        parts: List[str] = []
+        used = 0
+        for doc in candidates:
+            text = format_document(doc, document_prompt)
+            tokens = cached_token_count(text) + (separator_tokens if parts else 0)
+            if used + tokens > self.max_tokens:
+                continue  # A smaller chunk further down may still fit
+            packed.append(doc)
+            parts.append(text)
+            used += tokens
+
+        if not packed:
+            # Even the best chunk is over budget; send as much of it as fits
+            best = candidates[0]
+            content = split_tokens(best.page_content, self.max_tokens)[0]
+            best = Document(page_content=content, metadata=best.metadata)
+            text = format_document(best, document_prompt)
+            while cached_token_count(text) > self.max_tokens and content:
+                content = content[:len(content) * 9 // 10]
+                best = Document(page_content=content, metadata=best.metadata)
+                text = format_document(best, document_prompt)
+            packed, parts = [best], [text]
+
+        logger.debug(f"Packed {len(packed)} of {len(docs)} retrieved chunks "
+                     f"into {used or cached_token_count(parts[0])} tokens")
+        return packed, separator.join(parts)
@@ -0,0 +1,368 @@
+"""
+Content-addressed cache of embedding vectors on disk.
+
+Vectors live in a memory-mapped float32 matrix, one file per
+(model, dimensions) pair, with the sha256 of each row's text in a
+memory-mapped key file beside it and the rows' recency order in a small
+JSON index. When the cache reaches its size limit, the least recently used
+rows are overwritten.
+
+Search queries are also remembered in process by QueryEmbeddingCache, so a
+repeated question is embedded without a call to the provider.
+"""
+
+from collections import OrderedDict
+from contextlib import contextmanager
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = Path("data") / "processed" / "embedding_cache"
+QUERY_CACHE_SUBDIR = "queries"
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+QUERY_CACHE_MAX_BYTES = 32 * 1024 * 1024
+INITIAL_CAPACITY = 1024
+KEY_BYTES = 32  # sha256 digest stored with each row
+INDEX_WRITE_INTERVAL = 64  # Entries stored between writes of the recency index
+
+# Output sizes of the OpenAI models used in this project
+MODEL_DIMENSIONS = {
+    "text-embedding-3-small": 1536,
+    "text-embedding-3-large": 3072,
+    "text-embedding-ada-002": 1536
+}
+
+def text_digest(text: str) -> bytes:
+    """Content address of a text, as stored next to its vector."""
+    return hashlib.sha256(text.encode('utf-8')).digest()
+
+def normalize_query(text: str) -> str:
+    """Lowercase a query and collapse its whitespace."""
+    return " ".join(text.lower().split())
+
+class EmbeddingCache:
+    """Disk-backed store of embedding vectors for one model and size.
+
+    Several processes can share the files. Rows are allocated under an
+    exclusive lock on the lock file, after re-reading which rows are taken,
+    and each row's key is stored next to its vector and checked on every
+    read, so a row taken over by another process is a miss rather than
+    the wrong vector.
+    """
+
+    def __init__(self, model: str, dimensions: Optional[int] = None,
+                 cache_dir: Path = CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        """Initialize the cache.
+
+        Args:
+            model: Name of the embedding model
+            dimensions: Vector size; defaults to the model's native size
+            cache_dir: Directory holding the cache files
+            max_bytes: Size limit of the vector matrix
+        """
+        self.model = model
+        self.dimensions = dimensions or MODEL_DIMENSIONS.get(model)
+        if not self.dimensions:
+            raise ValueError(f"Unknown dimensions for embedding model: {model}")
+
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max(1, max_bytes // (self.dimensions * 4))
+
+        slug = re.sub(r'[^A-Za-z0-9_.-]', '_', model)
+        self.matrix_path = self.cache_dir / f"{slug}_{self.dimensions}.f32"
+        self.keys_path = self.cache_dir / f"{slug}_{self.dimensions}.keys"
+        self.index_path = self.cache_dir / f"{slug}_{self.dimensions}.json"
+        self.lock_path = self.cache_dir / f"{slug}_{self.dimensions}.lock"
+
+        self._lock = threading.Lock()
+        # Key digest -> row, least recently used first
+        self._entries: "OrderedDict[bytes, int]" = OrderedDict()
+        self._free: List[int] = []
+        self._capacity = 0
+        self._matrix = None
+        self._keys = None
+        self._unsaved = 0  # Entries stored since the recency index was last written
+        with self._lock, self._file_lock():
+            self._sync(self._saved_order())
+        logger.info(f"Opened embedding cache {self.matrix_path} with {len(self._entries)} entries")
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        """Hold the lock shared with other processes using the cache files."""
+        if fcntl is None:  # Not available on Windows; reads still check row keys
+            yield
+            return
+        with open(self.lock_path, 'a') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _saved_order(self) -> List[bytes]:
+        """Keys in the recency order last written to the index file."""
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                return [bytes.fromhex(key) for key in json.load(f).get('order', [])]
+        except FileNotFoundError:
+            return []
+        except Exception as e:
+            logger.error(f"Error loading embedding cache index {self.index_path}: {str(e)}")
+            return []
+
+    def _map(self, capacity: int) -> None:
+        """Map the matrix and key files, growing them to hold capacity rows."""
+        for path, row_bytes in ((self.matrix_path, self.dimensions * 4), (self.keys_path, KEY_BYTES)):
+            with open(path, 'ab') as f:
+                if f.tell() < capacity * row_bytes:
+                    f.truncate(capacity * row_bytes)
+        if self._matrix is not None:
+            self._matrix.flush()
+            self._keys.flush()
+        self._matrix = np.memmap(
+            self.matrix_path, dtype=np.float32, mode='r+',
+            shape=(capacity, self.dimensions)
+        )
+        self._keys = np.memmap(self.keys_path, dtype=np.uint8, mode='r+', shape=(capacity, KEY_BYTES))
+        self._capacity = capacity
+
+    def _sync(self, order: Optional[List[bytes]] = None) -> None:
+        """Re-read which rows are taken, as other processes may have changed them.
+
+        Must be called holding the file lock.
+
+        Args:
+            order: Recency order to apply, instead of keeping this process's
+        """
+        rows = self.matrix_path.stat().st_size // (self.dimensions * 4) if self.matrix_path.exists() else 0
+        # Never smaller than the files, which max_bytes may have shrunk below
+        capacity = max(min(max(rows, INITIAL_CAPACITY), self.max_entries), rows)
+        if capacity != self._capacity or self._matrix is None:
+            self._map(capacity)
+
+        taken = self._keys.any(axis=1)
+        on_disk = {self._keys[row].tobytes(): int(row) for row in np.flatnonzero(taken)}
+        self._free = [int(row) for row in np.flatnonzero(~taken)[::-1]]
+
+        # Keys stored by other processes count as least recently used here
+        known = order if order is not None else list(self._entries)
+        known_keys = set(known)
+        entries = OrderedDict((key, row) for key, row in on_disk.items() if key not in known_keys)
+        entries.update((key, on_disk[key]) for key in known if key in on_disk)
+        self._entries = entries
+
+    def _allocate_row(self) -> int:
+        """Return a free row, growing the matrix or evicting the least recently used entry."""
+        if self._free:
+            return self._free.pop()
+
+        if self._capacity < self.max_entries:
+            row = self._capacity
+            self._map(min(self._capacity * 2, self.max_entries))
+            self._free = list(range(self._capacity - 1, row, -1))
+            return row
+
+        return self._entries.popitem(last=False)[1]
+
+    def _read(self, key: bytes, row: int) -> Optional[np.ndarray]:
+        """The vector in a row, if the row still holds the key."""
+        if row >= self._capacity or self._keys[row].tobytes() != key:
+            return None
+        vector = np.array(self._matrix[row])
+        # The row may have been rewritten by another process while it was read
+        return vector if self._keys[row].tobytes() == key else None
+
+    def get_many(self, texts: List[str]) -> List[Optional[np.ndarray]]:
+        """Look up vectors for texts, with None for each miss."""
+        keys = [text_digest(text) for text in texts]
+        with self._lock:
+            results = self._get_keys(keys)
+            if any(vector is None for vector in results):
+                # Another process may have stored them since the last sync
+                with self._file_lock():
+                    self._sync()
+                results = [
+                    vector if vector is not None else self._get_keys([key])[0]
+                    for key, vector in zip(keys, results)
+                ]
+        return results
+
+    def _get_keys(self, keys: List[bytes]) -> List[Optional[np.ndarray]]:
+        results = []
+        for key in keys:
+            row = self._entries.get(key)
+            vector = self._read(key, row) if row is not None else None
+            if vector is None:
+                self._entries.pop(key, None)
+            else:
+                self._entries.move_to_end(key)
+            results.append(vector)
+        return results
+
+    def put_many(self, texts: List[str], vectors: List[List[float]]) -> None:
+        """Store vectors for texts.
+
+        The recency index is written every INDEX_WRITE_INTERVAL entries,
+        not on every call; the row keys on disk are what reads rely on.
+        """
+        with self._lock, self._file_lock():
+            self._sync()
+            for text, vector in zip(texts, vectors):
+                key = text_digest(text)
+                row = self._entries.pop(key, None)
+                if row is None:
+                    row = self._allocate_row()
+                # Clear the key first so readers miss while the vector is rewritten
+                self._keys[row] = 0
+                self._matrix[row] = np.asarray(vector, dtype=np.float32)
+                self._keys[row] = np.frombuffer(key, dtype=np.uint8)
+                self._entries[key] = row
+            self._matrix.flush()
+            self._keys.flush()
+
+            self._unsaved += len(texts)
+            if self._unsaved >= INDEX_WRITE_INTERVAL:
+                self._write_index()
+
+    def flush(self) -> None:
+        """Write the recency index now."""
+        with self._lock, self._file_lock():
+            self._write_index()
+
+    def _write_index(self) -> None:
+        """Write the recency order of the entries to the index file."""
+        tmp_path = self.index_path.with_suffix(f'.json.{os.getpid()}.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                "model": self.model,
+                "dimensions": self.dimensions,
+                "order": [key.hex() for key in self._entries]
+            }, f)
+        os.replace(tmp_path, self.index_path)
+        self._unsaved = 0
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper that only sends uncached texts to the provider."""
+
+    def __init__(self, embeddings: Embeddings, cache: EmbeddingCache):
+        self.embeddings = embeddings
+        self.cache = cache
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts, reusing cached vectors where possible."""
+        cached = self.cache.get_many(texts)
+
+        # Embed each distinct missing text once
+        missing = list(dict.fromkeys(
+            text for text, vector in zip(texts, cached) if vector is None
+        ))
+        if missing:
+            logger.info(f"Embedding {len(missing)} of {len(texts)} texts ({len(texts) - len(missing)} cached)")
+            vectors = self.embeddings.embed_documents(missing)
+            self.cache.put_many(missing, vectors)
+            computed = dict(zip(missing, vectors))
+        else:
+            computed = {}
+
+        return [
+            vector.tolist() if vector is not None else list(computed[text])
+            for text, vector in zip(texts, cached)
+        ]
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a search query."""
+        return self.embeddings.embed_query(text)
+
+class QueryEmbeddingCache(Embeddings):
+    """Embeddings wrapper that remembers the vectors of search queries.
+
+    Queries are looked up by their normalized text, first in an in-process
+    LRU and then in an optional disk tier shared across restarts, before
+    the provider is called. Document embeddings pass straight through.
+    """
+
+    def __init__(self, embeddings: Embeddings, model: str, max_entries: int = 1024,
+                 disk: Optional[EmbeddingCache] = None):
+        """Initialize the cache.
+
+        Args:
+            embeddings: Provider used on a miss
+            model: Identifier of the embedding model, part of every key
+            max_entries: Number of query vectors kept in memory
+            disk: Cache that misses in memory are looked up in next
+        """
+        self.embeddings = embeddings
+        self.model = model
+        self.max_entries = max_entries
+        self.disk = disk
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._vectors: "OrderedDict[Tuple[str, str], np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def stats(self) -> Dict[str, float]:
+        """How often queries were served from memory, from disk or embedded."""
+        total = self.hits + self.disk_hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.disk_hits) / total if total else 0.0
+        }
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts with the wrapped provider."""
+        return self.embeddings.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a search query, reusing the vector of an identical earlier one."""
+        query = normalize_query(text)
+        key = (self.model, query)
+        with self._lock:
+            vector = self._vectors.get(key)
+            if vector is not None:
+                self._vectors.move_to_end(key)
+                self.hits += 1
+                return vector.tolist()
+
+        if self.disk is not None:
+            vector = self.disk.get_many([query])[0]
+            if vector is not None:
+                self.disk_hits += 1
+                self._remember(key, vector)
+                return vector.tolist()
+
+        self.misses += 1
+        embedded = self.embeddings.embed_query(text)
+        if self.disk is not None:
+            self.disk.put_many([query], [embedded])
+        self._remember(key, np.asarray(embedded, dtype=np.float32))
+        return list(embedded)
+
+    def _remember(self, key: Tuple[str, str], vector: np.ndarray) -> None:
+        with self._lock:
+            self._vectors[key] = vector
+            self._vectors.move_to_end(key)
+            while len(self._vectors) > self.max_entries:
+                self._vectors.popitem(last=False)
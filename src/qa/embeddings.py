@@ -0,0 +1,152 @@
+"""
+Embedding providers selectable through the `qa.embeddings` settings.
+
+`openai` uses the OpenAI embedding API behind the on-disk embedding cache.
+`local` is a deterministic hashed n-gram projection computed with NumPy,
+for building and testing indexes without network access. Either way,
+search queries go through an in-process cache of query vectors.
+"""
+
+import math
+import re
+import zlib
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from src.qa.embedding_cache import (
+    CACHE_DIR,
+    QUERY_CACHE_MAX_BYTES,
+    QUERY_CACHE_SUBDIR,
+    CachedEmbeddings,
+    EmbeddingCache,
+    QueryEmbeddingCache
+)
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+LOCAL_DEFAULT_DIMENSIONS = 512
+
+class HashingEmbeddings(Embeddings):
+    """Deterministic local embeddings from hashed word and character n-grams.
+    
+    Each text is turned into word unigrams, word bigrams and character
+    n-grams of its words. Features are hashed into a fixed number of signed
+    buckets with sublinear term frequency, and the result is L2-normalized
+    so inner product equals cosine similarity.
+    """
+    
+    def __init__(self, dimensions: int = LOCAL_DEFAULT_DIMENSIONS,
+                 char_ngrams: tuple = (3, 5)):
+        self.dimensions = dimensions
+        self.char_ngrams = char_ngrams
+    
+    @property
+    def model_name(self) -> str:
+        """Identifier used in index and cache keys."""
+        low, high = self.char_ngrams
+        return f"local-hashing-{low}{high}"
+    
+    def _features(self, text: str) -> Counter:
+        """Count the n-gram features of a text."""
+        words = TOKEN_PATTERN.findall(text.lower())
+        features = Counter(f"w:{word}" for word in words)
+        features.update(f"b:{a} {b}" for a, b in zip(words, words[1:]))
+        
+        low, high = self.char_ngrams
+        for word in words:
+            padded = f"<{word}>"
+            for n in range(low, high + 1):
+                features.update(f"c:{padded[i:i + n]}" for i in range(len(padded) - n + 1))
+        return features
+    
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts into normalized hashed feature vectors."""
+        matrix = np.zeros((len(texts), self.dimensions), dtype=np.float32)
+        
+        for row, text in enumerate(texts):
+            features = self._features(text)
+            if not features:
+                continue
+            hashes = np.fromiter(
+                (zlib.crc32(feature.encode('utf-8')) for feature in features),
+                dtype=np.uint32, count=len(features)
+            )
+            weights = np.fromiter(
+                (1.0 + math.log(count) for count in features.values()),
+                dtype=np.float32, count=len(features)
+            )
+            # The top bit picks the sign so colliding features tend to cancel
+            signs = np.where(hashes >> 31, -1.0, 1.0).astype(np.float32)
+            np.add.at(matrix[row], hashes % self.dimensions, signs * weights)
+        
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix /= np.where(norms == 0, 1.0, norms)
+        return matrix.tolist()
+    
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a search query."""
+        return self.embed_documents([text])[0]
+
+def embedding_model_id(config: Dict) -> str:
+    """Identify the configured embedding model for index and cache keys."""
+    if config['provider'] == 'local':
+        dimensions = config.get('dimensions') or LOCAL_DEFAULT_DIMENSIONS
+        return f"{HashingEmbeddings().model_name}-{dimensions}"
+    if config.get('dimensions'):
+        return f"{config['model']}-{config['dimensions']}"
+    return config['model']
+
+def build_embeddings(config: Dict, cache_dir: Path = CACHE_DIR) -> Embeddings:
+    """Create the embedding provider described by the embeddings settings.
+    
+    Args:
+        config: The `qa.embeddings` settings
+        cache_dir: Directory of the on-disk embedding cache
+    """
+    embeddings = _build_provider(config, cache_dir)
+    if not config.get('query_cache_size'):
+        return embeddings
+    
+    # Hashing is cheaper than a disk read, so only API embeddings get the disk tier
+    disk = None
+    if config['provider'] != 'local' and config.get('query_cache_disk'):
+        disk = EmbeddingCache(
+            config['model'],
+            config.get('dimensions'),
+            Path(cache_dir) / QUERY_CACHE_SUBDIR,
+            max_bytes=QUERY_CACHE_MAX_BYTES
+        )
+    return QueryEmbeddingCache(
+        embeddings,
+        embedding_model_id(config),
+        max_entries=config['query_cache_size'],
+        disk=disk
+    )
+
+def _build_provider(config: Dict, cache_dir: Path) -> Embeddings:
+    """Create the configured provider, with its document cache if enabled."""
+    provider = config['provider']
+    
+    if provider == 'local':
+        return HashingEmbeddings(dimensions=config.get('dimensions') or LOCAL_DEFAULT_DIMENSIONS)
+    
+    if provider == 'openai':
+        from langchain_openai import OpenAIEmbeddings
+        
+        embeddings = OpenAIEmbeddings(
+            model=config['model'],
+            dimensions=config.get('dimensions'),
+            embedding_ctx_length=8191,  # Maximum context length
+            chunk_size=1000  # Process in larger chunks
+        )
+        if not config.get('cache', True):
+            return embeddings
+        return CachedEmbeddings(
+            embeddings,
+            EmbeddingCache(config['model'], config.get('dimensions'), cache_dir)
+        )
+    
+    raise ValueError(f"Unknown embedding provider: {provider}")
@@ -0,0 +1,118 @@
+"""
+Shared execution of LLM calls for every session.
+
+Streamlit runs each session in its own thread, and all of them use the
+one process-wide QA chain. Calls go through an asyncio event loop running
+in a background thread, which limits how many LLM calls are in flight at
+once. Identical requests made while one is already in flight join it
+instead of making a call of their own, and receive the same tokens.
+"""
+
+import asyncio
+from dataclasses import dataclass, field
+import logging
+import queue
+import threading
+from typing import AsyncIterator, Callable, Dict, Hashable, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+
+@dataclass
+class _Flight:
+    """An upstream call and the sessions waiting on it."""
+    tokens: List[str] = field(default_factory=list)
+    subscribers: List[queue.Queue] = field(default_factory=list)
+    done: bool = False
+    error: Optional[BaseException] = None
+
+class QAExecutor:
+    """Runs LLM calls with a concurrency limit, coalescing identical requests."""
+
+    def __init__(self, max_concurrency: int = 4):
+        """Start the executor's event loop.
+
+        Args:
+            max_concurrency: Maximum number of upstream calls in flight
+        """
+        self.max_concurrency = max_concurrency
+        self.upstream_calls = 0
+        self.coalesced = 0
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._loop = asyncio.new_event_loop()
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._thread = threading.Thread(
+            target=self._loop.run_forever,
+            name="qa-executor",
+            daemon=True
+        )
+        self._thread.start()
+
+    def stream(self, key: Hashable,
+               make_stream: Callable[[], AsyncIterator[str]]) -> Iterator[str]:
+        """Yield the tokens of a call, sharing it with identical requests.
+
+        Args:
+            key: Identifies requests that produce the same answer
+            make_stream: Starts the upstream call; only called if no request
+                with the same key is in flight
+        """
+        tokens: queue.Queue = queue.Queue()
+        asyncio.run_coroutine_threadsafe(
+            self._subscribe(key, make_stream, tokens), self._loop
+        ).result()
+
+        while True:
+            item = tokens.get()
+            if item is _DONE:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+
+    def invoke(self, key: Hashable, make_stream: Callable[[], AsyncIterator[str]]) -> str:
+        """Return the full text of a call, sharing it with identical requests."""
+        return "".join(self.stream(key, make_stream))
+
+    async def _subscribe(self, key: Hashable, make_stream: Callable[[], AsyncIterator[str]],
+                         tokens: queue.Queue) -> None:
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight()
+            self._flights[key] = flight
+            self.upstream_calls += 1
+            self._loop.create_task(self._run(key, flight, make_stream))
+        else:
+            self.coalesced += 1
+            logger.info("Joined an identical request already in flight")
+
+        # Late joiners first catch up on the tokens produced so far
+        for token in flight.tokens:
+            tokens.put(token)
+        if flight.done:
+            tokens.put(flight.error or _DONE)
+        else:
+            flight.subscribers.append(tokens)
+
+    async def _run(self, key: Hashable, flight: _Flight,
+                   make_stream: Callable[[], AsyncIterator[str]]) -> None:
+        try:
+            async with self._semaphore:
+                async for token in make_stream():
+                    flight.tokens.append(token)
+                    for subscriber in flight.subscribers:
+                        subscriber.put(token)
+        except Exception as e:
+            logger.error(f"Error in QA request: {str(e)}")
+            flight.error = e
+        finally:
+            flight.done = True
+            del self._flights[key]
+            for subscriber in flight.subscribers:
+                subscriber.put(flight.error or _DONE)
+
+    def shutdown(self) -> None:
+        """Stop the event loop."""
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
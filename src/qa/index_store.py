@@ -0,0 +1,500 @@
+"""
+Persistent storage for the FAISS vector index.
+
+The index is saved under data/processed/, one partition per document type,
+each keyed by a hash of its source document, the embedding model and the
+chunking parameters, so a restart with unchanged inputs loads the saved
+index instead of re-embedding.
+
+Saved indexes are opened read-only and memory-mapped, together with a
+chunk store holding the chunk texts, so app processes on the same host
+share one copy of both through the page cache.
+"""
+
+import copy
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import faiss
+import numpy as np
+from langchain.docstore.document import Document
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores import FAISS
+from langchain_community.vectorstores.utils import DistanceStrategy
+from langchain_core.embeddings import Embeddings
+
+from src.qa.bm25 import BM25Index
+from src.qa.chunk_store import ChunkStore, write_chunk_store
+from src.qa.chunker import ChunkDiff, MarkdownChunker, diff_chunks
+from src.qa.partitions import PartitionedIndex
+
+logger = logging.getLogger(__name__)
+
+INDEX_DIR = Path("data") / "processed" / "faiss_index"
+MANIFEST_FILE = "manifest.json"
+INDEX_FILE = "index.faiss"
+STORE_FORMAT = 2  # Version of the on-disk layout; older layouts are rebuilt
+
+INDEX_TYPES = ('flat', 'hnsw', 'ivf_pq')
+SEARCH_PARAMS = ('ef_search', 'nprobe')  # Applied when the index is opened, not part of its key
+IVF_PQ_MIN_VECTORS = 2000  # Fewer vectors than this cannot train useful IVF-PQ codebooks
+PQ_BITS = 8
+
+def create_index(vectors: np.ndarray, config: Optional[Dict] = None,
+                 metric: int = faiss.METRIC_L2):
+    """Create a FAISS index of the configured type holding vectors.
+
+    Args:
+        vectors: float32 array of shape (n, dimensions)
+        config: The qa.index settings; a flat index if not given
+        metric: faiss metric type
+
+    Returns:
+        The index, with the vectors added at positions 0..n-1
+    """
+    config = config or {}
+    index_type = config.get('type', 'flat')
+    count, dimensions = vectors.shape
+
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown index type: {index_type}")
+
+    if index_type == 'ivf_pq' and count < IVF_PQ_MIN_VECTORS:
+        logger.info(f"Only {count} vectors, using a flat index instead of IVF-PQ")
+        index_type = 'flat'
+
+    if index_type == 'hnsw':
+        index = faiss.IndexHNSWFlat(dimensions, config.get('hnsw_m', 32), metric)
+        index.hnsw.efConstruction = config.get('ef_construction', 80)
+    elif index_type == 'ivf_pq':
+        nlist = config.get('nlist') or int(4 * np.sqrt(count))
+        nlist = max(1, min(nlist, count // 39))  # faiss wants ~39 training points per list
+        pq_m = max(m for m in range(1, config.get('pq_m', 64) + 1) if dimensions % m == 0)
+        quantizer = faiss.IndexFlat(dimensions, metric)
+        index = faiss.IndexIVFPQ(quantizer, dimensions, nlist, pq_m, PQ_BITS, metric)
+        index.train(vectors)
+    else:
+        index = faiss.IndexFlat(dimensions, metric)
+
+    apply_search_params(index, config)
+    index.add(vectors)
+    return index
+
+def apply_search_params(index, config: Optional[Dict] = None) -> None:
+    """Set the query-time parameters of an HNSW or IVF index."""
+    config = config or {}
+    if isinstance(index, faiss.IndexHNSW):
+        index.hnsw.efSearch = config.get('ef_search', 64)
+    elif isinstance(index, faiss.IndexIVF) and index.nlist > 1:
+        index.nprobe = min(config.get('nprobe', 8), index.nlist)
+
+def build_vectorstore(documents: List[Document], embeddings: Embeddings,
+                      index_config: Optional[Dict] = None, **faiss_kwargs) -> FAISS:
+    """Embed documents into a FAISS vector store with the configured index type.
+
+    Equivalent to FAISS.from_documents, which always builds a flat index.
+    """
+    vectors = np.asarray(
+        embeddings.embed_documents([doc.page_content for doc in documents]),
+        dtype=np.float32
+    )
+    if faiss_kwargs.get('normalize_L2'):
+        faiss.normalize_L2(vectors)
+    metric = (faiss.METRIC_INNER_PRODUCT
+              if faiss_kwargs.get('distance_strategy') == DistanceStrategy.MAX_INNER_PRODUCT
+              else faiss.METRIC_L2)
+
+    ids = chunk_ids(documents) or [str(position) for position in range(len(documents))]
+    return FAISS(
+        embeddings,
+        create_index(vectors, index_config, metric),
+        InMemoryDocstore(dict(zip(ids, documents))),
+        dict(enumerate(ids)),
+        **faiss_kwargs
+    )
+
+class MappedFAISS(FAISS):
+    """FAISS vector store whose index is memory-mapped from a saved file.
+
+    The mapped index is read-only, so it is replaced by an in-memory copy
+    before the first change.
+    """
+
+    def __init__(self, *args, index_path: Path, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.index_path = Path(index_path)
+        self.read_only = True
+
+    def make_writable(self) -> None:
+        """Load the index into memory so vectors can be added and removed."""
+        if not self.read_only:
+            return
+        self.index = _from_mappable(faiss.read_index(str(self.index_path)))
+        self.read_only = False
+        logger.info(f"Loaded {self.index_path} into memory for updates")
+
+def _to_mappable(index):
+    """Convert a flat index to an equivalent one faiss can memory-map.
+
+    faiss only maps the inverted lists of IVF indexes, so a flat index is
+    stored as an IVF index with a single list, which searches exhaustively
+    like the flat index does.
+    """
+    if not isinstance(index, faiss.IndexFlat) or index.ntotal == 0:
+        return index
+    # With a single list every vector goes to it, so the centroid is set
+    # rather than trained, which would only run (and log) a k-means of one
+    quantizer = faiss.IndexFlat(index.d, index.metric_type)
+    quantizer.add(np.zeros((1, index.d), dtype=np.float32))
+    ivf = faiss.IndexIVFFlat(quantizer, index.d, 1, index.metric_type)
+    ivf.is_trained = True
+    ivf.add(index.reconstruct_n(0, index.ntotal))
+    return ivf
+
+def _is_flat(index) -> bool:
+    """Whether an index is flat, including one stored by _to_mappable."""
+    return isinstance(index, faiss.IndexFlat) or (
+        isinstance(index, faiss.IndexIVFFlat) and index.nlist == 1
+    )
+
+def _from_mappable(index):
+    """Undo _to_mappable, since IVF indexes keep IDs on removal and FAISS.delete expects them renumbered."""
+    if not isinstance(index, faiss.IndexIVFFlat) or index.nlist != 1:
+        return index
+    index.make_direct_map()
+    flat = faiss.IndexFlat(index.d, index.metric_type)
+    flat.add(index.reconstruct_n(0, index.ntotal))
+    return flat
+
+def compute_index_key(source_files: List[Path], embedding_model: str,
+                      chunk_params: Dict, index_config: Optional[Dict] = None) -> str:
+    """Compute the cache key for an index built from the given inputs.
+
+    Args:
+        source_files: Files whose content is indexed
+        embedding_model: Name of the embedding model
+        chunk_params: Parameters used to split documents into chunks
+        index_config: The qa.index settings; search-time parameters are
+            left out since they can change without a rebuild
+
+    Returns:
+        Hex digest identifying this combination of inputs
+    """
+    hasher = hashlib.sha256()
+    for path in sorted(source_files, key=lambda p: p.name):
+        hasher.update(path.name.encode('utf-8'))
+        hasher.update(hashlib.sha256(path.read_bytes()).digest())
+    hasher.update(embedding_model.encode('utf-8'))
+    hasher.update(json.dumps(chunk_params, sort_keys=True).encode('utf-8'))
+    if index_config and index_config.get('type', 'flat') != 'flat':
+        build_params = {
+            name: value for name, value in index_config.items() if name not in SEARCH_PARAMS
+        }
+        hasher.update(json.dumps(build_params, sort_keys=True).encode('utf-8'))
+    return hasher.hexdigest()[:16]
+
+def chunk_ids(documents: List[Document]) -> Optional[List[str]]:
+    """Return the chunk IDs of documents to use as vector IDs, if all have one."""
+    ids = [doc.metadata.get('chunk_id') for doc in documents]
+    return ids if all(ids) else None
+
+def load_index(index_key: str, embeddings: Embeddings, index_dir: Path = INDEX_DIR,
+               index_config: Optional[Dict] = None, **faiss_kwargs) -> Optional[MappedFAISS]:
+    """Open a saved index, or return None if no index exists for the key.
+
+    The vectors and chunk texts are memory-mapped rather than read, so no
+    embedding calls are made and opening is quick whatever the corpus size.
+    HNSW graphs cannot be mapped by faiss and are read into memory.
+    """
+    path = Path(index_dir) / index_key
+    manifest_file = path / MANIFEST_FILE
+    if not manifest_file.exists():
+        return None
+
+    try:
+        with open(manifest_file, 'r', encoding='utf-8') as f:
+            if json.load(f).get('format') != STORE_FORMAT:
+                logger.info(f"Index {index_key} was saved in an older format, rebuilding")
+                return None
+
+        index = faiss.read_index(
+            str(path / INDEX_FILE),
+            faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY
+        )
+        apply_search_params(index, index_config)
+        docstore = ChunkStore(path)
+        vectorstore = MappedFAISS(
+            embeddings,
+            index,
+            docstore,
+            dict(enumerate(docstore.ids())),
+            index_path=path / INDEX_FILE,
+            **faiss_kwargs
+        )
+        logger.info(f"Opened FAISS index {index_key} from {path}")
+        return vectorstore
+    except Exception as e:
+        logger.error(f"Error loading index {index_key}: {str(e)}")
+        return None
+
+def save_index(vectorstore: FAISS, index_key: str, index_dir: Path = INDEX_DIR,
+               metadata: Optional[Dict] = None) -> Path:
+    """Save an index under its key and remove indexes for stale keys.
+
+    The index is written to a temporary directory first and then renamed,
+    so a crash mid-write never leaves a partial index behind the key.
+    Processes that still have the replaced files mapped keep reading them.
+    """
+    index_dir = Path(index_dir)
+    index_dir.mkdir(parents=True, exist_ok=True)
+    path = index_dir / index_key
+    tmp_path = index_dir / f".{index_key}.{os.getpid()}.tmp"
+
+    if tmp_path.exists():
+        shutil.rmtree(tmp_path)
+    tmp_path.mkdir()
+    faiss.write_index(_to_mappable(vectorstore.index), str(tmp_path / INDEX_FILE))
+    write_chunk_store(
+        tmp_path,
+        vectorstore.docstore,
+        [vectorstore.index_to_docstore_id[i] for i in range(len(vectorstore.index_to_docstore_id))]
+    )
+    with open(tmp_path / MANIFEST_FILE, 'w', encoding='utf-8') as f:
+        json.dump({"key": index_key, "format": STORE_FORMAT, **(metadata or {})}, f, indent=2)
+
+    if path.exists():
+        shutil.rmtree(path)
+    tmp_path.rename(path)
+    logger.info(f"Saved FAISS index {index_key} to {path}")
+
+    # Only the latest index is ever loaded, so older ones are dead weight
+    for stale in index_dir.iterdir():
+        if stale.is_dir() and stale.name != index_key and not stale.name.startswith('.'):
+            shutil.rmtree(stale, ignore_errors=True)
+            logger.info(f"Removed stale index {stale.name}")
+
+    return path
+
+def load_or_build_index(documents: List[Document], embeddings: Embeddings,
+                        index_key: str, index_dir: Path = INDEX_DIR,
+                        metadata: Optional[Dict] = None,
+                        index_config: Optional[Dict] = None, **faiss_kwargs) -> FAISS:
+    """Open the index for a key, building and saving it on a miss.
+
+    A freshly built index is reopened from disk, so the process that built
+    it maps the saved files like every other process.
+    """
+    vectorstore = load_index(index_key, embeddings, index_dir, index_config, **faiss_kwargs)
+    if vectorstore is not None:
+        return vectorstore
+
+    logger.info(f"No saved index for key {index_key}, building from {len(documents)} documents")
+    vectorstore = build_vectorstore(documents, embeddings, index_config, **faiss_kwargs)
+
+    try:
+        save_index(vectorstore, index_key, index_dir, metadata)
+    except Exception as e:
+        # A failed save only costs a rebuild on the next start
+        logger.error(f"Error saving index {index_key}: {str(e)}")
+        return vectorstore
+
+    return load_index(index_key, embeddings, index_dir, index_config, **faiss_kwargs) or vectorstore
+
+def load_or_build_partitions(documents: List[Document], embeddings: Embeddings,
+                             index_keys: Dict[str, str], index_dir: Path = INDEX_DIR,
+                             metadata: Optional[Dict] = None,
+                             index_config: Optional[Dict] = None,
+                             **faiss_kwargs) -> Dict[str, FAISS]:
+    """Open or build one index per document type.
+
+    Each type is saved in its own directory under index_dir and keyed on
+    its own source file, so changing one document leaves the other
+    partitions' saved indexes valid.
+
+    Args:
+        documents: Chunks carrying a `type` in their metadata
+        index_keys: Index key of each document type
+    """
+    by_type: Dict[str, List[Document]] = {}
+    for doc in documents:
+        by_type.setdefault(doc.metadata.get('type', 'general'), []).append(doc)
+
+    return {
+        doc_type: load_or_build_index(
+            type_documents,
+            embeddings,
+            index_keys[doc_type],
+            Path(index_dir) / doc_type,
+            metadata,
+            index_config,
+            **faiss_kwargs
+        )
+        for doc_type, type_documents in by_type.items()
+    }
+
+class LiveIndex:
+    """The partitioned FAISS index in use by the running app, updatable per document.
+    
+    Keeps track of the chunker and the inputs to the index keys so that a
+    changed document can be merged into its partition chunk by chunk and
+    the partition saved under its new key.
+    """
+    
+    def __init__(self, partitions: PartitionedIndex, chunker: MarkdownChunker,
+                 embedding_model: str, source_file: Callable[[str], Optional[Path]],
+                 documents: List[Document], index_dir: Path = INDEX_DIR,
+                 keyword_index: Optional[BM25Index] = None,
+                 index_config: Optional[Dict] = None):
+        """Initialize the live index.
+        
+        Args:
+            partitions: Index the retriever searches
+            chunker: Chunker the index was built with
+            embedding_model: Name of the embedding model, part of the index keys
+            source_file: Returns the current source file of a document type
+            documents: Unchunked documents the index was built from
+            index_dir: Directory where partitions are persisted
+            keyword_index: Keyword index over the same chunks, rebuilt on updates
+            index_config: The qa.index settings the index was built with
+        """
+        self.partitions = partitions
+        self.chunker = chunker
+        self.embedding_model = embedding_model
+        self.source_file = source_file
+        self.index_dir = Path(index_dir)
+        self.keyword_index = keyword_index
+        self.index_config = index_config
+        self.doc_metadata = {doc.metadata['type']: dict(doc.metadata) for doc in documents}
+        self._lock = threading.Lock()
+    
+    def update_document(self, doc_type: str, old_content: str, new_content: str) -> ChunkDiff:
+        """Re-index a document that changed from old_content to new_content.
+        
+        Only the document's own partition is touched. Only added and
+        changed chunks are embedded, and vectors of removed and changed
+        chunks are deleted. HNSW and IVF-PQ indexes cannot delete vectors
+        the way FAISS.delete needs, so they are rebuilt instead; unchanged
+        chunks then come from the embedding cache.
+        
+        The changes are made to a copy of the partition, which replaces it
+        once complete, so concurrent searches never see a half-updated one.
+        
+        Returns:
+            The chunk-level diff that was applied
+        """
+        metadata = self.doc_metadata.get(doc_type, {"source": doc_type, "type": doc_type})
+        old_chunks = self.chunker.split_documents(
+            [Document(page_content=old_content, metadata=metadata)]
+        ) if old_content else []
+        new_chunks = self.chunker.split_documents(
+            [Document(page_content=new_content, metadata=metadata)]
+        )
+        diff = diff_chunks(old_chunks, new_chunks)
+        
+        with self._lock:
+            vectorstore = self.partitions.partitions.get(doc_type)
+            if vectorstore is None:
+                # First version of a new document type
+                updated = build_vectorstore(
+                    new_chunks, self.partitions.embeddings, self.index_config
+                ) if new_chunks else None
+            elif diff.is_empty:
+                updated = None
+            elif _is_flat(vectorstore.index):
+                updated = self._apply(vectorstore, diff)
+            else:
+                updated = self._rebuild(vectorstore, diff)
+            
+            if updated is not None:
+                # Searches in progress keep the partitions they started with,
+                # so the new partition goes in with one assignment
+                self.partitions.partitions = {**self.partitions.partitions, doc_type: updated}
+            
+            # Keyword indexing is cheap, so the whole index is rebuilt
+            if self.keyword_index is not None and not diff.is_empty:
+                self.keyword_index.build(list(self.partitions.documents()))
+        
+        logger.info(
+            f"Re-indexed {doc_type}: {len(diff.added)} added, {len(diff.changed)} changed, "
+            f"{len(diff.removed)} removed, {diff.unchanged} unchanged"
+        )
+        
+        if not diff.is_empty:
+            self.save(doc_type)
+        return diff
+    
+    @staticmethod
+    def _stale_ids(vectorstore: FAISS, diff: ChunkDiff) -> List[str]:
+        """IDs of the vectors a diff removes or replaces."""
+        # Added chunks are included in case the saved index was ahead of old_content
+        indexed = set(vectorstore.index_to_docstore_id.values())
+        return [
+            chunk_id for chunk_id in
+            diff.removed + [doc.metadata['chunk_id'] for doc in diff.added + diff.changed]
+            if chunk_id in indexed
+        ]
+    
+    def _apply(self, vectorstore: FAISS, diff: ChunkDiff) -> FAISS:
+        """Apply a chunk diff to a copy of a flat partition, leaving the original to searches."""
+        updated = copy.copy(vectorstore)
+        if isinstance(updated, MappedFAISS) and updated.read_only:
+            updated.make_writable()  # Reads a private in-memory copy of the index
+        else:
+            updated.index = _from_mappable(faiss.clone_index(vectorstore.index))
+        if isinstance(vectorstore.docstore, ChunkStore):
+            updated.docstore = vectorstore.docstore.copy()
+        else:
+            updated.docstore = InMemoryDocstore(dict(vectorstore.docstore._dict))
+        updated.index_to_docstore_id = dict(vectorstore.index_to_docstore_id)
+        
+        to_embed = diff.added + diff.changed
+        stale_ids = self._stale_ids(vectorstore, diff)
+        if stale_ids:
+            updated.delete(ids=stale_ids)
+        if to_embed:
+            updated.add_documents(to_embed, ids=chunk_ids(to_embed))
+        return updated
+    
+    def _rebuild(self, vectorstore: FAISS, diff: ChunkDiff) -> FAISS:
+        """Build a partition's contents afresh, including the changes."""
+        stale = set(self._stale_ids(vectorstore, diff))
+        documents = [
+            vectorstore.docstore.search(chunk_id)
+            for chunk_id in vectorstore.index_to_docstore_id.values()
+            if chunk_id not in stale
+        ] + diff.added + diff.changed
+        rebuilt = build_vectorstore(documents, vectorstore.embeddings, self.index_config)
+        
+        # Keep the partition's own settings, such as its distance strategy
+        updated = copy.copy(vectorstore)
+        updated.index = rebuilt.index
+        updated.docstore = rebuilt.docstore
+        updated.index_to_docstore_id = rebuilt.index_to_docstore_id
+        if isinstance(updated, MappedFAISS):
+            updated.read_only = False
+        return updated
+    
+    def save(self, doc_type: str) -> Optional[Path]:
+        """Persist a partition under the key of its current source file."""
+        source_file = self.source_file(doc_type)
+        if source_file is None:
+            return None
+        index_key = compute_index_key(
+            [source_file],
+            self.embedding_model,
+            self.chunker.params,
+            self.index_config
+        )
+        with self._lock:
+            return save_index(
+                self.partitions.partitions[doc_type],
+                index_key,
+                self.index_dir / doc_type,
+                metadata={"embedding_model": self.embedding_model}
+            )
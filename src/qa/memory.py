@@ -0,0 +1,148 @@
+"""
+Conversation memory that keeps the chat history under a token budget.
+
+The most recent turns are kept word for word. Older turns are folded into a
+running summary, so the history sent with each question stays the same
+size however long the chat runs.
+"""
+
+from dataclasses import dataclass
+import logging
+from typing import List, Optional, Tuple, Union
+
+from langchain_core.language_models import BaseLanguageModel
+from langchain_core.messages import SystemMessage
+
+from src.qa.tokens import count_tokens, split_tokens
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_PROMPT = """Progressively summarize this conversation between a user and HawkerGuru, an assistant for Singapore hawker stall bidding.
+Keep the facts the user gave (hawker centre, stall type, budget, plans) and the key points of the answers.
+Reply with the new summary only, in at most {max_words} words.
+
+Current summary:
+{summary}
+
+New lines of conversation:
+{turns}
+
+New summary:"""
+
+SUMMARY_PREFIX = "Summary of the earlier conversation: "
+
+@dataclass
+class Turn:
+    """One question and its answer."""
+    question: str
+    answer: str
+    tokens: int
+
+class ConversationMemory:
+    """Chat history for one session, bounded by a token budget.
+
+    Keeps at most recent_turns turns verbatim. When a turn is pushed out,
+    or the history would exceed max_tokens, the oldest turns are folded
+    into the summary. Without an LLM the summary lists the earlier
+    questions instead.
+    """
+
+    def __init__(self, llm: Optional[BaseLanguageModel] = None, max_tokens: int = 1500,
+                 recent_turns: int = 4, summary_max_tokens: int = 300):
+        """Initialize the memory.
+
+        Args:
+            llm: Model used to write the summary
+            max_tokens: Budget for the summary and recent turns together
+            recent_turns: Number of turns kept word for word
+            summary_max_tokens: Budget for the summary
+        """
+        self.llm = llm
+        self.max_tokens = max_tokens
+        self.recent_turns = recent_turns
+        self.summary_max_tokens = summary_max_tokens
+        self.summary = ""
+        self.turns: List[Turn] = []
+        self._summary_tokens = 0
+
+    def __len__(self) -> int:
+        return len(self.turns)
+
+    @property
+    def tokens(self) -> int:
+        """Tokens in the summary and recent turns."""
+        return self._summary_tokens + sum(turn.tokens for turn in self.turns)
+
+    def add_turn(self, question: str, answer: str) -> None:
+        """Record a turn, summarizing older turns if over budget."""
+        # A single turn may not crowd out the summary
+        turn_budget = self.max_tokens - self.summary_max_tokens
+        question_tokens = count_tokens(question)
+        answer_tokens = count_tokens(answer)
+        if question_tokens + answer_tokens > turn_budget:
+            # The question gets half the budget, or more if the answer is short
+            question_budget = max(turn_budget // 2, turn_budget - answer_tokens, 1)
+            if question_tokens > question_budget:
+                question = split_tokens(question, question_budget)[0]
+                question_tokens = count_tokens(question)
+            answer_budget = max(turn_budget - question_tokens, 1)
+            if answer_tokens > answer_budget:
+                answer = split_tokens(answer, answer_budget)[0]
+                answer_tokens = count_tokens(answer)
+        self.turns.append(Turn(question, answer, question_tokens + answer_tokens))
+
+        evicted = []
+        while self.turns and (len(self.turns) > self.recent_turns or
+                              (self.tokens > self.max_tokens and len(self.turns) > 1)):
+            evicted.append(self.turns.pop(0))
+            # Reserve room for the summary once turns start folding into it
+            self._summary_tokens = max(self._summary_tokens, self.summary_max_tokens)
+
+        if evicted:
+            self._summarize(evicted)
+
+    def _summarize(self, turns: List[Turn]) -> None:
+        """Fold turns into the running summary."""
+        if self.llm is not None:
+            try:
+                summary = self.llm.invoke(SUMMARY_PROMPT.format(
+                    max_words=self.summary_max_tokens * 3 // 4,
+                    summary=self.summary or "(none)",
+                    turns="\n".join(f"Human: {turn.question}\nAssistant: {turn.answer}"
+                                    for turn in turns)
+                ))
+                summary = getattr(summary, 'content', summary)
+            except Exception as e:
+                logger.error(f"Error summarizing conversation: {str(e)}")
+                summary = self._list_questions(turns)
+        else:
+            summary = self._list_questions(turns)
+
+        tokens = count_tokens(summary)
+        if tokens > self.summary_max_tokens:
+            # Keep the most recent part of an over-long summary
+            summary = split_tokens(summary, self.summary_max_tokens)[-1]
+            tokens = count_tokens(summary)
+        self.summary = summary
+        self._summary_tokens = tokens
+
+    def _list_questions(self, turns: List[Turn]) -> str:
+        """Summary listing the questions asked, used without an LLM."""
+        asked = "; ".join(turn.question for turn in turns)
+        if self.summary:
+            return f"{self.summary}; {asked}"
+        return f"The user asked: {asked}"
+
+    def chat_history(self) -> List[Union[SystemMessage, Tuple[str, str]]]:
+        """History to pass to the chain: the summary, then the recent turns."""
+        history: List[Union[SystemMessage, Tuple[str, str]]] = []
+        if self.summary:
+            history.append(SystemMessage(content=SUMMARY_PREFIX + self.summary))
+        history.extend((turn.question, turn.answer) for turn in self.turns)
+        return history
+
+    def clear(self) -> None:
+        """Forget the conversation."""
+        self.summary = ""
+        self.turns = []
+        self._summary_tokens = 0
@@ -0,0 +1,95 @@
+"""
+Vector search partitioned by document type.
+
+Each document type (FAQ, terms and conditions, tender notice, articles of
+sale) has its own FAISS index. A query is embedded once and the partitions
+are searched in parallel, each for up to its own quota of results, so many
+similar chunks of one type cannot crowd the others out of the candidates.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import logging
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+from langchain.docstore.document import Document
+from langchain_community.vectorstores import FAISS
+from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger(__name__)
+
+class PartitionedIndex:
+    """FAISS indexes, one per document type, searched together."""
+
+    def __init__(self, partitions: Dict[str, FAISS], embeddings: Embeddings,
+                 quotas: Optional[Dict[str, int]] = None, default_quota: int = 6,
+                 max_workers: int = 4):
+        """Initialize the partitioned index.
+
+        Args:
+            partitions: Vector store of each document type
+            embeddings: Embeddings the partitions were built with
+            quotas: Maximum results taken from each document type
+            default_quota: Quota of types not listed in quotas
+            max_workers: Partitions searched at once
+        """
+        self.partitions = dict(partitions)
+        self.embeddings = embeddings
+        self.quotas = quotas or {}
+        self.default_quota = default_quota
+        self._pool = ThreadPoolExecutor(max_workers=max_workers,
+                                        thread_name_prefix="partition-search")
+
+    def __len__(self) -> int:
+        return sum(len(vectorstore.index_to_docstore_id)
+                   for vectorstore in self.partitions.values())
+
+    def quota(self, doc_type: str) -> int:
+        return self.quotas.get(doc_type, self.default_quota)
+
+    def search(self, query: str, k: Optional[int] = None) -> List[Tuple[Document, float]]:
+        """Search every partition for a query.
+
+        Args:
+            query: The search query
+            k: Maximum total results; all partitions' quotas if not given
+
+        Returns:
+            (document, distance) pairs from all partitions, nearest first
+        """
+        if not self.partitions:
+            return []
+
+        embedding = self.embeddings.embed_query(query)
+        searches = [
+            self._pool.submit(
+                vectorstore.similarity_search_with_score_by_vector,
+                embedding,
+                k=self.quota(doc_type)
+            )
+            for doc_type, vectorstore in self.partitions.items()
+        ]
+
+        # All partitions share one embedding space, so distances compare directly
+        merged = sorted(
+            (result for search in searches for result in search.result()),
+            key=lambda result: result[1]
+        )
+        return merged[:k] if k else merged
+
+    def search_by_id(self, chunk_id: str) -> Union[str, Document]:
+        """Look up a chunk in whichever partition holds it."""
+        # Chunk IDs start with the document type, so try that partition first
+        doc_type = chunk_id.split(":", 1)[0]
+        ordered = [self.partitions[doc_type]] if doc_type in self.partitions else []
+        ordered += [vectorstore for name, vectorstore in self.partitions.items() if name != doc_type]
+        for vectorstore in ordered:
+            doc = vectorstore.docstore.search(chunk_id)
+            if isinstance(doc, Document):
+                return doc
+        return f"ID {chunk_id} not found."
+
+    def documents(self) -> Iterator[Document]:
+        """Every chunk in every partition."""
+        for vectorstore in self.partitions.values():
+            for chunk_id in vectorstore.index_to_docstore_id.values():
+                yield vectorstore.docstore.search(chunk_id)
@@ -1,64 +1,30 @@
-from typing import List, Dict
-from datetime import datetime
+from typing import List, Dict, Optional
 import logging
 from pathlib import Path
 
 import streamlit as st
 from langchain.chains import ConversationalRetrievalChain
-from langchain_openai import OpenAIEmbeddings, ChatOpenAI
-from langchain_community.vectorstores import FAISS
+from langchain_openai import ChatOpenAI
 from langchain.prompts import PromptTemplate
 from langchain.docstore.document import Document
 
 from src.data_processing.managers.document_manager import DocumentManager
+from src.qa.index_store import LiveIndex, build_vectorstore, compute_index_key, load_or_build_partitions
+from src.qa.chunker import MarkdownChunker
+from src.qa.bm25 import BM25Index
+from src.qa.partitions import PartitionedIndex
+from src.qa.retrieval import HybridRetriever
+from src.qa.embeddings import build_embeddings, embedding_model_id
+from src.qa.settings import load_qa_settings
+from src.qa.answer_cache import SemanticAnswerCache
+from src.qa.condense import CondensePolicy
+from src.qa.context import ContextPacker
+from src.qa.executor import QAExecutor
+from src.qa.qa_service import HawkerGuruQA
 
 logger = logging.getLogger(__name__)
 
-def get_doc_score(doc: Document, query: str) -> float:
-    """Calculate document relevance score."""
-    base_score = 1.0
-    
-    # Prioritize documents based on type
-    doc_type = doc.metadata.get('type', '').lower()
-    type_weights = {
-        'faq': 1.3,  # FAQ gets 30% boost - most direct answers
-        'terms_and_conditions': 1.2,  # T&C gets 20% boost - authoritative source
-        'tender_notice': 1.1,  # Notice gets 10% boost - current information
-        'general': 1.0  # Base weight for other documents
-    }
-    type_weight = type_weights.get(doc_type, 1.0)
-    
-    # Boost recent documents
-    doc_date = doc.metadata.get('date')
-    if doc_date:
-        try:
-            date_obj = datetime.strptime(doc_date, '%b %Y')
-            days_old = (datetime.now() - date_obj).days
-            recency_weight = 1.0 if days_old <= 30 else 0.9
-        except ValueError:
-            recency_weight = 1.0
-    else:
-        recency_weight = 1.0
-    
-    # Apply query-specific boosting
-    query_lower = query.lower()
-    
-    # Boost FAQ for how-to and what-is questions
-    if doc_type == 'faq' and any(term in query_lower for term in 
-        ['how', 'what', 'when', 'where', 'who', 'why', 'can i', 'do i']):
-        base_score *= 1.2
-        
-    # Boost T&C for rule and requirement questions
-    elif doc_type == 'terms_and_conditions' and any(term in query_lower for term in 
-        ['rule', 'requirement', 'must', 'legal', 'condition', 'term']):
-        base_score *= 1.2
-        
-    # Boost Tender Notice for current tender questions
-    elif doc_type == 'tender_notice' and any(term in query_lower for term in 
-        ['current', 'latest', 'tender', 'date', 'deadline']):
-        base_score *= 1.2
-    
-    return base_score * type_weight * recency_weight
+CHUNK_MAX_TOKENS = 400
 
 def get_qa_prompt() -> PromptTemplate:
     """Get the custom prompt template for QA."""
@@ -81,13 +47,23 @@ def get_qa_prompt() -> PromptTemplate:
        - Add context from T&C if needed
        - Note any special conditions
     
-    4. For any answer:
+    4. If the question is about Articles of Sale (AOS):
+       - First give the general rules from the AOS guide
+       - Then mention any restrictions at the user's selected location if relevant
+    
+    5. Do not restrict a general answer to the user's selected location. Only
+       mention the selection if the question is about it or it adds value.
+    
+    6. For any answer:
        - Be clear and concise
        - Cite sources when quoting rules
        - Offer to explain further if needed
     
     Context: {context}
     
+    User's Selection:
+    {system_context}
+    
     Chat History: {chat_history}
     
     Question: {question}
@@ -96,34 +72,54 @@ def get_qa_prompt() -> PromptTemplate:
     
     return PromptTemplate(
         template=template,
-        input_variables=["context", "chat_history", "question"]
+        input_variables=["context", "chat_history", "question"],
+        partial_variables={"system_context": "None"}
     )
 
-def setup_qa_chain(documents: List[Document]) -> ConversationalRetrievalChain:
-    """Setup QA chain with enhanced document prioritization and retrieval."""
+def setup_qa_chain(documents: List[Document],
+                   index_keys: Optional[Dict[str, str]] = None) -> ConversationalRetrievalChain:
+    """Setup QA chain with enhanced document prioritization and retrieval.
+    
+    Args:
+        documents: Documents to index
+        index_keys: Key of the persisted index partition of each document
+            type. When given, saved partitions are reused instead of
+            embedding the documents again.
+    """
     logger.info("Setting up QA chain...")
     
-    # Create embeddings with better parameters
-    embeddings = OpenAIEmbeddings(
-        model="text-embedding-3-small",
-        embedding_ctx_length=8191,  # Maximum context length
-        chunk_size=1000  # Process in larger chunks
-    )
-    
-    # Create vector store with custom scoring
-    vectorstore = FAISS.from_documents(
-        documents,
-        embeddings,
-        relevance_score_fn=get_doc_score
-    )
-    
-    # Configure retriever with better parameters
-    retriever = vectorstore.as_retriever(
-        search_kwargs={
-            "k": 6,  # Retrieve top 6 chunks
-            "score_threshold": 0.7,  # Minimum relevance score
-            "fetch_k": 10  # Fetch more candidates for reranking
+    # Create embeddings from the configured provider
+    settings = load_qa_settings()
+    embedding_config = settings['embeddings']
+    embeddings = build_embeddings(embedding_config)
+    
+    # Create one vector store per document type with the configured index type
+    if index_keys:
+        vectorstores = load_or_build_partitions(
+            documents,
+            embeddings,
+            index_keys,
+            metadata={"embedding_model": embedding_model_id(embedding_config)},
+            index_config=settings['index']
+        )
+    else:
+        by_type = {}
+        for doc in documents:
+            by_type.setdefault(doc.metadata.get('type', 'general'), []).append(doc)
+        vectorstores = {
+            doc_type: build_vectorstore(type_documents, embeddings, settings['index'])
+            for doc_type, type_documents in by_type.items()
         }
+    partitions = PartitionedIndex(vectorstores, embeddings, **settings['partitions'])
+    
+    # Fuse vector search with keyword search for exact-term questions,
+    # then re-rank the candidates by document type and query intent
+    retriever = HybridRetriever(
+        partitions=partitions,
+        keyword_index=BM25Index(documents),
+        k=6,  # Retrieve top 6 chunks
+        fetch_k=20,  # Candidates taken from each search for reranking
+        score_threshold=0.4  # Minimum score relative to the best candidate
     )
     
     # Create QA chain with custom configuration
@@ -143,12 +139,24 @@ def setup_qa_chain(documents: List[Document]) -> ConversationalRetrievalChain:
     return qa_chain
 
 @st.cache_resource
-def setup_hawker_guru() -> ConversationalRetrievalChain:
-    """Setup the Hawker Guru chatbot with document manager integration."""
+def get_document_manager() -> DocumentManager:
+    """Get the process-wide document manager.
+    
+    Updates made through this manager are re-indexed into the live index.
+    """
+    return DocumentManager(Path("data"))
+
+@st.cache_resource
+def setup_hawker_guru() -> HawkerGuruQA:
+    """Setup the Hawker Guru chatbot with document manager integration.
+    
+    The returned object is cached per process, so its answer cache is
+    shared by every session.
+    """
     logger.info("Setting up Hawker Guru...")
     
     # Initialize document manager
-    doc_manager = DocumentManager(Path("data"))
+    doc_manager = get_document_manager()
     
     # Load all current documents
     documents = []
@@ -170,8 +178,65 @@ def setup_hawker_guru() -> ConversationalRetrievalChain:
             except Exception as e:
                 logger.error(f"Error loading {doc_type}: {str(e)}")
     
+    # Split on the headings emitted by the preprocessors
+    chunker = MarkdownChunker(max_tokens=CHUNK_MAX_TOKENS)
+    chunks = chunker.split_documents(documents)
+    logger.info(f"Split {len(documents)} documents into {len(chunks)} chunks")
+    
+    # Key each persisted partition on its document's current contents
+    settings = load_qa_settings()
+    embedding_model = embedding_model_id(settings['embeddings'])
+    index_keys = {
+        doc.metadata['type']: compute_index_key(
+            [doc_manager.get_current_file(doc.metadata['type'])],
+            embedding_model,
+            chunker.params,
+            settings['index']
+        )
+        for doc in documents
+    }
+    
     # Create QA chain
-    qa_chain = setup_qa_chain(documents)
+    qa_chain = setup_qa_chain(chunks, index_keys=index_keys)
+    
+    # Let document updates patch the index instead of forcing a rebuild
+    doc_manager.attach_index(LiveIndex(
+        qa_chain.retriever.partitions,
+        chunker,
+        embedding_model,
+        doc_manager.get_current_file,
+        documents,
+        keyword_index=qa_chain.retriever.keyword_index,
+        index_config=settings['index']
+    ))
+    
+    # Share answers to repeated questions across sessions
+    cache_config = settings['answer_cache']
+    answer_cache = None
+    if cache_config['enabled']:
+        answer_cache = SemanticAnswerCache(
+            qa_chain.retriever.partitions.embeddings,
+            similarity_threshold=cache_config['similarity_threshold'],
+            ttl_seconds=cache_config['ttl_seconds'],
+            max_entries=cache_config['max_entries']
+        )
+    
+    # Only rewrite follow-ups that refer back to earlier turns
+    condense_config = settings['condense']
+    condense_policy = CondensePolicy(
+        qa_chain.question_generator,
+        embeddings=qa_chain.retriever.partitions.embeddings,
+        similarity_threshold=condense_config['similarity_threshold'],
+        max_entries=condense_config['max_entries']
+    )
     
     logger.info("Hawker Guru setup complete!")
-    return qa_chain
\ No newline at end of file
+    return HawkerGuruQA(
+        qa_chain,
+        doc_manager,
+        answer_cache,
+        condense_policy,
+        memory_config=settings['memory'],
+        context_packer=ContextPacker(**settings['context']),
+        executor=QAExecutor(**settings['executor'])
+    )
\ No newline at end of file
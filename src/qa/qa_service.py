@@ -0,0 +1,195 @@
+"""
+Entry point the app uses to ask HawkerGuru questions.
+"""
+
+import logging
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+from langchain.chains import ConversationalRetrievalChain
+from langchain.chains.conversational_retrieval.base import _get_chat_history
+from langchain.docstore.document import Document
+from langchain_core.prompt_values import PromptValue
+
+from src.data_processing.managers.document_manager import DocumentManager
+from src.qa.answer_cache import SemanticAnswerCache, normalize_question
+from src.qa.condense import CondensePolicy
+from src.qa.context import ContextPacker
+from src.qa.executor import QAExecutor
+from src.qa.memory import ConversationMemory
+
+logger = logging.getLogger(__name__)
+
+class HawkerGuruQA:
+    """Answers questions with the conversational retrieval chain's components.
+
+    Runs the same steps as ConversationalRetrievalChain (condense the
+    question, retrieve, stuff the documents into the prompt, call the LLM)
+    so the answer can either be returned whole or streamed token by token.
+    Answers to first-turn questions are shared through an answer cache, and
+    follow-up questions are only rewritten when the condense policy says
+    they depend on the history. LLM calls go through a shared executor, so
+    sessions asking the same question at the same time share one call.
+
+    Accepts the same inputs as the chain's invoke(), plus optional
+    `system_context` (facts about the user's selection, added to the final
+    prompt but not used for retrieval) and `cache_scope` (context the answer
+    depends on, such as the selected hawker centre). `question` should be
+    only the user's own words, since it is what gets condensed and embedded.
+    """
+
+    def __init__(self, chain: ConversationalRetrievalChain, doc_manager: DocumentManager,
+                 answer_cache: Optional[SemanticAnswerCache] = None,
+                 condense_policy: Optional[CondensePolicy] = None,
+                 memory_config: Optional[Dict] = None,
+                 context_packer: Optional[ContextPacker] = None,
+                 executor: Optional[QAExecutor] = None):
+        self.chain = chain
+        self.doc_manager = doc_manager
+        self.answer_cache = answer_cache
+        self.condense_policy = condense_policy or CondensePolicy(chain.question_generator)
+        self.memory_config = memory_config or {}
+        self.context_packer = context_packer or ContextPacker()
+        self.executor = executor or QAExecutor()
+
+    @property
+    def retriever(self):
+        return self.chain.retriever
+
+    @property
+    def llm(self):
+        return self.chain.combine_docs_chain.llm_chain.llm
+
+    def create_memory(self) -> ConversationMemory:
+        """Create the chat history for a new session."""
+        return ConversationMemory(self.llm, **self.memory_config)
+
+    def invoke(self, inputs: Dict) -> Dict:
+        """Answer a question and return the full response."""
+        cached, cache_key = self._lookup(inputs)
+        if cached is not None:
+            return cached
+
+        question, docs, prompt = self._prepare(inputs)
+        answer = self.executor.invoke(
+            self._flight_key(inputs, question, docs),
+            lambda: self._answer_tokens(prompt)
+        )
+
+        response = self._response(inputs, question, answer, docs)
+        self._store(cache_key, response)
+        return response
+
+    def stream(self, inputs: Dict) -> Iterator[Dict]:
+        """Answer a question, yielding tokens as the LLM produces them.
+
+        Yields `{"token": str}` events while the answer is generated, then
+        one final event holding the full response, including
+        `source_documents`.
+        """
+        cached, cache_key = self._lookup(inputs)
+        if cached is not None:
+            yield {"token": cached['answer']}
+            yield cached
+            return
+
+        question, docs, prompt = self._prepare(inputs)
+
+        parts: List[str] = []
+        for token in self.executor.stream(
+            self._flight_key(inputs, question, docs),
+            lambda: self._answer_tokens(prompt)
+        ):
+            parts.append(token)
+            yield {"token": token}
+
+        response = self._response(inputs, question, "".join(parts), docs)
+        self._store(cache_key, response)
+        yield response
+
+    def _prepare(self, inputs: Dict) -> Tuple[str, List[Document], PromptValue]:
+        """Condense the question, retrieve and pack documents, and build the prompt."""
+        question = inputs['question']
+        get_chat_history = self.chain.get_chat_history or _get_chat_history
+        chat_history = inputs.get('chat_history') or []
+        chat_history_str = get_chat_history(chat_history)
+
+        question = self.condense_policy.condense(question, chat_history, chat_history_str)
+
+        docs = self.retriever.invoke(question)
+
+        # Merge and de-duplicate the chunks, then fit them to the context budget
+        combine = self.chain.combine_docs_chain
+        docs, context = self.context_packer.pack(
+            docs,
+            combine.document_prompt,
+            separator=combine.document_separator
+        )
+        variables = {
+            combine.document_variable_name: context,
+            "question": question,
+            "chat_history": chat_history_str
+        }
+        if inputs.get('system_context'):
+            variables["system_context"] = inputs['system_context']
+        prompt = combine.llm_chain.prompt.format_prompt(**variables)
+        return question, docs, prompt
+
+    async def _answer_tokens(self, prompt: PromptValue) -> AsyncIterator[str]:
+        async for chunk in self.llm.astream(prompt):
+            if chunk.content:
+                yield chunk.content
+
+    def _flight_key(self, inputs: Dict, question: str, docs: List[Document]) -> Tuple:
+        """Key under which identical in-flight requests are coalesced.
+
+        The history and system context are part of the key because they
+        are part of the prompt.
+        """
+        get_chat_history = self.chain.get_chat_history or _get_chat_history
+        return (
+            normalize_question(question),
+            tuple(doc.metadata.get('chunk_id', doc.page_content) for doc in docs),
+            get_chat_history(inputs.get('chat_history') or []),
+            inputs.get('system_context', "")
+        )
+
+    def _response(self, inputs: Dict, question: str, answer: str,
+                  docs: List[Document]) -> Dict:
+        """Build a response shaped like the chain's output."""
+        return {
+            "question": inputs['question'],
+            "chat_history": inputs.get('chat_history') or [],
+            "generated_question": question,
+            "answer": answer,
+            "source_documents": docs
+        }
+
+    def _lookup(self, inputs: Dict) -> Tuple[Optional[Dict], Optional[Tuple]]:
+        """Look up a cached answer.
+
+        Only questions without chat history are cached, since follow-ups
+        depend on the earlier turns.
+
+        Returns:
+            The cached response or None, and the key to store a new answer
+            under (None if the question is not cacheable)
+        """
+        if self.answer_cache is None or inputs.get('chat_history'):
+            return None, None
+
+        cache_key = (
+            inputs['question'],
+            inputs.get('cache_scope', ""),
+            self.doc_manager.get_version()
+        )
+        question, scope, version = cache_key
+        cached = self.answer_cache.lookup(question, scope=scope, version=version)
+        if cached is not None:
+            logger.info("Answered from cache")
+        return cached, cache_key
+
+    def _store(self, cache_key: Optional[Tuple], response: Dict) -> None:
+        if cache_key is None:
+            return
+        question, scope, version = cache_key
+        self.answer_cache.store(question, response, scope=scope, version=version)
@@ -0,0 +1,84 @@
+"""
+Retrievers used by the QA chain.
+"""
+
+import logging
+from typing import List
+
+import numpy as np
+
+from langchain.docstore.document import Document
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.retrievers import BaseRetriever
+from pydantic import ConfigDict, Field
+
+from src.qa.bm25 import BM25Index, reciprocal_rank_fusion
+from src.qa.partitions import PartitionedIndex
+from src.qa.reranker import Reranker
+
+logger = logging.getLogger(__name__)
+
+class HybridRetriever(BaseRetriever):
+    """Combines FAISS vector search with BM25 keyword search.
+
+    The vector search takes each document type's quota of candidates from
+    its partition, the keyword search takes fetch_k candidates, and the two
+    rankings are merged with reciprocal rank fusion. The best fetch_k fused candidates are then
+    re-ranked by document type, recency and query intent, and the top k
+    above score_threshold are returned.
+    Keyword hits scoring below keyword_min_ratio of the best hit are
+    dropped, so chunks that only share a common word (e.g. "clause") with
+    the query do not outrank a chunk that matches it exactly. Candidates
+    with equal fused scores are ordered by their keyword rank.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    partitions: PartitionedIndex
+    keyword_index: BM25Index
+    k: int = 6
+    fetch_k: int = 20
+    rrf_k: int = 60
+    keyword_min_ratio: float = 0.5
+    score_threshold: float = 0.4
+    reranker: Reranker = Field(default_factory=Reranker)
+
+    def _get_relevant_documents(self, query: str, *,
+                                run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        """Retrieve the top k chunks for a query."""
+        dense = self.partitions.search(query)
+        dense_docs = {doc.metadata.get('chunk_id', doc.page_content): doc for doc, _ in dense}
+        sparse = self.keyword_index.search(query, k=self.fetch_k)
+        if sparse:
+            cutoff = sparse[0][1] * self.keyword_min_ratio
+            sparse = [(chunk_id, score) for chunk_id, score in sparse if score >= cutoff]
+
+        keyword_ranks = {chunk_id: rank for rank, (chunk_id, _) in enumerate(sparse)}
+        fused = reciprocal_rank_fusion([list(dense_docs), list(keyword_ranks)], k=self.rrf_k)
+        # A chunk found only by the keyword search ties with one found only
+        # by the vector search at the same rank; the keyword match goes first
+        fused.sort(key=lambda item: (-item[1], keyword_ranks.get(item[0], len(keyword_ranks))))
+
+        candidates = []
+        fused_scores = []
+        for chunk_id, score in fused[:self.fetch_k]:
+            doc = dense_docs.get(chunk_id) or self.partitions.search_by_id(chunk_id)
+            if not isinstance(doc, Document):
+                logger.warning(f"Chunk {chunk_id} missing from docstore")
+                continue
+            candidates.append(doc)
+            fused_scores.append(score)
+
+        reranked = self.reranker.rerank(
+            candidates,
+            np.array(fused_scores, dtype=np.float32),
+            query,
+            k=self.k,
+            score_threshold=self.score_threshold
+        )
+
+        # Copy so the stored documents' metadata is left untouched
+        return [
+            Document(page_content=doc.page_content, metadata={**doc.metadata, "score": score})
+            for doc, score in reranked
+        ]
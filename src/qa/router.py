@@ -0,0 +1,321 @@
+"""
+Routes questions that are simple data lookups away from the QA chain.
+
+Questions like "how many cooked food stalls are there at Amoy Street?" or
+"who is the landlord?" are answered straight from the hawker centre data,
+and "can I sell bubble tea at a market slab?" from the Guide to Articles
+of Sale.
+Keyword rules catch the common phrasings and a small nearest-centroid
+classifier over local embeddings catches paraphrases. A lookup is only
+answered directly if the question names a known hawker centre, or if the
+keyword rules and the classifier agree on it, as a question can mention
+stalls or agencies without asking about the selected centre. Everything
+else, and any lookup whose hawker centre or stall type cannot be resolved,
+goes to the retrieval chain.
+"""
+
+from dataclasses import dataclass
+import logging
+import re
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from rapidfuzz import fuzz, process, utils
+
+from src.qa.aos_index import AOSIndex
+from src.qa.embeddings import HashingEmbeddings
+
+logger = logging.getLogger(__name__)
+
+RAG = 'rag'
+STALL_COUNT = 'stall_count'
+LANDLORD = 'landlord'
+ARTICLE_OF_SALE = 'article_of_sale'
+
+INTENT_PATTERNS = {
+    STALL_COUNT: re.compile(
+        r"\b(?:how many|number of|count of)\b.*\b(?:stalls?|slabs?|kiosks?|lock[\s-]*ups?)\b"
+        r"|\bstall count\b",
+        re.IGNORECASE
+    ),
+    LANDLORD: re.compile(
+        r"\blandlord\b|\bwho (?:owns|manages|runs)\b",
+        re.IGNORECASE
+    )
+}
+
+# "Can I sell <item> at ...", answered from the articles of sale
+SELL_PATTERN = re.compile(r"\b(?:sell|selling|sale of)\s+(?P<item>.+)", re.IGNORECASE)
+ITEM_END_PATTERN = re.compile(
+    r"\s+(?:at|in|from|on|as|is|are|allowed|permitted)\b.*$|[?.!]+$", re.IGNORECASE
+)
+MAX_LISTED_ARTICLES = 3
+
+# Questions about the tender rules, which a data lookup cannot answer even
+# when they mention stall counts or landlords
+RULE_PATTERN = re.compile(
+    r"\b(?:bid|bids|bidding|tender\w*|apply|application|allowed|eligible|may i|can i|"
+    r"should i|rent|rental|deposit|fee|fees|costs?|operate|sublet|assign|stallholders?)\b",
+    re.IGNORECASE
+)
+
+# A place named after "at" or "in"; if it is not a known centre, the
+# selected centre must not be assumed
+PLACE_PATTERN = re.compile(
+    r"\b(?:at|in)\s+(?!(?:this|that|the|here|there|my|our|total|each|a|an|it)\b)\w",
+    re.IGNORECASE
+)
+
+# Words shared by many centre names, dropped to get each name's distinctive part
+GENERIC_NAME_WORDS = frozenset("and centre center cooked food hawker market village".split())
+MIN_ALIAS_LENGTH = 5
+
+STALL_TYPE_PATTERNS = [
+    ('COOKED FOOD', re.compile(r"\bcooked[\s-]*food\b", re.IGNORECASE)),
+    ('LOCK-UP', re.compile(r"\block(?:ed)?[\s-]*ups?\b", re.IGNORECASE)),
+    ('MARKET SLAB', re.compile(r"\bmarket[\s-]*slabs?\b|\bwet market\b", re.IGNORECASE)),
+    ('KIOSK', re.compile(r"\bkiosks?\b", re.IGNORECASE))
+]
+
+# Labelled examples for the fallback classifier
+INTENT_EXAMPLES = {
+    STALL_COUNT: [
+        "how many cooked food stalls are there",
+        "number of market stalls at this centre",
+        "how many kiosks does the centre have",
+        "what is the stall count",
+        "count the lock-up stalls",
+        "how big is this hawker centre in stalls",
+        "total stalls at the centre",
+        "how many stalls are in this market"
+    ],
+    LANDLORD: [
+        "who is the landlord",
+        "which agency owns this hawker centre",
+        "who manages the centre",
+        "is it run by nea or hdb",
+        "who runs this food centre",
+        "landlord of the market",
+        "which landlord operates here"
+    ],
+    RAG: [
+        "how do i submit a tender bid",
+        "what is the deposit for a stall",
+        "can i sell halal food",
+        "what are the eligibility requirements",
+        "when does the tender close",
+        "what happens if my bid is successful",
+        "can i sublet my stall",
+        "what documents do i need",
+        "how is the rent decided",
+        "what does clause 19 say"
+    ]
+}
+
+@dataclass
+class Route:
+    """Where a question was routed and, for lookups, its answer."""
+    intent: str
+    confidence: float
+    answer: Optional[str] = None
+    hawker_centre: Optional[str] = None
+    stall_type: Optional[str] = None
+    item: Optional[str] = None
+
+    @property
+    def is_fast_path(self) -> bool:
+        return self.answer is not None
+
+class IntentRouter:
+    """Sends hawker centre data lookups to deterministic answerers.
+
+    The lookups themselves are passed in, so the router does not depend on
+    how the hawker centre data is loaded.
+    """
+
+    def __init__(self, hawker_centres: List[str],
+                 stall_count: Callable[[str, str], int],
+                 landlord: Callable[[str], str],
+                 aliases: Optional[Dict[str, str]] = None,
+                 articles: Optional[AOSIndex] = None,
+                 classifier_threshold: float = 0.3,
+                 match_cutoff: float = 90):
+        """Initialize the router.
+
+        Args:
+            hawker_centres: Names of all hawker centres
+            stall_count: Returns the number of stalls of a type at a centre
+            landlord: Returns the landlord of a centre
+            aliases: Other names of centres, mapped to their names
+            articles: Index of the articles of sale, to answer what can be
+                sold at which stall type
+            classifier_threshold: Minimum similarity to an intent's examples
+                for the classifier to route a question
+            match_cutoff: Minimum fuzzy match score to recognise a centre
+        """
+        self.stall_count = stall_count
+        self.landlord = landlord
+        self.articles = articles
+        self.classifier_threshold = classifier_threshold
+        self.match_cutoff = match_cutoff
+        self.fast_path = 0
+        self.fallbacks = 0
+
+        # A name like "AMOY STREET FOOD CENTRE (TELOK AYER FOOD CENTRE)" is
+        # also matched by "amoy street" or "telok ayer"
+        self._names: Dict[str, str] = {}
+        for name, centre in [(name, name) for name in hawker_centres] + list((aliases or {}).items()):
+            for part in [name] + re.split(r"[()/]", name):
+                words = utils.default_process(part).split()
+                for alias in (" ".join(words),
+                              " ".join(word for word in words if word not in GENERIC_NAME_WORDS)):
+                    if len(alias) >= MIN_ALIAS_LENGTH:
+                        self._names.setdefault(alias, centre)
+
+        # Only aliases sharing a word with the question are fuzzy-matched
+        self._aliases_by_word: Dict[str, List[str]] = {}
+        for alias in self._names:
+            for word in set(alias.split()) - GENERIC_NAME_WORDS:
+                self._aliases_by_word.setdefault(word, []).append(alias)
+
+        self._embeddings = HashingEmbeddings()
+        self._intents = list(INTENT_EXAMPLES)
+        centroids = np.stack([
+            np.mean(self._embeddings.embed_documents(INTENT_EXAMPLES[intent]), axis=0)
+            for intent in self._intents
+        ])
+        self._centroids = centroids / np.linalg.norm(centroids, axis=1, keepdims=True)
+
+    def classify(self, question: str) -> Tuple[str, float]:
+        """Intent of a question and the confidence in it.
+
+        The confidence is 1.0 only for the keyword rules, and for lookups
+        only if the classifier agrees with them; it is otherwise the
+        classifier's similarity to the intent's examples.
+        """
+        if self.articles is not None and SELL_PATTERN.search(question):
+            return ARTICLE_OF_SALE, 1.0
+        if RULE_PATTERN.search(question):
+            return RAG, 1.0
+
+        vector = np.asarray(self._embeddings.embed_query(question), dtype=np.float32)
+        similarities = self._centroids @ vector
+        best = int(np.argmax(similarities))
+        for intent, pattern in INTENT_PATTERNS.items():
+            if pattern.search(question):
+                if self._intents[best] == intent:
+                    return intent, 1.0
+                return intent, float(similarities[self._intents.index(intent)])
+
+        if self._intents[best] == RAG or similarities[best] < self.classifier_threshold:
+            return RAG, float(similarities[best])
+        return self._intents[best], float(similarities[best])
+
+    def find_hawker_centre(self, question: str) -> Optional[str]:
+        """Hawker centre named in a question, if any."""
+        question = utils.default_process(question)
+        candidates = {
+            alias for word in question.split() for alias in self._aliases_by_word.get(word, ())
+        }
+        if not candidates:
+            return None
+        matches = process.extract(
+            question,
+            candidates,
+            scorer=fuzz.partial_ratio,
+            score_cutoff=self.match_cutoff,
+            limit=None
+        )
+        if not matches:
+            return None
+        # "bedok north street 3 blk 511" beats "bedok" when both match fully
+        alias = max(matches, key=lambda match: (match[1], len(match[0])))[0]
+        return self._names[alias]
+
+    @staticmethod
+    def find_stall_type(question: str) -> Optional[str]:
+        """Stall type named in a question, if any."""
+        for stall_type, pattern in STALL_TYPE_PATTERNS:
+            if pattern.search(question):
+                return stall_type
+        return None
+
+    def route(self, question: str, hawker_centre: Optional[str] = None,
+              stall_type: Optional[str] = None) -> Route:
+        """Route a question, answering it directly if it is a lookup.
+
+        Args:
+            question: The user's question
+            hawker_centre: Centre selected in the app, used when the
+                question does not name one
+            stall_type: Stall type selected in the app, used when the
+                question does not name one
+        """
+        intent, confidence = self.classify(question)
+        route = Route(intent, confidence)
+        if intent == ARTICLE_OF_SALE:
+            item = SELL_PATTERN.search(question).group('item')
+            route.item = ITEM_END_PATTERN.sub("", item).strip()
+            route.stall_type = self.find_stall_type(question) or stall_type
+            route.answer = self._answer_article(route)
+        elif intent != RAG:
+            named_centre = self.find_hawker_centre(question)
+            if named_centre is None and (confidence < 1.0 or PLACE_PATTERN.search(question)):
+                # Not sure enough that the question is about the selected
+                # centre, or it names a place that is not a known centre
+                hawker_centre = None
+            route.hawker_centre = named_centre or hawker_centre
+            route.stall_type = self.find_stall_type(question) or stall_type
+            try:
+                route.answer = self._answer(route)
+            except Exception as e:
+                logger.error(f"Error answering {intent} lookup: {str(e)}")
+
+        if route.is_fast_path:
+            self.fast_path += 1
+        else:
+            self.fallbacks += 1
+        return route
+
+    def _answer_article(self, route: Route) -> Optional[str]:
+        matches = self.articles.best_matches(route.item) if route.item else []
+        if not matches:
+            return None
+
+        lines = [f'Articles of sale in the Guide to Articles of Sale matching "{route.item}":']
+        for match in matches[:MAX_LISTED_ARTICLES]:
+            article = match.article
+            stall_types = ", ".join(stall_type.lower() for stall_type in article.stall_types)
+            lines.append(f"- **{article.article}** ({article.category}; {stall_types} stalls): "
+                         f"{article.remarks}")
+
+        # Kiosks, for one, are not covered by the guide
+        if route.stall_type in self.articles.stall_types:
+            allowed = sorted({
+                stall_type for match in matches for stall_type in match.article.stall_types
+            })
+            if route.stall_type in allowed:
+                lines.append(f"\nIt can be sold at {route.stall_type.lower()} stalls.")
+            else:
+                lines.append(
+                    f"\nIt is not an article of sale for {route.stall_type.lower()} stalls; "
+                    f"it can be sold at {', '.join(t.lower() for t in allowed)} stalls."
+                )
+        return "\n".join(lines)
+
+    def _answer(self, route: Route) -> Optional[str]:
+        centre = route.hawker_centre
+        if centre is None:
+            return None
+
+        if route.intent == LANDLORD:
+            return f"The landlord of {centre} is {self.landlord(centre)}."
+
+        if route.intent == STALL_COUNT and route.stall_type:
+            count = self.stall_count(centre, route.stall_type)
+            stall_type = route.stall_type.lower()
+            if count == 0:
+                return f"{centre} has no {stall_type} stalls."
+            return f"{centre} has {count} {stall_type} stall{'s' if count != 1 else ''}."
+
+        return None
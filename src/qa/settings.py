@@ -0,0 +1,101 @@
+"""
+Settings for the QA pipeline, read from the `qa` section of
+config/document_config.yaml.
+"""
+
+import copy
+import logging
+import os
+from pathlib import Path
+from typing import Dict
+
+import yaml
+
+logger = logging.getLogger(__name__)
+
+CONFIG_FILE = Path("config") / "document_config.yaml"
+
+DEFAULT_SETTINGS = {
+    'embeddings': {
+        'provider': 'openai',
+        'model': 'text-embedding-3-small',
+        'dimensions': None,
+        'cache': True,
+        'query_cache_size': 1024,
+        'query_cache_disk': True
+    },
+    'index': {
+        'type': 'flat',
+        'hnsw_m': 32,
+        'ef_construction': 80,
+        'ef_search': 64,
+        'nlist': None,
+        'pq_m': 64,
+        'nprobe': 8
+    },
+    'partitions': {
+        'quotas': {
+            'faq': 6,
+            'terms_and_conditions': 8,
+            'tender_notice': 6,
+            'article_of_sale': 4
+        },
+        'default_quota': 6,
+        'max_workers': 4
+    },
+    'answer_cache': {
+        'enabled': True,
+        'similarity_threshold': 0.95,
+        'ttl_seconds': 3600,
+        'max_entries': 512
+    },
+    'condense': {
+        'similarity_threshold': 0.5,
+        'max_entries': 256
+    },
+    'memory': {
+        'max_tokens': 1500,
+        'recent_turns': 4,
+        'summary_max_tokens': 300
+    },
+    'context': {
+        'max_tokens': 3000,
+        'duplicate_threshold': 0.85
+    },
+    'executor': {
+        'max_concurrency': 4
+    }
+}
+
+# Environment variables that override individual settings, e.g. to build
+# with the local embedding provider in CI
+ENV_OVERRIDES = {
+    'HAWKERGURU_EMBEDDING_PROVIDER': ('embeddings', 'provider')
+}
+
+def _merge(base: Dict, override: Dict) -> Dict:
+    """Recursively merge override into a copy of base."""
+    result = copy.deepcopy(base)
+    for key, value in (override or {}).items():
+        if isinstance(value, dict) and isinstance(result.get(key), dict):
+            result[key] = _merge(result[key], value)
+        else:
+            result[key] = value
+    return result
+
+def load_qa_settings(config_file: Path = CONFIG_FILE) -> Dict:
+    """Load QA settings, filling in defaults for anything not configured."""
+    try:
+        with open(config_file, 'r') as f:
+            config = yaml.safe_load(f) or {}
+    except Exception as e:
+        logger.error(f"Error loading QA settings from {config_file}: {str(e)}")
+        config = {}
+
+    settings = _merge(DEFAULT_SETTINGS, config.get('qa'))
+
+    for env_var, (section, key) in ENV_OVERRIDES.items():
+        if os.getenv(env_var):
+            settings[section][key] = os.getenv(env_var)
+
+    return settings
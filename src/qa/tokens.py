@@ -0,0 +1,44 @@
+"""
+Token counting helpers shared by the QA components.
+"""
+
+from functools import lru_cache
+import logging
+from typing import List
+
+import tiktoken
+
+logger = logging.getLogger(__name__)
+
+ENCODING_NAME = "cl100k_base"  # Encoding of the text-embedding-3 models
+CHARS_PER_TOKEN = 4  # Rough ratio used when the encoding cannot be loaded
+
+@lru_cache(maxsize=None)
+def get_encoding(encoding_name: str = ENCODING_NAME):
+    """Load a tiktoken encoding, or return None if it is unavailable.
+
+    tiktoken downloads encodings on first use, which fails on machines
+    without network access and without a TIKTOKEN_CACHE_DIR.
+    """
+    try:
+        return tiktoken.get_encoding(encoding_name)
+    except Exception as e:
+        logger.warning(f"Could not load tiktoken encoding {encoding_name}, "
+                       f"falling back to approximate counts: {str(e)}")
+        return None
+
+def count_tokens(text: str) -> int:
+    """Count the tokens in a piece of text."""
+    encoding = get_encoding()
+    if encoding is None:
+        return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+    return len(encoding.encode(text, disallowed_special=()))
+
+def split_tokens(text: str, max_tokens: int) -> List[str]:
+    """Split text into pieces of at most max_tokens tokens each."""
+    encoding = get_encoding()
+    if encoding is None:
+        step = max_tokens * CHARS_PER_TOKEN
+        return [text[i:i + step] for i in range(0, len(text), step)]
+    ids = encoding.encode(text, disallowed_special=())
+    return [encoding.decode(ids[i:i + max_tokens]) for i in range(0, len(ids), max_tokens)]
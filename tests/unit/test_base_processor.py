@@ -0,0 +1,88 @@
+from langchain.docstore.document import Document
+
+from src.data_processing.processors import BasePreprocessor, base_processor
+from src.qa.embedding_cache import CACHE_DIR
+from src.qa.embeddings import build_embeddings
+
+def test_vector_store_uses_the_configured_embedding_provider(tmp_path, monkeypatch):
+    (tmp_path / "config").mkdir()
+    (tmp_path / "config" / "document_config.yaml").write_text(
+        "qa:\n  embeddings:\n    provider: local\n    dimensions: 64\n", encoding='utf-8'
+    )
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv("HAWKERGURU_EMBEDDING_PROVIDER", raising=False)
+    configs = []
+
+    def recording_build_embeddings(config, *args, **kwargs):
+        configs.append(config)
+        return build_embeddings(config, *args, **kwargs)
+
+    monkeypatch.setattr(base_processor, "build_embeddings", recording_build_embeddings)
+    base_processor.create_vector_store.clear()
+
+    vectorstore = base_processor.create_vector_store(
+        [Document(page_content="A tender deposit of $500 is payable for each stall.")]
+    )
+
+    assert [config['provider'] for config in configs] == ["local"]
+    assert vectorstore.index.d == 64
+
+def test_vector_store_shares_the_qa_chain_embedding_cache(monkeypatch):
+    cache_dirs = []
+
+    def recording_build_embeddings(config, cache_dir=CACHE_DIR):
+        cache_dirs.append(cache_dir)
+        return build_embeddings({**config, 'provider': 'local', 'dimensions': 64}, cache_dir)
+
+    monkeypatch.setattr(base_processor, "build_embeddings", recording_build_embeddings)
+    base_processor.create_vector_store.clear()
+
+    base_processor.create_vector_store([Document(page_content="Stallholders must operate their stalls.")])
+
+    assert cache_dirs == [CACHE_DIR]
+
+MARKDOWN = """# TENDER NOTICE
+## Cooked Food Stall Rentals
+Cooked food stalls are let by tender.
+### Trade Type Selection Requirements
+Please choose only ONE type of trade.
+## Market Stall Rentals
+No roller shutter."""
+
+class MarkdownPreprocessor(BasePreprocessor):
+    """Preprocessor whose input is already processed markdown."""
+
+    def process(self) -> str:
+        self.processed_text = self.raw_text
+        return self.processed_text
+
+def test_section_content_includes_subsections_up_to_the_next_section():
+    preprocessor = MarkdownPreprocessor(MARKDOWN)
+
+    assert preprocessor.get_section_content("Cooked Food Stall Rentals") == (
+        "## Cooked Food Stall Rentals\n"
+        "Cooked food stalls are let by tender.\n"
+        "### Trade Type Selection Requirements\n"
+        "Please choose only ONE type of trade.\n"
+    )
+    assert preprocessor.get_section_content("Market Stall Rentals") == (
+        "## Market Stall Rentals\nNo roller shutter."
+    )
+    assert preprocessor.get_section_content("Cooked Food") == ""
+
+def test_iter_sections_yields_bodies_of_a_level_in_order():
+    preprocessor = MarkdownPreprocessor(MARKDOWN)
+
+    sections = [(span.title, body) for span, body in preprocessor.iter_sections(level=2)]
+
+    assert [title for title, _ in sections] == ["Cooked Food Stall Rentals", "Market Stall Rentals"]
+    assert sections[1][1] == "No roller shutter."
+
+def test_section_index_follows_reprocessed_text():
+    preprocessor = MarkdownPreprocessor(MARKDOWN)
+    preprocessor.get_section_content("Market Stall Rentals")
+
+    preprocessor.raw_text = MARKDOWN.replace("No roller shutter.", "With roller shutter.")
+    preprocessor.process()
+
+    assert preprocessor.get_section_content("Market Stall Rentals").endswith("With roller shutter.")
@@ -0,0 +1,35 @@
+from langchain.docstore.document import Document
+from langchain_community.docstore.in_memory import InMemoryDocstore
+
+from src.qa.chunk_store import ChunkStore, write_chunk_store
+
+def make_store(tmp_path, ids):
+    docstore = InMemoryDocstore({
+        chunk_id: Document(page_content=f"text of {chunk_id}") for chunk_id in ids
+    })
+    write_chunk_store(tmp_path, docstore, ids)
+    return ChunkStore(tmp_path)
+
+def test_repeated_updates_of_a_chunk_on_disk(tmp_path):
+    store = make_store(tmp_path, ["faq:0", "faq:1"])
+
+    for version in range(2):
+        store.delete(["faq:0"])
+        assert "faq:0" not in store
+        store.add({"faq:0": Document(page_content=f"version {version}")})
+        assert store.search("faq:0").page_content == f"version {version}"
+
+    store.delete(["faq:0"])
+    assert "faq:0" not in store
+    assert isinstance(store.search("faq:0"), str)
+    assert list(store.ids()) == ["faq:1"]
+    assert len(store) == 1
+
+def test_len_counts_a_replaced_chunk_once(tmp_path):
+    store = make_store(tmp_path, ["faq:0", "faq:1"])
+
+    store.delete(["faq:0"])
+    store.add({"faq:0": Document(page_content="new")})
+
+    assert len(store) == 2
+    assert sorted(store.ids()) == ["faq:0", "faq:1"]
@@ -0,0 +1,47 @@
+from langchain.docstore.document import Document
+
+from src.qa.chunker import MarkdownChunker, diff_chunks
+
+FAQ = """## Eligibility
+
+### Who can tender?
+Tenderers must be Singapore Citizens or Permanent Residents aged 21 and above.
+
+### How much is the deposit?
+A tender deposit of $500 is payable for each stall tendered.
+"""
+
+def chunk(text):
+    chunker = MarkdownChunker(max_tokens=200, min_tokens=1)
+    return chunker.split_documents([Document(page_content=text, metadata={"type": "faq"})])
+
+def test_chunk_ids_stay_the_same_while_the_headings_do():
+    old_chunks = chunk(FAQ)
+    new_chunks = chunk(FAQ.replace("$500", "$600"))
+
+    assert [doc.metadata["chunk_id"] for doc in old_chunks] == [
+        doc.metadata["chunk_id"] for doc in new_chunks
+    ]
+    assert old_chunks[0].metadata["content_hash"] == new_chunks[0].metadata["content_hash"]
+    assert old_chunks[1].metadata["content_hash"] != new_chunks[1].metadata["content_hash"]
+
+def test_diff_finds_added_changed_and_removed_chunks():
+    old_chunks = chunk(FAQ)
+    new_content = FAQ.replace("$500", "$600").replace(
+        "### Who can tender?\nTenderers must be Singapore Citizens or Permanent Residents "
+        "aged 21 and above.\n",
+        "### When does the tender close?\nThe tender closes on the 26th of every month.\n"
+    )
+
+    diff = diff_chunks(old_chunks, chunk(new_content))
+
+    assert [doc.metadata["section"] for doc in diff.added] == ["When does the tender close?"]
+    assert [doc.metadata["section"] for doc in diff.changed] == ["How much is the deposit?"]
+    assert diff.removed == [old_chunks[0].metadata["chunk_id"]]
+    assert diff.unchanged == 0
+
+def test_diff_of_an_unchanged_document_is_empty():
+    diff = diff_chunks(chunk(FAQ), chunk(FAQ))
+
+    assert diff.is_empty
+    assert diff.unchanged == 2
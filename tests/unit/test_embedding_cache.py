@@ -0,0 +1,51 @@
+import numpy as np
+
+from src.qa.embedding_cache import EmbeddingCache
+
+def vector(value):
+    return [float(value)] * 4
+
+def test_processes_sharing_the_files_keep_each_others_vectors(tmp_path):
+    first = EmbeddingCache("test", 4, tmp_path)
+    second = EmbeddingCache("test", 4, tmp_path)
+
+    first.put_many(["a"], [vector(1)])
+    second.put_many(["b"], [vector(2)])
+    first.put_many(["c"], [vector(3)])
+
+    for cache in (first, second, EmbeddingCache("test", 4, tmp_path)):
+        found = cache.get_many(["a", "b", "c"])
+        assert [v.tolist() for v in found] == [vector(1), vector(2), vector(3)]
+
+def test_row_taken_over_by_another_process_is_a_miss(tmp_path):
+    # Room for two vectors, so the third evicts the oldest
+    first = EmbeddingCache("test", 4, tmp_path, max_bytes=2 * 4 * 4)
+    first.put_many(["a", "b"], [vector(1), vector(2)])
+    second = EmbeddingCache("test", 4, tmp_path, max_bytes=2 * 4 * 4)
+
+    second.put_many(["c"], [vector(3)])
+
+    found = first.get_many(["a", "b", "c"])
+    assert found[0] is None
+    assert [v.tolist() for v in found[1:]] == [vector(2), vector(3)]
+
+def test_least_recently_used_entry_is_evicted(tmp_path):
+    cache = EmbeddingCache("test", 4, tmp_path, max_bytes=2 * 4 * 4)
+    cache.put_many(["a", "b"], [vector(1), vector(2)])
+    cache.get_many(["a"])
+
+    cache.put_many(["c"], [vector(3)])
+
+    found = cache.get_many(["a", "b", "c"])
+    assert found[1] is None
+    assert np.array_equal(found[0], vector(1))
+    assert len(cache) == 2
+
+def test_recency_index_is_written_in_batches(tmp_path):
+    cache = EmbeddingCache("test", 4, tmp_path)
+    cache.put_many(["a"], [vector(1)])
+    assert not cache.index_path.exists()
+
+    cache.flush()
+    assert cache.index_path.exists()
+    assert len(EmbeddingCache("test", 4, tmp_path)) == 1
@@ -0,0 +1,132 @@
+from langchain.docstore.document import Document
+
+from src.qa.chunker import MarkdownChunker
+from src.qa.embeddings import HashingEmbeddings
+from src.qa.index_store import LiveIndex, build_vectorstore, compute_index_key, load_index, save_index
+from src.qa.partitions import PartitionedIndex
+
+TEXTS = [
+    "Tenderers must be Singapore Citizens or Permanent Residents.",
+    "A tender deposit of $500 is payable for each stall.",
+    "Stallholders must operate their stalls personally.",
+    "Cooked food stalls may not sell cut fruits at some centres."
+]
+
+def make_documents(texts=TEXTS):
+    return [
+        Document(page_content=text, metadata={"chunk_id": f"faq:{position}", "type": "faq"})
+        for position, text in enumerate(texts)
+    ]
+
+def test_saved_flat_index_searches_like_the_original(tmp_path, capfd):
+    embeddings = HashingEmbeddings(dimensions=64)
+    vectorstore = build_vectorstore(make_documents(), embeddings)
+
+    save_index(vectorstore, "key", tmp_path)
+    loaded = load_index("key", embeddings, tmp_path)
+
+    assert "centroids" not in capfd.readouterr().err
+    for text in TEXTS:
+        expected = vectorstore.similarity_search(text, k=2)
+        found = loaded.similarity_search(text, k=2)
+        assert [doc.page_content for doc in found] == [doc.page_content for doc in expected]
+
+FAQ = """## Eligibility
+
+### Who can tender?
+Tenderers must be Singapore Citizens or Permanent Residents aged 21 and above.
+
+### How much is the deposit?
+A tender deposit of $500 is payable for each stall tendered.
+"""
+
+def make_live_index(tmp_path, embeddings):
+    chunker = MarkdownChunker(max_tokens=200, min_tokens=1)
+    documents = [Document(page_content=FAQ, metadata={"source": "faq", "type": "faq"})]
+    source = tmp_path / "faq.txt"
+    source.write_text(FAQ, encoding='utf-8')
+    index_dir = tmp_path / "index"
+
+    vectorstore = build_vectorstore(chunker.split_documents(documents), embeddings)
+    save_index(vectorstore, "key", index_dir / "faq")
+    partitions = PartitionedIndex({"faq": load_index("key", embeddings, index_dir / "faq")}, embeddings)
+    live = LiveIndex(partitions, chunker, embeddings.model_name, lambda doc_type: source,
+                     documents, index_dir)
+    return live, partitions
+
+def test_repeated_updates_of_the_same_chunk(tmp_path):
+    embeddings = HashingEmbeddings(dimensions=64)
+    live, partitions = make_live_index(tmp_path, embeddings)
+
+    content = FAQ
+    for amount in ("$600", "$700"):
+        new_content = content.replace(content.split("deposit of ")[1].split(" ")[0], amount)
+        live.update_document("faq", content, new_content)
+        content = new_content
+
+        vectorstore = partitions.partitions["faq"]
+        assert vectorstore.index.ntotal == len(vectorstore.index_to_docstore_id)
+        found = partitions.search("deposit for each stall", k=1)[0][0]
+        assert amount in found.page_content
+
+def test_update_leaves_the_partition_being_searched_intact(tmp_path):
+    embeddings = HashingEmbeddings(dimensions=64)
+    live, partitions = make_live_index(tmp_path, embeddings)
+    before = partitions.partitions["faq"]
+    mapping = dict(before.index_to_docstore_id)
+
+    live.update_document("faq", FAQ, FAQ.replace("$500", "$600").replace("21", "18"))
+
+    assert partitions.partitions["faq"] is not before
+    assert before.index_to_docstore_id == mapping
+    assert before.index.ntotal == len(mapping)
+    found = before.similarity_search("deposit for each stall", k=1)[0]
+    assert "$500" in found.page_content
+
+class CountingEmbeddings(HashingEmbeddings):
+    """Local embeddings that record the texts they embed."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.embedded = []
+
+    def embed_documents(self, texts):
+        self.embedded.extend(texts)
+        return super().embed_documents(texts)
+
+def test_update_of_a_reopened_partition_embeds_only_the_changed_chunk(tmp_path):
+    embeddings = CountingEmbeddings(dimensions=64)
+    live, partitions = make_live_index(tmp_path, embeddings)
+    embeddings.embedded.clear()
+
+    live.update_document("faq", FAQ, FAQ.replace("$500", "$600"))
+
+    assert len(embeddings.embedded) == 1
+    assert "$600" in embeddings.embedded[0]
+    found = partitions.search("deposit for each stall", k=1)[0][0]
+    assert "$600" in found.page_content
+
+def test_update_adds_and_removes_sections_and_saves_under_the_new_key(tmp_path):
+    embeddings = CountingEmbeddings(dimensions=64)
+    live, partitions = make_live_index(tmp_path, embeddings)
+    new_content = FAQ.replace(
+        "### Who can tender?\nTenderers must be Singapore Citizens or Permanent Residents "
+        "aged 21 and above.\n",
+        "### When does the tender close?\nThe tender closes on the 26th of every month.\n"
+    )
+    source = tmp_path / "faq.txt"
+    source.write_text(new_content, encoding='utf-8')
+    embeddings.embedded.clear()
+
+    diff = live.update_document("faq", FAQ, new_content)
+
+    assert (len(diff.added), len(diff.changed), len(diff.removed), diff.unchanged) == (1, 0, 1, 1)
+    assert len(embeddings.embedded) == 1
+    vectorstore = partitions.partitions["faq"]
+    assert vectorstore.index.ntotal == len(vectorstore.index_to_docstore_id) == 2
+    assert not isinstance(partitions.search_by_id(diff.removed[0]), Document)
+    assert "26th" in partitions.search("when does the tender close", k=1)[0][0].page_content
+
+    index_key = compute_index_key([source], embeddings.model_name, live.chunker.params)
+    saved = load_index(index_key, embeddings, tmp_path / "index" / "faq")
+    assert sorted(saved.index_to_docstore_id.values()) == sorted(vectorstore.index_to_docstore_id.values())
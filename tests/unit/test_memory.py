@@ -0,0 +1,25 @@
+from src.qa.memory import ConversationMemory
+from src.qa.tokens import count_tokens
+
+def test_oversized_question_leaves_room_for_the_answer():
+    memory = ConversationMemory(max_tokens=400, summary_max_tokens=100)
+    question = "Please read this pasted tender notice. " * 200
+    answer = "The deposit is $500 for each stall. " * 50
+
+    memory.add_turn(question, answer)
+
+    turn = memory.turns[0]
+    assert count_tokens(turn.question) <= 150
+    assert turn.answer.startswith("The deposit is $500")
+    assert turn.tokens <= 300
+    assert memory.tokens <= memory.max_tokens
+
+def test_short_answer_leaves_the_rest_to_the_question():
+    memory = ConversationMemory(max_tokens=400, summary_max_tokens=100)
+    question = "Please read this pasted tender notice. " * 200
+
+    memory.add_turn(question, "Yes.")
+
+    turn = memory.turns[0]
+    assert turn.answer == "Yes."
+    assert 150 < count_tokens(turn.question) <= 300 - count_tokens("Yes.")
@@ -0,0 +1,48 @@
+from langchain.docstore.document import Document
+
+from src.qa.bm25 import BM25Index
+from src.qa.embeddings import HashingEmbeddings
+from src.qa.index_store import build_vectorstore
+from src.qa.partitions import PartitionedIndex
+from src.qa.retrieval import HybridRetriever
+
+CLAUSES = {
+    "terms:7": "Clause 7: The stallholder shall operate the stall personally.",
+    "terms:19": "Clause 19: The tender deposit is forfeited if the tenderer withdraws the bid.",
+    "terms:41": "Clause 41: Any clause of these conditions may be amended by NEA; "
+                "each clause binds the stallholder."
+}
+
+def make_retriever(default_quota=6):
+    documents = [
+        Document(page_content=text, metadata={"chunk_id": chunk_id, "type": "terms_and_conditions"})
+        for chunk_id, text in CLAUSES.items()
+    ]
+    embeddings = HashingEmbeddings(dimensions=256)
+    partitions = PartitionedIndex(
+        {"terms_and_conditions": build_vectorstore(documents, embeddings)},
+        embeddings,
+        default_quota=default_quota
+    )
+    return HybridRetriever(partitions=partitions, keyword_index=BM25Index(documents))
+
+def test_exact_clause_number_query_returns_that_clause_first():
+    # With one vector candidate, the vector search's "Clause 41" and the
+    # keyword search's "Clause 19" get the same fused score
+    retriever = make_retriever(default_quota=1)
+
+    found = retriever.invoke("Clause 19")
+
+    assert found[0].metadata["chunk_id"] == "terms:19"
+
+def test_results_are_scored_copies_of_the_best_chunks():
+    retriever = make_retriever()
+
+    found = retriever.invoke("is the deposit forfeited if I withdraw my bid?")
+
+    assert found[0].metadata["chunk_id"] == "terms:19"
+    assert len(found) <= retriever.k
+    scores = [doc.metadata["score"] for doc in found]
+    assert scores == sorted(scores, reverse=True)
+    stored = retriever.partitions.search_by_id("terms:19")
+    assert "score" not in stored.metadata
@@ -0,0 +1,104 @@
+import pytest
+
+from src.qa.aos_index import AOSIndex
+from src.qa.router import ARTICLE_OF_SALE, LANDLORD, STALL_COUNT, IntentRouter
+
+CENTRES = ["AMOY STREET FOOD CENTRE (TELOK AYER FOOD CENTRE)", "NEWTON FOOD CENTRE"]
+
+ARTICLES = [
+    {
+        "Stall Type": "Market Slab",
+        "Trade Type Category": "Market Produce I",
+        "Article of Sale": "Pork",
+        "Remarks": "Means exclusively pork. Sale of other types of meat together with pork is not allowed."
+    },
+    {
+        "Stall Type": "Lock-Up, Market Slab",
+        "Trade Type Category": "Piece & sundry",
+        "Article of Sale": "Piece & sundry goods",
+        "Remarks": "Includes kitchen ware, hardware, textiles, toiletries and clothing."
+    }
+]
+
+STALL_COUNTS = {"COOKED FOOD": 12, "LOCK-UP": 1, "KIOSK": 0}
+
+def make_router():
+    return IntentRouter(CENTRES, lambda centre, stall_type: STALL_COUNTS[stall_type],
+                        lambda centre: "NEA", articles=AOSIndex(ARTICLES))
+
+@pytest.mark.parametrize("question", [
+    "What is the total cost of running a stall?",
+    "How many stalls can a tenderer operate?",
+    "how many stalls did the previous stallholder own?",
+    "Which agency handles table-cleaning charges?",
+    "which agency do I contact for appeals?",
+    "Is the market run by a hawkers association?"
+])
+def test_questions_about_the_rules_go_to_the_chain(question):
+    route = make_router().route(question, "NEWTON FOOD CENTRE", "COOKED FOOD")
+
+    assert not route.is_fast_path
+
+@pytest.mark.parametrize("question, intent, answer", [
+    ("how many cooked food stalls are there?", STALL_COUNT,
+     "NEWTON FOOD CENTRE has 12 cooked food stalls."),
+    ("who is the landlord?", LANDLORD, "The landlord of NEWTON FOOD CENTRE is NEA."),
+    ("which agency owns amoy street food centre?", LANDLORD,
+     "The landlord of AMOY STREET FOOD CENTRE (TELOK AYER FOOD CENTRE) is NEA.")
+])
+def test_lookups_are_answered_directly(question, intent, answer):
+    route = make_router().route(question, "NEWTON FOOD CENTRE", "COOKED FOOD")
+
+    assert route.intent == intent
+    assert route.answer == answer
+
+def test_paraphrase_is_answered_only_for_a_named_centre():
+    router = make_router()
+
+    selected = router.route("how big is this hawker centre in cooked food stalls?",
+                            "NEWTON FOOD CENTRE", "COOKED FOOD")
+    named = router.route("how big is amoy street food centre in cooked food stalls?",
+                         "NEWTON FOOD CENTRE", "COOKED FOOD")
+
+    assert selected.intent == STALL_COUNT and not selected.is_fast_path
+    assert named.answer == "AMOY STREET FOOD CENTRE (TELOK AYER FOOD CENTRE) has 12 cooked food stalls."
+
+@pytest.mark.parametrize("question, answer", [
+    ("how many lock-up stalls does amoy street have?",
+     "AMOY STREET FOOD CENTRE (TELOK AYER FOOD CENTRE) has 1 lock-up stall."),
+    ("how many kiosks are there at Newton?", "NEWTON FOOD CENTRE has no kiosk stalls.")
+])
+def test_stall_count_uses_the_named_centre_and_stall_type(question, answer):
+    route = make_router().route(question, "NEWTON FOOD CENTRE", "COOKED FOOD")
+
+    assert route.answer == answer
+
+@pytest.mark.parametrize("question, stall_type", [
+    ("how many cooked food stalls are there at Jurong?", "COOKED FOOD"),
+    ("how many stalls are there?", None)
+])
+def test_lookup_that_cannot_be_resolved_goes_to_the_chain(question, stall_type):
+    router = make_router()
+
+    route = router.route(question, "NEWTON FOOD CENTRE", stall_type)
+
+    assert route.intent == STALL_COUNT and not route.is_fast_path
+    assert (router.fast_path, router.fallbacks) == (0, 1)
+
+def test_article_of_sale_is_answered_for_the_stall_type():
+    router = make_router()
+
+    allowed = router.route("Can I sell pork at a market slab?")
+    not_allowed = router.route("can I sell pork at a lock-up?")
+
+    assert allowed.intent == ARTICLE_OF_SALE and allowed.item == "pork"
+    assert "**Pork** (Market Produce I; market slab stalls)" in allowed.answer
+    assert allowed.answer.endswith("It can be sold at market slab stalls.")
+    assert not_allowed.answer.endswith(
+        "It is not an article of sale for lock-up stalls; it can be sold at market slab stalls."
+    )
+
+def test_item_not_in_the_guide_goes_to_the_chain():
+    route = make_router().route("can I sell my stall?")
+
+    assert route.intent == ARTICLE_OF_SALE and not route.is_fast_path
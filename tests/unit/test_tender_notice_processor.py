@@ -0,0 +1,99 @@
+from src.data_processing.processors.tender_notice_processor import TenderNoticePreprocessor
+
+FULL_NOTICE = """TENDER NOTICE
+[Opening on 13 of every month at 10.30 am]
+[Closing on 26 of every month at 10.30 am]
+
+[Important Notes]:
+All stalls which received single or multiple bids will be awarded.
+
+Tenders for Rental of [Cooked Food] Stalls
+
+* Please choose only [ONE] type of trade of sale.
+
++ For Halal Cooked Food only.
+Non-Muslim stallholders must obtain Halal Certification.
+
++^ For Indian Cuisine or Halal Cooked Food only.
+
+Tenders for Rental of [Market] Stalls
+
+** No roller shutter.
+
+[Details of Tender]:
+Eligibility Criteria: Tenderers must be Singapore Citizens or Permanent Residents.
+Tender bids shall be submitted through E-Tender.
+"""
+
+NOTICE = """TENDER NOTICE
+
+Tenders for Rental of [Cooked Food] Stalls
+
+*** Not for sale of "Drinks" at Chomp Chomp Food Centre.
+
+**** Not for sale of "Zhi Char" and "Drinks" at Newton Food Centre.
+
+Note 1:
+The sale of solely alcohol is not allowed at drink stalls.
+
+Please note that stall #01-39 at Blk 117 Aljunied Avenue 2 is not equipped with an exhaust hood.
+
+Tenders for Rental of [Market] Stalls
+"""
+
+def heading_above(lines, text):
+    position = next(i for i, line in enumerate(lines) if line.startswith(text))
+    return next(line for line in reversed(lines[:position]) if line.startswith("#"))
+
+def test_text_after_a_subsection_is_not_rendered_under_it():
+    lines = TenderNoticePreprocessor(NOTICE).process().splitlines()
+
+    assert heading_above(lines, "Note 1:") == "### Notes"
+    assert heading_above(lines, "Please note that stall #01-39") == "### Notes"
+    assert heading_above(lines, '> Note (SPECIAL_NOTE_4)') == "#### Restrictions for Newton Food Centre"
+    assert lines.index("### Notes") > lines.index("### Location-Specific Restrictions")
+    assert lines.index("### Notes") < lines.index("## Market Stall Rentals")
+
+def test_notice_is_rendered_as_a_heading_tree():
+    preprocessor = TenderNoticePreprocessor(FULL_NOTICE)
+
+    assert preprocessor.process().splitlines() == [
+        "# TENDER NOTICE",
+        "## Tender Dates",
+        "### Opening",
+        "13 of every month at 10.30 am",
+        "### Closing",
+        "26 of every month at 10.30 am",
+        "## Important Notes",
+        "All stalls which received single or multiple bids will be awarded.",
+        "## Cooked Food Stall Rentals",
+        "### Trade Type Selection Requirements",
+        "> Note (SPECIAL_NOTE_1): Please choose only ONE type of trade of sale.",
+        "### Notes",
+        "> Note (HALAL_NOTE): For Halal Cooked Food only. "
+        "Non-Muslim stallholders must obtain Halal Certification.",
+        "> Note (HALAL_OR_INDIAN_CUISINE_NOTE): For Indian Cuisine or Halal Cooked Food only.",
+        "## Market Stall Rentals",
+        "> Note (SPECIAL_NOTE_2): No roller shutter.",
+        "## Tender Details",
+        "### Eligibility Requirements",
+        "Tenderers must be Singapore Citizens or Permanent Residents.",
+        "### Submission Requirements",
+        "Tender bids shall be submitted through E-Tender."
+    ]
+
+def test_special_notes_are_collected_by_marker_with_their_section():
+    preprocessor = TenderNoticePreprocessor(FULL_NOTICE)
+    preprocessor.process()
+
+    assert preprocessor.get_special_notes() == {
+        "SPECIAL_NOTE_1": ["Cooked Food Stall Rentals: Please choose only ONE type of trade of sale."],
+        "HALAL_NOTE": ["Cooked Food Stall Rentals: For Halal Cooked Food only. "
+                       "Non-Muslim stallholders must obtain Halal Certification."],
+        "HALAL_OR_INDIAN_CUISINE_NOTE": ["Cooked Food Stall Rentals: "
+                                         "For Indian Cuisine or Halal Cooked Food only."],
+        "SPECIAL_NOTE_2": ["Market Stall Rentals: No roller shutter."]
+    }
+    assert [section.title for section in preprocessor.sections.walk()][:4] == [
+        "", "TENDER NOTICE", "Tender Dates", "Opening"
+    ]